@@ -0,0 +1,59 @@
+DROP TABLE IF EXISTS gold."Monthly_Shipment_Rollup" CASCADE;
+CREATE TABLE gold."Monthly_Shipment_Rollup" AS
+-- One scan and join of the shipments for all four monthly gold tables (sql/rollup/).
+-- Each row is one grouping set, named in the grain column:
+-- 'month', 'vehicle_type' (month and vehicle type) or 'driver' (month and driver).
+-- Silver shipments always have an order, driver and vehicle, so the inner joins drop no rows.
+WITH shipment_facts AS (
+    SELECT
+        s.shipment_id,
+        s.driver_id,
+        s.status,
+        EXTRACT(YEAR FROM s.dispatch_date) AS dispatch_year,
+        EXTRACT(MONTH FROM s.dispatch_date) AS dispatch_month,
+        EXTRACT(EPOCH FROM (s.delivery_date - s.dispatch_date)) / 3600.0 AS delivery_hours,
+        -- On-time is defined as delivered within 72 hours
+        (s.delivery_date - s.dispatch_date) <= INTERVAL '72 hours' AS is_on_time,
+        o.order_total,
+        o.customer_id,
+        v.vehicle_type,
+        d.driver_name
+    FROM
+        silver."Shipments" s
+    JOIN
+        silver."Orders" o ON s.order_id = o.order_id
+    JOIN
+        silver."Vehicles" v ON s.vehicle_id = v.vehicle_id
+    JOIN
+        silver."Drivers" d ON s.driver_id = d.driver_id
+)
+SELECT
+    CASE
+        WHEN GROUPING(vehicle_type) = 0 THEN 'vehicle_type'
+        WHEN GROUPING(driver_id) = 0 THEN 'driver'
+        ELSE 'month'
+    END AS grain,
+    dispatch_year,
+    dispatch_month,
+    vehicle_type,
+    driver_id,
+    driver_name,
+    -- Volume and business metrics
+    COUNT(shipment_id) AS total_shipments,
+    SUM(order_total) AS total_revenue,
+    COUNT(DISTINCT customer_id) AS unique_customers,
+    -- Delivery performance
+    AVG(delivery_hours) AS avg_delivery_hours,
+    SUM(CASE WHEN is_on_time THEN 1 ELSE 0 END) AS on_time_shipments,
+    AVG(CASE WHEN is_on_time THEN 1.0 ELSE 0.0 END) AS on_time_delivery_rate,
+    -- Failures
+    COUNT(shipment_id) FILTER (WHERE status = 'Failed') AS failed_shipments,
+    AVG(CASE WHEN status = 'Failed' THEN 1.0 ELSE 0.0 END) AS failed_shipment_rate,
+    COUNT(DISTINCT driver_id) FILTER (WHERE status = 'Failed') AS failed_unique_drivers
+FROM
+    shipment_facts
+GROUP BY GROUPING SETS (
+    (dispatch_year, dispatch_month),
+    (dispatch_year, dispatch_month, vehicle_type),
+    (dispatch_year, dispatch_month, driver_id, driver_name)
+);
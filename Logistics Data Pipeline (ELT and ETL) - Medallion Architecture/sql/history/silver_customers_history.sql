@@ -0,0 +1,42 @@
+-- Type 2 history of silver."Customers", kept across full rebuilds. Run after every build of
+-- silver."Customers" when SILVER_HISTORY=true: a customer_id whose attributes changed (or that is
+-- no longer in silver) has its current version closed, and a new version is appended for
+-- every customer_id without a current one. valid_to is exclusive; now() is the same for both.
+CREATE TABLE IF NOT EXISTS silver."Customers_History" (
+    customer_id INTEGER NOT NULL,
+    customer_name TEXT,
+    email TEXT,
+    delivery_address TEXT,
+    signup_date DATE,
+    valid_from TIMESTAMPTZ NOT NULL,
+    valid_to TIMESTAMPTZ,
+    is_current BOOLEAN NOT NULL
+);
+-- One current version per customer_id; the lookups below only read the current versions
+CREATE UNIQUE INDEX IF NOT EXISTS customers_history_current_idx
+    ON silver."Customers_History" (customer_id) WHERE is_current;
+
+UPDATE silver."Customers_History" h
+SET valid_to = now(), is_current = FALSE
+WHERE
+    h.is_current
+    AND NOT EXISTS (
+        SELECT 1
+        FROM silver."Customers" c
+        WHERE c.customer_id = h.customer_id
+            AND (c.customer_name, c.email, c.delivery_address, c.signup_date) IS NOT DISTINCT FROM (h.customer_name, h.email, h.delivery_address, h.signup_date)
+    );
+
+-- Returns the versions opened and closed
+WITH opened AS (
+    INSERT INTO silver."Customers_History" (customer_id, customer_name, email, delivery_address, signup_date, valid_from, valid_to, is_current)
+    SELECT c.customer_id, c.customer_name, c.email, c.delivery_address, c.signup_date, now(), NULL, TRUE
+    FROM silver."Customers" c
+    WHERE NOT EXISTS (
+        SELECT 1 FROM silver."Customers_History" h WHERE h.is_current AND h.customer_id = c.customer_id
+    )
+    RETURNING 1
+)
+SELECT
+    (SELECT COUNT(*) FROM opened) AS versions_opened,
+    (SELECT COUNT(*) FROM silver."Customers_History" WHERE valid_to = now()) AS versions_closed;
@@ -0,0 +1,40 @@
+-- Type 2 history of silver."Drivers", kept across full rebuilds. Run after every build of
+-- silver."Drivers" when SILVER_HISTORY=true: a driver_id whose attributes changed (or that is
+-- no longer in silver) has its current version closed, and a new version is appended for
+-- every driver_id without a current one. valid_to is exclusive; now() is the same for both.
+CREATE TABLE IF NOT EXISTS silver."Drivers_History" (
+    driver_id INTEGER NOT NULL,
+    driver_name TEXT,
+    contact_number TEXT,
+    valid_from TIMESTAMPTZ NOT NULL,
+    valid_to TIMESTAMPTZ,
+    is_current BOOLEAN NOT NULL
+);
+-- One current version per driver_id; the lookups below only read the current versions
+CREATE UNIQUE INDEX IF NOT EXISTS drivers_history_current_idx
+    ON silver."Drivers_History" (driver_id) WHERE is_current;
+
+UPDATE silver."Drivers_History" h
+SET valid_to = now(), is_current = FALSE
+WHERE
+    h.is_current
+    AND NOT EXISTS (
+        SELECT 1
+        FROM silver."Drivers" c
+        WHERE c.driver_id = h.driver_id
+            AND (c.driver_name, c.contact_number) IS NOT DISTINCT FROM (h.driver_name, h.contact_number)
+    );
+
+-- Returns the versions opened and closed
+WITH opened AS (
+    INSERT INTO silver."Drivers_History" (driver_id, driver_name, contact_number, valid_from, valid_to, is_current)
+    SELECT c.driver_id, c.driver_name, c.contact_number, now(), NULL, TRUE
+    FROM silver."Drivers" c
+    WHERE NOT EXISTS (
+        SELECT 1 FROM silver."Drivers_History" h WHERE h.is_current AND h.driver_id = c.driver_id
+    )
+    RETURNING 1
+)
+SELECT
+    (SELECT COUNT(*) FROM opened) AS versions_opened,
+    (SELECT COUNT(*) FROM silver."Drivers_History" WHERE valid_to = now()) AS versions_closed;
@@ -0,0 +1,40 @@
+-- Type 2 history of silver."Vehicles", kept across full rebuilds. Run after every build of
+-- silver."Vehicles" when SILVER_HISTORY=true: a vehicle_id whose attributes changed (or that is
+-- no longer in silver) has its current version closed, and a new version is appended for
+-- every vehicle_id without a current one. valid_to is exclusive; now() is the same for both.
+CREATE TABLE IF NOT EXISTS silver."Vehicles_History" (
+    vehicle_id INTEGER NOT NULL,
+    license_plate TEXT,
+    vehicle_type TEXT,
+    valid_from TIMESTAMPTZ NOT NULL,
+    valid_to TIMESTAMPTZ,
+    is_current BOOLEAN NOT NULL
+);
+-- One current version per vehicle_id; the lookups below only read the current versions
+CREATE UNIQUE INDEX IF NOT EXISTS vehicles_history_current_idx
+    ON silver."Vehicles_History" (vehicle_id) WHERE is_current;
+
+UPDATE silver."Vehicles_History" h
+SET valid_to = now(), is_current = FALSE
+WHERE
+    h.is_current
+    AND NOT EXISTS (
+        SELECT 1
+        FROM silver."Vehicles" c
+        WHERE c.vehicle_id = h.vehicle_id
+            AND (c.license_plate, c.vehicle_type) IS NOT DISTINCT FROM (h.license_plate, h.vehicle_type)
+    );
+
+-- Returns the versions opened and closed
+WITH opened AS (
+    INSERT INTO silver."Vehicles_History" (vehicle_id, license_plate, vehicle_type, valid_from, valid_to, is_current)
+    SELECT c.vehicle_id, c.license_plate, c.vehicle_type, now(), NULL, TRUE
+    FROM silver."Vehicles" c
+    WHERE NOT EXISTS (
+        SELECT 1 FROM silver."Vehicles_History" h WHERE h.is_current AND h.vehicle_id = c.vehicle_id
+    )
+    RETURNING 1
+)
+SELECT
+    (SELECT COUNT(*) FROM opened) AS versions_opened,
+    (SELECT COUNT(*) FROM silver."Vehicles_History" WHERE valid_to = now()) AS versions_closed;
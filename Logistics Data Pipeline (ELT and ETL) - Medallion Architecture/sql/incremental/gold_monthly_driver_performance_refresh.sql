@@ -0,0 +1,30 @@
+-- Re-aggregates only the months listed in :months (first day of each month).
+-- :first_month and :last_month bound the months on the partition key of silver."Shipments",
+-- so only the partitions of those months are scanned.
+-- Mirrors gold_monthly_driver_performance.sql.
+DELETE FROM gold."Monthly_Driver_Performance"
+WHERE MAKE_DATE(performance_year::INTEGER, performance_month::INTEGER, 1) = ANY(CAST(:months AS DATE[]));
+
+INSERT INTO gold."Monthly_Driver_Performance"
+SELECT
+    d.driver_id,
+    d.driver_name,
+    EXTRACT(YEAR FROM s.dispatch_date) AS performance_year,
+    EXTRACT(MONTH FROM s.dispatch_date) AS performance_month,
+    COUNT(s.shipment_id) AS total_shipments,
+    -- On-time is defined here as delivered within 72 hours
+    SUM(CASE WHEN (s.delivery_date - s.dispatch_date) <= INTERVAL '72 hours' THEN 1 ELSE 0 END) AS on_time_shipments,
+    AVG(EXTRACT(EPOCH FROM (s.delivery_date - s.dispatch_date)) / 3600.0) AS avg_delivery_hours
+FROM
+    silver."Shipments" s
+JOIN
+    silver."Drivers" d ON s.driver_id = d.driver_id
+WHERE
+    s.dispatch_date >= CAST(:first_month AS DATE)
+    AND s.dispatch_date < CAST(:last_month AS DATE) + INTERVAL '1 month'
+    AND DATE_TRUNC('month', s.dispatch_date)::DATE = ANY(CAST(:months AS DATE[]))
+GROUP BY
+    d.driver_id,
+    d.driver_name,
+    performance_year,
+    performance_month;
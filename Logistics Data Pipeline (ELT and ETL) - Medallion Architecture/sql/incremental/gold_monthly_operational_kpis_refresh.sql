@@ -0,0 +1,32 @@
+-- Re-aggregates only the months listed in :months (first day of each month).
+-- :first_month and :last_month bound the months on the partition key of silver."Shipments",
+-- so only the partitions of those months are scanned.
+-- Mirrors gold_monthly_operational_kpis.sql.
+DELETE FROM gold."Monthly_Operational_KPIs"
+WHERE MAKE_DATE(performance_year::INTEGER, performance_month::INTEGER, 1) = ANY(CAST(:months AS DATE[]));
+
+INSERT INTO gold."Monthly_Operational_KPIs"
+SELECT
+    EXTRACT(YEAR FROM s.dispatch_date) AS performance_year,
+    EXTRACT(MONTH FROM s.dispatch_date) AS performance_month,
+    -- Business Metrics
+    SUM(o.order_total) AS total_revenue,
+    COUNT(s.shipment_id) AS total_shipments,
+    COUNT(DISTINCT o.customer_id) AS unique_customers,
+    -- Performance KPIs
+    AVG(EXTRACT(EPOCH FROM (s.delivery_date - s.dispatch_date)) / 3600.0) AS avg_delivery_hours,
+    -- Calculate On-Time Rate (delivered within 72 hours)
+    AVG(CASE WHEN (s.delivery_date - s.dispatch_date) <= INTERVAL '72 hours' THEN 1.0 ELSE 0.0 END) AS on_time_delivery_rate,
+    -- Calculate Failure Rate
+    AVG(CASE WHEN s.status = 'Failed' THEN 1.0 ELSE 0.0 END) AS failed_shipment_rate
+FROM
+    silver."Shipments" s
+JOIN
+    silver."Orders" o ON s.order_id = o.order_id
+WHERE
+    s.dispatch_date >= CAST(:first_month AS DATE)
+    AND s.dispatch_date < CAST(:last_month AS DATE) + INTERVAL '1 month'
+    AND DATE_TRUNC('month', s.dispatch_date)::DATE = ANY(CAST(:months AS DATE[]))
+GROUP BY
+    performance_year,
+    performance_month;
@@ -0,0 +1,29 @@
+-- Re-aggregates only the months listed in :months (first day of each month).
+-- :first_month and :last_month bound the months on the partition key of silver."Shipments",
+-- so only the partitions of those months are scanned.
+-- Mirrors gold_vehicle_failure_analysis.sql.
+DELETE FROM gold."Vehicle_Failure_Analysis"
+WHERE MAKE_DATE(failure_year::INTEGER, failure_month::INTEGER, 1) = ANY(CAST(:months AS DATE[]));
+
+INSERT INTO gold."Vehicle_Failure_Analysis"
+SELECT
+    v.vehicle_type,
+    EXTRACT(YEAR FROM s.dispatch_date) AS failure_year,
+    EXTRACT(MONTH FROM s.dispatch_date) AS failure_month,
+    -- Failure Metrics
+    COUNT(s.shipment_id) AS count_of_failed_shipments,
+    COUNT(DISTINCT s.driver_id) AS unique_drivers_involved
+FROM
+    silver."Shipments" s
+JOIN
+    silver."Vehicles" v ON s.vehicle_id = v.vehicle_id
+-- Filter for only the failed shipments
+WHERE
+    s.status = 'Failed'
+    AND s.dispatch_date >= CAST(:first_month AS DATE)
+    AND s.dispatch_date < CAST(:last_month AS DATE) + INTERVAL '1 month'
+    AND DATE_TRUNC('month', s.dispatch_date)::DATE = ANY(CAST(:months AS DATE[]))
+GROUP BY
+    v.vehicle_type,
+    failure_year,
+    failure_month;
@@ -0,0 +1,26 @@
+-- Re-aggregates only the months listed in :months (first day of each month).
+-- :first_month and :last_month bound the months on the partition key of silver."Shipments",
+-- so only the partitions of those months are scanned.
+-- Mirrors gold_vehicle_utilization_summary.sql.
+DELETE FROM gold."Vehicle_Utilization_Summary"
+WHERE MAKE_DATE(usage_year::INTEGER, usage_month::INTEGER, 1) = ANY(CAST(:months AS DATE[]));
+
+INSERT INTO gold."Vehicle_Utilization_Summary"
+SELECT
+    v.vehicle_type,
+    EXTRACT(YEAR FROM s.dispatch_date) AS usage_year,
+    EXTRACT(MONTH FROM s.dispatch_date) AS usage_month,
+    COUNT(s.shipment_id) AS total_shipments,
+    AVG(EXTRACT(EPOCH FROM (s.delivery_date - s.dispatch_date)) / 3600.0) AS avg_delivery_hours
+FROM
+    silver."Shipments" s
+JOIN
+    silver."Vehicles" v ON s.vehicle_id = v.vehicle_id
+WHERE
+    s.dispatch_date >= CAST(:first_month AS DATE)
+    AND s.dispatch_date < CAST(:last_month AS DATE) + INTERVAL '1 month'
+    AND DATE_TRUNC('month', s.dispatch_date)::DATE = ANY(CAST(:months AS DATE[]))
+GROUP BY
+    v.vehicle_type,
+    usage_year,
+    usage_month;
@@ -0,0 +1,40 @@
+-- Incremental upsert of the bronze rows loaded since the last silver build.
+-- Rows whose _row_hash is already on a silver row are unchanged and dropped by a hash
+-- anti-join first, so a full bronze reload only sorts the rows that changed.
+-- Mirrors silver_customers.sql: the row with the latest signup_date wins per customer.
+-- No month-grained gold table reads customer attributes, so no gold months are affected.
+WITH upserted AS (
+    INSERT INTO silver."Customers" (customer_id, customer_name, email, delivery_address, signup_date, _row_hash)
+    SELECT DISTINCT ON (customer_id::INTEGER)
+        customer_id::INTEGER,
+        INITCAP(TRIM(customer_name)) AS customer_name,
+        REPLACE(LOWER(TRIM(email)), ' ', '') AS email,
+        delivery_address,
+        TO_DATE(signup_date, 'YYYY-MM-DD') AS signup_date,
+        b._row_hash
+    FROM
+        bronze."Customers" b
+    WHERE
+        _loaded_at > :since AND _loaded_at <= :until
+        AND NOT EXISTS (SELECT 1 FROM silver."Customers" s WHERE s._row_hash = b._row_hash)
+        AND REPLACE(LOWER(TRIM(email)), ' ', '') LIKE '%@%.%'
+        AND LOWER(email) NOT LIKE '%invalid%'
+    ORDER BY
+        customer_id::INTEGER,
+        TO_DATE(signup_date, 'YYYY-MM-DD') DESC,
+        _loaded_at DESC
+    ON CONFLICT (customer_id) DO UPDATE SET
+        customer_name = EXCLUDED.customer_name,
+        email = EXCLUDED.email,
+        delivery_address = EXCLUDED.delivery_address,
+        signup_date = EXCLUDED.signup_date,
+        _row_hash = EXCLUDED._row_hash
+    -- Same precedence as ORDER BY signup_date DESC (NULLs sort first)
+    WHERE
+        EXCLUDED.signup_date IS NULL
+        OR (silver."Customers".signup_date IS NOT NULL AND EXCLUDED.signup_date >= silver."Customers".signup_date)
+    RETURNING customer_id
+)
+SELECT
+    (SELECT COUNT(*) FROM upserted) AS upserted_rows,
+    ARRAY[]::DATE[] AS affected_months;
@@ -0,0 +1,39 @@
+-- Incremental upsert of the bronze rows loaded since the last silver build.
+-- Rows whose _row_hash is already on a silver row are unchanged and dropped by a hash
+-- anti-join first, so a full bronze reload only sorts the rows that changed.
+-- Mirrors silver_drivers.sql: test drivers are dropped and the greatest driver_name wins per id
+-- within the batch. A changed row replaces the silver one, whatever its name sorts as.
+-- Drivers are reloaded in full, so unchanged rows are left alone and only real changes
+-- mark the months of their shipments for the gold refresh.
+WITH upserted AS (
+    INSERT INTO silver."Drivers" (driver_id, driver_name, contact_number, _row_hash)
+    SELECT DISTINCT ON (driver_id::INTEGER)
+        driver_id::INTEGER,
+        TRIM(driver_name) AS driver_name,
+        REGEXP_REPLACE(contact_number, '[^0-9]', '', 'g') AS contact_number,
+        b._row_hash
+    FROM
+        bronze."Drivers" b
+    WHERE
+        _loaded_at > :since AND _loaded_at <= :until
+        AND NOT EXISTS (SELECT 1 FROM silver."Drivers" s WHERE s._row_hash = b._row_hash)
+        AND LOWER(driver_name) NOT LIKE '%test%'
+    ORDER BY
+        driver_id::INTEGER,
+        driver_name DESC
+    ON CONFLICT (driver_id) DO UPDATE SET
+        driver_name = EXCLUDED.driver_name,
+        contact_number = EXCLUDED.contact_number,
+        _row_hash = EXCLUDED._row_hash
+    WHERE
+        (EXCLUDED.driver_name, EXCLUDED.contact_number)
+            IS DISTINCT FROM (silver."Drivers".driver_name, silver."Drivers".contact_number)
+    RETURNING driver_id
+)
+SELECT
+    (SELECT COUNT(*) FROM upserted) AS upserted_rows,
+    ARRAY(
+        SELECT DISTINCT DATE_TRUNC('month', s.dispatch_date)::DATE
+        FROM silver."Shipments" s
+        WHERE s.driver_id IN (SELECT driver_id FROM upserted)
+    ) AS affected_months;
@@ -0,0 +1,57 @@
+-- Incremental upsert of the bronze rows loaded since the last silver build.
+-- Mirrors silver_orders.sql; the most recently loaded row wins per order.
+-- Returns the dispatch months of the shipments of every upserted order for the gold refresh.
+WITH cleaned_orders AS (
+    SELECT
+        order_id,
+        customer_id,
+        order_total,
+        order_total_num,
+        _loaded_at,
+        CASE
+            WHEN order_date_parsed IS NOT NULL
+                THEN order_date_parsed::DATE
+            WHEN order_date ~ '^\d{4}-\d{2}-\d{2}$'
+                THEN TO_DATE(order_date, 'YYYY-MM-DD')
+            WHEN order_date ~ '^\d{2}-[A-Za-z]{3}-\d{4}$'
+                THEN TO_DATE(order_date, 'DD-Mon-YYYY')
+            WHEN order_date ~ '^\d{1,2}/\d{1,2}/\d{4}$' AND SPLIT_PART(order_date, '/', 1)::INTEGER BETWEEN 1 AND 12
+                THEN TO_DATE(order_date, 'MM/DD/YYYY')
+            WHEN order_date ~ '^\d{1,2}/\d{1,2}/\d{4}$' AND SPLIT_PART(order_date, '/', 2)::INTEGER BETWEEN 1 AND 12
+                THEN TO_DATE(order_date, 'DD/MM/YYYY')
+            ELSE NULL
+        END AS cleaned_order_date
+    FROM
+        bronze."Orders"
+    WHERE
+        _loaded_at > :since AND _loaded_at <= :until
+),
+upserted AS (
+    INSERT INTO silver."Orders" (order_id, customer_id, order_date, order_total)
+    SELECT DISTINCT ON (o.order_id::INTEGER)
+        o.order_id::INTEGER,
+        o.customer_id::INTEGER,
+        o.cleaned_order_date AS order_date,
+        COALESCE(o.order_total_num, REPLACE(REGEXP_REPLACE(o.order_total, '[^0-9.]', '', 'g'), ',', ''))::DECIMAL(10, 2) AS order_total
+    FROM
+        cleaned_orders o
+    JOIN
+        silver."Customers" c ON o.customer_id = c.customer_id::VARCHAR
+    WHERE
+        o.cleaned_order_date IS NOT NULL
+    ORDER BY
+        o.order_id::INTEGER,
+        o._loaded_at DESC
+    ON CONFLICT (order_id) DO UPDATE SET
+        customer_id = EXCLUDED.customer_id,
+        order_date = EXCLUDED.order_date,
+        order_total = EXCLUDED.order_total
+    RETURNING order_id
+)
+SELECT
+    (SELECT COUNT(*) FROM upserted) AS upserted_rows,
+    ARRAY(
+        SELECT DISTINCT DATE_TRUNC('month', s.dispatch_date)::DATE
+        FROM silver."Shipments" s
+        WHERE s.order_id IN (SELECT order_id FROM upserted)
+    ) AS affected_months;
@@ -0,0 +1,71 @@
+-- Incremental upsert of the bronze rows loaded since the last silver build, into the
+-- month-partitioned table (SILVER_PARTITIONING); silver_orders_merge.sql is the unpartitioned one.
+-- Mirrors silver_orders.sql; the most recently loaded row wins per order.
+-- Returns the dispatch months of the shipments of every upserted order for the gold refresh.
+CREATE TEMP TABLE orders_incoming ON COMMIT DROP AS
+WITH cleaned_orders AS (
+    SELECT
+        order_id,
+        customer_id,
+        order_total,
+        order_total_num,
+        _loaded_at,
+        CASE
+            WHEN order_date_parsed IS NOT NULL
+                THEN order_date_parsed::DATE
+            WHEN order_date ~ '^\d{4}-\d{2}-\d{2}$'
+                THEN TO_DATE(order_date, 'YYYY-MM-DD')
+            WHEN order_date ~ '^\d{2}-[A-Za-z]{3}-\d{4}$'
+                THEN TO_DATE(order_date, 'DD-Mon-YYYY')
+            WHEN order_date ~ '^\d{1,2}/\d{1,2}/\d{4}$' AND SPLIT_PART(order_date, '/', 1)::INTEGER BETWEEN 1 AND 12
+                THEN TO_DATE(order_date, 'MM/DD/YYYY')
+            WHEN order_date ~ '^\d{1,2}/\d{1,2}/\d{4}$' AND SPLIT_PART(order_date, '/', 2)::INTEGER BETWEEN 1 AND 12
+                THEN TO_DATE(order_date, 'DD/MM/YYYY')
+            ELSE NULL
+        END AS cleaned_order_date
+    FROM
+        bronze."Orders"
+    WHERE
+        _loaded_at > :since AND _loaded_at <= :until
+)
+SELECT DISTINCT ON (o.order_id::INTEGER)
+    o.order_id::INTEGER,
+    o.customer_id::INTEGER,
+    o.cleaned_order_date AS order_date,
+    COALESCE(o.order_total_num, REPLACE(REGEXP_REPLACE(o.order_total, '[^0-9.]', '', 'g'), ',', ''))::DECIMAL(10, 2) AS order_total
+FROM
+    cleaned_orders o
+JOIN
+    silver."Customers" c ON o.customer_id = c.customer_id::VARCHAR
+WHERE
+    o.cleaned_order_date IS NOT NULL
+ORDER BY
+    o.order_id::INTEGER,
+    o._loaded_at DESC;
+
+SELECT silver.create_month_partitions(
+    'Orders', ARRAY(SELECT DISTINCT DATE_TRUNC('month', order_date)::DATE FROM orders_incoming)
+);
+
+-- The key includes the partition column, so an order whose date changed is removed
+-- from its old month and inserted into the new one
+WITH moved AS (
+    DELETE FROM silver."Orders" o
+    USING orders_incoming i
+    WHERE o.order_id = i.order_id AND o.order_date <> i.order_date
+),
+upserted AS (
+    INSERT INTO silver."Orders" (order_id, customer_id, order_date, order_total)
+    SELECT order_id, customer_id, order_date, order_total FROM orders_incoming
+    ON CONFLICT (order_id, order_date) DO UPDATE SET
+        customer_id = EXCLUDED.customer_id,
+        order_total = EXCLUDED.order_total
+    RETURNING order_id
+)
+SELECT
+    (SELECT COUNT(*) FROM upserted) AS upserted_rows,
+    ARRAY(
+        SELECT DISTINCT DATE_TRUNC('month', s.dispatch_date)::DATE
+        FROM silver."Shipments" s
+        WHERE s.order_id IN (SELECT order_id FROM upserted)
+    ) AS affected_months;
@@ -0,0 +1,70 @@
+-- Incremental upsert of the bronze rows loaded since the last silver build, into the
+-- month-partitioned table (SILVER_PARTITIONING); silver_shipments_merge.sql is the unpartitioned one.
+-- Mirrors silver_shipments.sql; the most recently loaded row wins per shipment.
+-- Returns the dispatch months of every upserted shipment, before and after the update,
+-- for the gold refresh (all parts of the last statement see the table as it was before it ran).
+CREATE TEMP TABLE shipments_incoming ON COMMIT DROP AS
+SELECT DISTINCT ON (s.shipment_id::INTEGER)
+    s.shipment_id::INTEGER,
+    s.order_id::INTEGER,
+    s.driver_id::INTEGER,
+    s.vehicle_id::INTEGER,
+    s.dispatch_date::TIMESTAMP,
+    s.delivery_date::TIMESTAMP,
+    CASE
+        WHEN LOWER(s.status) IN ('delivered', 'd', 'completed') THEN 'Delivered'
+        WHEN LOWER(s.status) IN ('in transit', 'in_transit', 'processing') THEN 'In Transit'
+        ELSE 'Failed'
+    END AS status
+FROM
+    bronze."Shipments" s
+JOIN
+    silver."Orders" o ON s.order_id = o.order_id::VARCHAR
+JOIN
+    silver."Drivers" d ON s.driver_id = d.driver_id::VARCHAR
+JOIN
+    silver."Vehicles" v ON s.vehicle_id = v.vehicle_id::VARCHAR
+WHERE
+    s._loaded_at > :since AND s._loaded_at <= :until
+    AND s.dispatch_date::TIMESTAMP <= s.delivery_date::TIMESTAMP
+ORDER BY
+    s.shipment_id::INTEGER,
+    s._loaded_at DESC;
+
+SELECT silver.create_month_partitions(
+    'Shipments', ARRAY(SELECT DISTINCT DATE_TRUNC('month', dispatch_date)::DATE FROM shipments_incoming)
+);
+
+-- The key includes the partition column, so a shipment whose dispatch date changed is
+-- removed from its old month and inserted into the new one
+WITH previous AS (
+    SELECT
+        s.dispatch_date
+    FROM
+        silver."Shipments" s
+    JOIN
+        shipments_incoming i ON s.shipment_id = i.shipment_id
+),
+moved AS (
+    DELETE FROM silver."Shipments" s
+    USING shipments_incoming i
+    WHERE s.shipment_id = i.shipment_id AND s.dispatch_date <> i.dispatch_date
+),
+upserted AS (
+    INSERT INTO silver."Shipments" (shipment_id, order_id, driver_id, vehicle_id, dispatch_date, delivery_date, status)
+    SELECT shipment_id, order_id, driver_id, vehicle_id, dispatch_date, delivery_date, status FROM shipments_incoming
+    ON CONFLICT (shipment_id, dispatch_date) DO UPDATE SET
+        order_id = EXCLUDED.order_id,
+        driver_id = EXCLUDED.driver_id,
+        vehicle_id = EXCLUDED.vehicle_id,
+        delivery_date = EXCLUDED.delivery_date,
+        status = EXCLUDED.status
+    RETURNING dispatch_date
+)
+SELECT
+    (SELECT COUNT(*) FROM upserted) AS upserted_rows,
+    ARRAY(
+        SELECT DATE_TRUNC('month', dispatch_date)::DATE FROM upserted
+        UNION
+        SELECT DATE_TRUNC('month', dispatch_date)::DATE FROM previous
+    ) AS affected_months;
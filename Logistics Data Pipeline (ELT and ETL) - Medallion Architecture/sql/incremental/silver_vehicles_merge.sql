@@ -0,0 +1,43 @@
+-- Incremental upsert of the bronze rows loaded since the last silver build.
+-- Rows whose _row_hash is already on a silver row are unchanged and dropped by a hash
+-- anti-join first, so a full bronze reload only sorts the rows that changed.
+-- Mirrors silver_vehicles.sql: the greatest license_plate wins per vehicle within the batch.
+-- A changed row replaces the silver one, whatever its plate sorts as.
+-- Vehicles are reloaded in full, so unchanged rows are left alone and only real changes
+-- mark the months of their shipments for the gold refresh.
+WITH upserted AS (
+    INSERT INTO silver."Vehicles" (vehicle_id, license_plate, vehicle_type, _row_hash)
+    SELECT DISTINCT ON (vehicle_id::INTEGER)
+        vehicle_id::INTEGER,
+        TRIM(license_plate) AS license_plate,
+        CASE
+            WHEN LOWER(TRIM(vehicle_type)) LIKE '%van%' THEN 'Van'
+            WHEN LOWER(TRIM(vehicle_type)) LIKE '%truck%' THEN 'Truck'
+            WHEN LOWER(TRIM(vehicle_type)) LIKE '%motorcycle%' THEN 'Motorcycle'
+            ELSE 'Other'
+        END AS vehicle_type,
+        b._row_hash
+    FROM
+        bronze."Vehicles" b
+    WHERE
+        _loaded_at > :since AND _loaded_at <= :until
+        AND NOT EXISTS (SELECT 1 FROM silver."Vehicles" s WHERE s._row_hash = b._row_hash)
+    ORDER BY
+        vehicle_id::INTEGER,
+        license_plate DESC
+    ON CONFLICT (vehicle_id) DO UPDATE SET
+        license_plate = EXCLUDED.license_plate,
+        vehicle_type = EXCLUDED.vehicle_type,
+        _row_hash = EXCLUDED._row_hash
+    WHERE
+        (EXCLUDED.license_plate, EXCLUDED.vehicle_type)
+            IS DISTINCT FROM (silver."Vehicles".license_plate, silver."Vehicles".vehicle_type)
+    RETURNING vehicle_id
+)
+SELECT
+    (SELECT COUNT(*) FROM upserted) AS upserted_rows,
+    ARRAY(
+        SELECT DISTINCT DATE_TRUNC('month', s.dispatch_date)::DATE
+        FROM silver."Shipments" s
+        WHERE s.vehicle_id IN (SELECT vehicle_id FROM upserted)
+    ) AS affected_months;
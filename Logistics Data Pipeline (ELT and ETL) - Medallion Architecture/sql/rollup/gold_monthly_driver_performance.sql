@@ -0,0 +1,15 @@
+DROP TABLE IF EXISTS gold."Monthly_Driver_Performance";
+CREATE TABLE gold."Monthly_Driver_Performance" AS
+-- Projection of the 'driver' rows of gold_monthly_shipment_rollup.sql.
+SELECT
+    driver_id,
+    driver_name,
+    dispatch_year AS performance_year,
+    dispatch_month AS performance_month,
+    total_shipments,
+    on_time_shipments,
+    avg_delivery_hours
+FROM
+    gold."Monthly_Shipment_Rollup"
+WHERE
+    grain = 'driver';
@@ -0,0 +1,21 @@
+DROP TABLE IF EXISTS gold."Monthly_Operational_KPIs" CASCADE;
+CREATE TABLE gold."Monthly_Operational_KPIs" AS
+-- Projection of the 'month' rows of gold_monthly_shipment_rollup.sql.
+SELECT
+    dispatch_year AS performance_year,
+    dispatch_month AS performance_month,
+    -- Business Metrics
+    total_revenue,
+    total_shipments,
+    unique_customers,
+    -- Performance KPIs
+    avg_delivery_hours,
+    on_time_delivery_rate,
+    failed_shipment_rate
+FROM
+    gold."Monthly_Shipment_Rollup"
+WHERE
+    grain = 'month'
+ORDER BY
+    performance_year,
+    performance_month;
@@ -0,0 +1,16 @@
+DROP TABLE IF EXISTS gold."Vehicle_Failure_Analysis" CASCADE;
+CREATE TABLE gold."Vehicle_Failure_Analysis" AS
+-- Projection of the 'vehicle_type' rows of gold_monthly_shipment_rollup.sql.
+SELECT
+    vehicle_type,
+    dispatch_year AS failure_year,
+    dispatch_month AS failure_month,
+    -- Failure Metrics
+    failed_shipments AS count_of_failed_shipments,
+    failed_unique_drivers AS unique_drivers_involved
+FROM
+    gold."Monthly_Shipment_Rollup"
+-- Only vehicle types with failed shipments that month
+WHERE
+    grain = 'vehicle_type'
+    AND failed_shipments > 0;
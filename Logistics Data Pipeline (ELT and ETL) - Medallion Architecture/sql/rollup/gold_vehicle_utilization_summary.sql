@@ -0,0 +1,13 @@
+DROP TABLE IF EXISTS gold."Vehicle_Utilization_Summary";
+CREATE TABLE gold."Vehicle_Utilization_Summary" AS
+-- Projection of the 'vehicle_type' rows of gold_monthly_shipment_rollup.sql.
+SELECT
+    vehicle_type,
+    dispatch_year AS usage_year,
+    dispatch_month AS usage_month,
+    total_shipments,
+    avg_delivery_hours
+FROM
+    gold."Monthly_Shipment_Rollup"
+WHERE
+    grain = 'vehicle_type';
@@ -11,14 +11,16 @@ ALTER TABLE silver."Vehicles" ADD PRIMARY KEY (vehicle_id);
 
 -- Step 2: Add Foreign Keys
 -- A Foreign Key ensures that a value in one table must exist in another.
+-- They are added NOT VALID, which only checks new rows and needs no scan of the table.
+-- add_constraints.py then validates the existing rows in a separate, non-blocking step.
 ALTER TABLE silver."Orders" ADD CONSTRAINT fk_customer
-    FOREIGN KEY (customer_id) REFERENCES silver."Customers" (customer_id);
+    FOREIGN KEY (customer_id) REFERENCES silver."Customers" (customer_id) NOT VALID;
 
 ALTER TABLE silver."Shipments" ADD CONSTRAINT fk_order
-    FOREIGN KEY (order_id) REFERENCES silver."Orders" (order_id);
+    FOREIGN KEY (order_id) REFERENCES silver."Orders" (order_id) NOT VALID;
 
 ALTER TABLE silver."Shipments" ADD CONSTRAINT fk_driver
-    FOREIGN KEY (driver_id) REFERENCES silver."Drivers" (driver_id);
+    FOREIGN KEY (driver_id) REFERENCES silver."Drivers" (driver_id) NOT VALID;
 
 ALTER TABLE silver."Shipments" ADD CONSTRAINT fk_vehicle
-    FOREIGN KEY (vehicle_id) REFERENCES silver."Vehicles" (vehicle_id);
\ No newline at end of file
+    FOREIGN KEY (vehicle_id) REFERENCES silver."Vehicles" (vehicle_id) NOT VALID;
\ No newline at end of file
@@ -0,0 +1,27 @@
+-- This script adds formal constraints to the Silver layer tables.
+-- It should be run AFTER the Silver tables have been successfully built.
+-- Used instead of silver_add_constraints.sql when SILVER_PARTITIONING is set.
+
+-- Step 1: Add Primary Keys
+-- A Primary Key ensures every row is unique and cannot be NULL.
+-- Orders and Shipments are partitioned by month, and a key on a partitioned table
+-- has to include the partition column.
+ALTER TABLE silver."Customers" ADD PRIMARY KEY (customer_id);
+ALTER TABLE silver."Orders" ADD PRIMARY KEY (order_id, order_date);
+ALTER TABLE silver."Shipments" ADD PRIMARY KEY (shipment_id, dispatch_date);
+ALTER TABLE silver."Drivers" ADD PRIMARY KEY (driver_id);
+ALTER TABLE silver."Vehicles" ADD PRIMARY KEY (vehicle_id);
+
+-- Step 2: Add Foreign Keys
+-- A Foreign Key ensures that a value in one table must exist in another.
+-- Postgres cannot add NOT VALID foreign keys to partitioned tables, so these are checked
+-- when added. Shipments.order_id has no foreign key: Orders is unique only on
+-- (order_id, order_date). silver_shipments.sql already drops shipments without an order.
+ALTER TABLE silver."Orders" ADD CONSTRAINT fk_customer
+    FOREIGN KEY (customer_id) REFERENCES silver."Customers" (customer_id);
+
+ALTER TABLE silver."Shipments" ADD CONSTRAINT fk_driver
+    FOREIGN KEY (driver_id) REFERENCES silver."Drivers" (driver_id);
+
+ALTER TABLE silver."Shipments" ADD CONSTRAINT fk_vehicle
+    FOREIGN KEY (vehicle_id) REFERENCES silver."Vehicles" (vehicle_id);
@@ -1,28 +1,64 @@
 DROP TABLE IF EXISTS silver."Customers" CASCADE;
-CREATE TABLE silver."Customers" AS
-WITH ranked_customers AS (
+CREATE TABLE silver."Customers" (
+    customer_id INTEGER,
+    customer_name TEXT,
+    email TEXT,
+    delivery_address TEXT,
+    signup_date DATE,
+    -- bronze._row_hash of the row kept, which incremental merges compare against
+    _row_hash TEXT
+);
+
+-- Rejected bronze rows, as loaded, with the reason they were left out of silver
+DROP TABLE IF EXISTS quarantine."Customers";
+CREATE TABLE quarantine."Customers" AS
+SELECT *, CAST(NULL AS TEXT) AS rejection_reason FROM bronze."Customers" LIMIT 0;
+
+-- One scan of bronze feeds both tables. Returns the silver and quarantine row counts,
+-- and the quarantined rows per reason.
+WITH classified AS (
     SELECT
-        customer_id,
-        INITCAP(TRIM(customer_name)) AS customer_name,
+        b.*,
+        CASE
+            -- This check works on the cleaned email (a missing email is invalid too)
+            WHEN (
+                REPLACE(LOWER(TRIM(email)), ' ', '') LIKE '%@%.%'
+                AND LOWER(email) NOT LIKE '%invalid%'
+            ) IS NOT TRUE THEN 'invalid_email'
+            -- Keep only the latest signup per customer among the valid rows, and of versions
+            -- with the same signup (appended by incremental bronze loads) the latest loaded one
+            WHEN ROW_NUMBER() OVER(
+                PARTITION BY customer_id, REPLACE(LOWER(TRIM(email)), ' ', '') LIKE '%@%.%' AND LOWER(email) NOT LIKE '%invalid%'
+                ORDER BY TO_DATE(signup_date, 'YYYY-MM-DD') DESC, _loaded_at DESC
+            ) > 1 THEN 'duplicate'
+        END AS rejection_reason
+    FROM
+        bronze."Customers" b
+),
+rejected AS (
+    INSERT INTO quarantine."Customers" (customer_id, customer_name, email, delivery_address, signup_date, _loaded_at, _batch_id, _row_hash, rejection_reason)
+    SELECT customer_id, customer_name, email, delivery_address, signup_date, _loaded_at, _batch_id, _row_hash, rejection_reason
+    FROM classified
+    WHERE rejection_reason IS NOT NULL
+    RETURNING rejection_reason
+),
+kept AS (
+    INSERT INTO silver."Customers" (customer_id, customer_name, email, delivery_address, signup_date, _row_hash)
+    SELECT
+        customer_id::INTEGER,
+        INITCAP(TRIM(customer_name)),
         -- CORRECTED: Added REPLACE() to remove all spaces from the email
-        REPLACE(LOWER(TRIM(email)), ' ', '') AS email,
+        REPLACE(LOWER(TRIM(email)), ' ', ''),
         delivery_address,
-        TO_DATE(signup_date, 'YYYY-MM-DD') AS signup_date,
-        ROW_NUMBER() OVER(PARTITION BY customer_id ORDER BY TO_DATE(signup_date, 'YYYY-MM-DD') DESC) as rn
-    FROM
-        bronze."Customers"
-    WHERE
-        -- This check will now work on the cleaned email
-        REPLACE(LOWER(TRIM(email)), ' ', '') LIKE '%@%.%'
-        AND LOWER(email) NOT LIKE '%invalid%'
+        TO_DATE(signup_date, 'YYYY-MM-DD'),
+        _row_hash
+    FROM classified
+    WHERE rejection_reason IS NULL
+    RETURNING 1
 )
 SELECT
-    customer_id::INTEGER,
-    customer_name,
-    email,
-    delivery_address,
-    signup_date
-FROM
-    ranked_customers
-WHERE
-    rn = 1;
\ No newline at end of file
+    (SELECT COUNT(*) FROM kept) AS rows_written,
+    (SELECT COUNT(*) FROM rejected) AS rows_rejected,
+    (SELECT json_object_agg(rejection_reason, n) FROM (
+        SELECT rejection_reason, COUNT(*) AS n FROM rejected GROUP BY rejection_reason
+    ) reasons) AS rejection_reasons;
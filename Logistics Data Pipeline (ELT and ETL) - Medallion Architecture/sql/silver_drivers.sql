@@ -1,21 +1,56 @@
 DROP TABLE IF EXISTS silver."Drivers" CASCADE;
-CREATE TABLE silver."Drivers" AS
-WITH ranked_drivers AS (
+CREATE TABLE silver."Drivers" (
+    driver_id INTEGER,
+    driver_name TEXT,
+    contact_number TEXT,
+    -- bronze._row_hash of the row kept, which incremental merges compare against
+    _row_hash TEXT
+);
+
+-- Rejected bronze rows, as loaded, with the reason they were left out of silver
+DROP TABLE IF EXISTS quarantine."Drivers";
+CREATE TABLE quarantine."Drivers" AS
+SELECT *, CAST(NULL AS TEXT) AS rejection_reason FROM bronze."Drivers" LIMIT 0;
+
+-- One scan of bronze feeds both tables. Returns the silver and quarantine row counts,
+-- and the quarantined rows per reason.
+WITH classified AS (
     SELECT
-        driver_id,
-        TRIM(driver_name) AS driver_name,
-        REGEXP_REPLACE(contact_number, '[^0-9]', '', 'g') AS contact_number,
-        ROW_NUMBER() OVER(PARTITION BY driver_id ORDER BY driver_name DESC) as rn
+        b.*,
+        CASE
+            WHEN driver_name IS NULL THEN 'missing_name'
+            -- Test accounts are not real drivers
+            WHEN LOWER(driver_name) LIKE '%test%' THEN 'test_driver'
+            -- One row per driver among the valid rows
+            WHEN ROW_NUMBER() OVER(
+                PARTITION BY driver_id, LOWER(driver_name) NOT LIKE '%test%'
+                ORDER BY driver_name DESC
+            ) > 1 THEN 'duplicate'
+        END AS rejection_reason
     FROM
-        bronze."Drivers"
-    WHERE
-        LOWER(driver_name) NOT LIKE '%test%'
+        bronze."Drivers" b
+),
+rejected AS (
+    INSERT INTO quarantine."Drivers" (driver_id, driver_name, contact_number, _loaded_at, _batch_id, _row_hash, rejection_reason)
+    SELECT driver_id, driver_name, contact_number, _loaded_at, _batch_id, _row_hash, rejection_reason
+    FROM classified
+    WHERE rejection_reason IS NOT NULL
+    RETURNING rejection_reason
+),
+kept AS (
+    INSERT INTO silver."Drivers" (driver_id, driver_name, contact_number, _row_hash)
+    SELECT
+        driver_id::INTEGER,
+        TRIM(driver_name),
+        REGEXP_REPLACE(contact_number, '[^0-9]', '', 'g'),
+        _row_hash
+    FROM classified
+    WHERE rejection_reason IS NULL
+    RETURNING 1
 )
 SELECT
-    driver_id::INTEGER,
-    driver_name,
-    contact_number
-FROM
-    ranked_drivers
-WHERE
-    rn = 1;
\ No newline at end of file
+    (SELECT COUNT(*) FROM kept) AS rows_written,
+    (SELECT COUNT(*) FROM rejected) AS rows_rejected,
+    (SELECT json_object_agg(rejection_reason, n) FROM (
+        SELECT rejection_reason, COUNT(*) AS n FROM rejected GROUP BY rejection_reason
+    ) reasons) AS rejection_reasons;
@@ -0,0 +1,13 @@
+-- This script adds the indexes that back the Silver foreign keys and the Gold joins.
+-- It is run by add_constraints.py outside a transaction, so each index is built
+-- CONCURRENTLY without blocking reads or writes on the table.
+
+-- Foreign key columns used by every gold join
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_orders_customer_id ON silver."Orders" (customer_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_shipments_order_id ON silver."Shipments" (order_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_shipments_driver_id ON silver."Shipments" (driver_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_shipments_vehicle_id ON silver."Shipments" (vehicle_id);
+
+-- Dispatch month, used by the incremental gold refresh scripts
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_shipments_dispatch_month
+    ON silver."Shipments" ((DATE_TRUNC('month', dispatch_date)::DATE));
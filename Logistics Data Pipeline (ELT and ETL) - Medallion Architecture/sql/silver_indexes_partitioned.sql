@@ -0,0 +1,12 @@
+-- This script adds the indexes that back the Silver foreign keys and the Gold joins.
+-- Used instead of silver_indexes.sql when SILVER_PARTITIONING is set.
+-- It is run by add_constraints.py outside a transaction, so each index is committed on its own.
+-- Orders and Shipments are partitioned, and Postgres cannot build indexes on partitioned
+-- tables concurrently: each index is built partition by partition, blocking writes (not
+-- reads) to the table while it builds. Partitions created later get the same indexes automatically.
+
+-- Foreign key columns used by every gold join
+CREATE INDEX IF NOT EXISTS idx_orders_customer_id ON silver."Orders" (customer_id);
+CREATE INDEX IF NOT EXISTS idx_shipments_order_id ON silver."Shipments" (order_id);
+CREATE INDEX IF NOT EXISTS idx_shipments_driver_id ON silver."Shipments" (driver_id);
+CREATE INDEX IF NOT EXISTS idx_shipments_vehicle_id ON silver."Shipments" (vehicle_id);
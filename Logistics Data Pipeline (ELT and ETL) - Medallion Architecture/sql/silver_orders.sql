@@ -1,12 +1,15 @@
 DROP TABLE IF EXISTS silver."Orders" CASCADE;
-CREATE TABLE silver."Orders" AS
+-- Bronze rows are classified first, so the month partitions the valid ones need can be
+-- created before they are inserted
+CREATE TEMP TABLE orders_classified ON COMMIT DROP AS
 WITH cleaned_orders AS (
     SELECT
-        order_id,
-        customer_id,
-        order_total,
+        b.*,
         -- Use a CASE statement to handle different date formats safely
         CASE
+            -- Already parsed at extraction when BRONZE_NORMALIZE is on
+            WHEN order_date_parsed IS NOT NULL
+                THEN order_date_parsed::DATE
             -- Format: YYYY-MM-DD
             WHEN order_date ~ '^\d{4}-\d{2}-\d{2}$'
                 THEN TO_DATE(order_date, 'YYYY-MM-DD')
@@ -22,18 +25,70 @@ WITH cleaned_orders AS (
             ELSE NULL -- If none of the formats match, it's truly invalid
         END AS cleaned_order_date
     FROM
-        bronze."Orders"
+        bronze."Orders" b
 )
 SELECT
-    o.order_id::INTEGER,
-    o.customer_id::INTEGER,
-    o.cleaned_order_date AS order_date,
-    REPLACE(REGEXP_REPLACE(o.order_total, '[^0-9.]', '', 'g'), ',', '')::DECIMAL(10, 2) AS order_total
+    o.*,
+    CASE
+        -- Data Quality (FK) Check: Ensure the customer exists
+        WHEN c.customer_id IS NULL THEN 'unknown_customer'
+        -- Data Quality Check: the date matched none of the formats
+        WHEN o.cleaned_order_date IS NULL THEN 'invalid_order_date'
+        -- Incremental bronze loads append changed orders again: keep the latest loaded valid row
+        WHEN ROW_NUMBER() OVER(
+            PARTITION BY o.order_id, c.customer_id IS NULL OR o.cleaned_order_date IS NULL
+            ORDER BY o._loaded_at DESC
+        ) > 1 THEN 'superseded'
+    END AS rejection_reason
 FROM
     cleaned_orders o
--- Data Quality (FK) Check: Ensure the customer exists
-JOIN
-    silver."Customers" c ON o.customer_id = c.customer_id::VARCHAR
--- Data Quality Check: Filter out rows where date conversion failed
-WHERE
-    o.cleaned_order_date IS NOT NULL;
\ No newline at end of file
+LEFT JOIN
+    silver."Customers" c ON o.customer_id = c.customer_id::VARCHAR;
+
+-- Range-partitioned by month, so month-bounded queries only scan the months they need.
+-- Without SILVER_PARTITIONING the PARTITION BY clause and the partition call are removed.
+CREATE TABLE silver."Orders" (
+    order_id INTEGER NOT NULL,
+    customer_id INTEGER,
+    order_date DATE NOT NULL,
+    order_total DECIMAL(10, 2)
+) PARTITION BY RANGE (order_date);
+
+SELECT silver.create_month_partitions(
+    'Orders', ARRAY(
+        SELECT DISTINCT DATE_TRUNC('month', cleaned_order_date)::DATE
+        FROM orders_classified
+        WHERE rejection_reason IS NULL
+    )
+);
+
+-- Rejected bronze rows, as loaded, with the reason they were left out of silver
+DROP TABLE IF EXISTS quarantine."Orders";
+CREATE TABLE quarantine."Orders" AS
+SELECT *, CAST(NULL AS TEXT) AS rejection_reason FROM bronze."Orders" LIMIT 0;
+
+-- Returns the silver and quarantine row counts, and the quarantined rows per reason
+WITH rejected AS (
+    INSERT INTO quarantine."Orders" (order_id, customer_id, order_date, order_total, order_date_parsed, order_total_num, _loaded_at, _batch_id, _row_hash, rejection_reason)
+    SELECT order_id, customer_id, order_date, order_total, order_date_parsed, order_total_num, _loaded_at, _batch_id, _row_hash, rejection_reason
+    FROM orders_classified
+    WHERE rejection_reason IS NOT NULL
+    RETURNING rejection_reason
+),
+kept AS (
+    INSERT INTO silver."Orders" (order_id, customer_id, order_date, order_total)
+    SELECT
+        order_id::INTEGER,
+        customer_id::INTEGER,
+        cleaned_order_date,
+        COALESCE(order_total_num, REPLACE(REGEXP_REPLACE(order_total, '[^0-9.]', '', 'g'), ',', ''))::DECIMAL(10, 2)
+    FROM orders_classified
+    WHERE rejection_reason IS NULL
+    RETURNING 1
+)
+SELECT
+    (SELECT COUNT(*) FROM kept) AS rows_written,
+    (SELECT COUNT(*) FROM rejected) AS rows_rejected,
+    (SELECT json_object_agg(rejection_reason, n) FROM (
+        SELECT rejection_reason, COUNT(*) AS n FROM rejected GROUP BY rejection_reason
+    ) reasons) AS rejection_reasons;
@@ -0,0 +1,27 @@
+-- Helper for the month-partitioned silver tables (Orders by order_date, Shipments by dispatch_date).
+-- Installed by push_to_silver.py before each build. Creates the partition silver."<Table>_YYYY_MM"
+-- for every month in `months` that does not have one yet and returns the number created.
+-- Rows must be routed to an existing partition, so scripts call it before they insert.
+CREATE OR REPLACE FUNCTION silver.create_month_partitions(parent_table TEXT, months DATE[])
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    FOREACH month_start IN ARRAY months LOOP
+        month_start := DATE_TRUNC('month', month_start)::DATE;
+        partition_name := parent_table || '_' || TO_CHAR(month_start, 'YYYY_MM');
+        IF to_regclass(format('silver.%I', partition_name)) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE silver.%I PARTITION OF silver.%I FOR VALUES FROM (%L) TO (%L)',
+                partition_name, parent_table, month_start, (month_start + INTERVAL '1 month')::DATE
+            );
+            created := created + 1;
+        END IF;
+    END LOOP;
+    RETURN created;
+END;
+$$;
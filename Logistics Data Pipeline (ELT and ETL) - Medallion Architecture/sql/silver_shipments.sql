@@ -1,24 +1,89 @@
 DROP TABLE IF EXISTS silver."Shipments" CASCADE;
-CREATE TABLE silver."Shipments" AS
+-- Bronze rows are classified first, so the month partitions the valid ones need can be
+-- created before they are inserted
+CREATE TEMP TABLE shipments_classified ON COMMIT DROP AS
 SELECT
-    s.shipment_id::INTEGER,
-    s.order_id::INTEGER,
-    s.driver_id::INTEGER,
-    s.vehicle_id::INTEGER,
-    s.dispatch_date::TIMESTAMP,
-    s.delivery_date::TIMESTAMP,
+    s.*,
     CASE
-        WHEN LOWER(s.status) IN ('delivered', 'd', 'completed') THEN 'Delivered'
-        WHEN LOWER(s.status) IN ('in transit', 'in_transit', 'processing') THEN 'In Transit'
-        ELSE 'Failed'
-    END AS status
+        -- Data Quality (FK) Checks: the order, driver and vehicle must exist
+        WHEN o.order_id IS NULL THEN 'unknown_order'
+        WHEN d.driver_id IS NULL THEN 'unknown_driver'
+        WHEN v.vehicle_id IS NULL THEN 'unknown_vehicle'
+        WHEN s.dispatch_date IS NULL OR s.delivery_date IS NULL THEN 'missing_date'
+        WHEN s.dispatch_date::TIMESTAMP > s.delivery_date::TIMESTAMP THEN 'delivered_before_dispatch'
+        -- Incremental bronze loads append changed shipments again: keep the latest loaded valid row
+        WHEN ROW_NUMBER() OVER(
+            PARTITION BY
+                s.shipment_id,
+                o.order_id IS NULL OR d.driver_id IS NULL OR v.vehicle_id IS NULL
+                OR s.dispatch_date IS NULL OR s.delivery_date IS NULL
+                OR s.dispatch_date::TIMESTAMP > s.delivery_date::TIMESTAMP
+            ORDER BY s._loaded_at DESC
+        ) > 1 THEN 'superseded'
+    END AS rejection_reason
 FROM
     bronze."Shipments" s
-JOIN
+LEFT JOIN
     silver."Orders" o ON s.order_id = o.order_id::VARCHAR
-JOIN
+LEFT JOIN
     silver."Drivers" d ON s.driver_id = d.driver_id::VARCHAR
-JOIN
-    silver."Vehicles" v ON s.vehicle_id = v.vehicle_id::VARCHAR
-WHERE
-    s.dispatch_date::TIMESTAMP <= s.delivery_date::TIMESTAMP;
\ No newline at end of file
+LEFT JOIN
+    silver."Vehicles" v ON s.vehicle_id = v.vehicle_id::VARCHAR;
+
+-- Range-partitioned by dispatch month, the grain of the monthly gold tables.
+-- Without SILVER_PARTITIONING the PARTITION BY clause and the partition call are removed.
+CREATE TABLE silver."Shipments" (
+    shipment_id INTEGER NOT NULL,
+    order_id INTEGER,
+    driver_id INTEGER,
+    vehicle_id INTEGER,
+    dispatch_date TIMESTAMP NOT NULL,
+    delivery_date TIMESTAMP,
+    status TEXT
+) PARTITION BY RANGE (dispatch_date);
+
+SELECT silver.create_month_partitions(
+    'Shipments', ARRAY(
+        SELECT DISTINCT DATE_TRUNC('month', dispatch_date::TIMESTAMP)::DATE
+        FROM shipments_classified
+        WHERE rejection_reason IS NULL
+    )
+);
+
+-- Rejected bronze rows, as loaded, with the reason they were left out of silver
+DROP TABLE IF EXISTS quarantine."Shipments";
+CREATE TABLE quarantine."Shipments" AS
+SELECT *, CAST(NULL AS TEXT) AS rejection_reason FROM bronze."Shipments" LIMIT 0;
+
+-- Returns the silver and quarantine row counts, and the quarantined rows per reason
+WITH rejected AS (
+    INSERT INTO quarantine."Shipments" (shipment_id, order_id, driver_id, vehicle_id, dispatch_date, delivery_date, status, _loaded_at, _batch_id, _row_hash, rejection_reason)
+    SELECT shipment_id, order_id, driver_id, vehicle_id, dispatch_date, delivery_date, status, _loaded_at, _batch_id, _row_hash, rejection_reason
+    FROM shipments_classified
+    WHERE rejection_reason IS NOT NULL
+    RETURNING rejection_reason
+),
+kept AS (
+    INSERT INTO silver."Shipments" (shipment_id, order_id, driver_id, vehicle_id, dispatch_date, delivery_date, status)
+    SELECT
+        shipment_id::INTEGER,
+        order_id::INTEGER,
+        driver_id::INTEGER,
+        vehicle_id::INTEGER,
+        dispatch_date::TIMESTAMP,
+        delivery_date::TIMESTAMP,
+        CASE
+            WHEN LOWER(status) IN ('delivered', 'd', 'completed') THEN 'Delivered'
+            WHEN LOWER(status) IN ('in transit', 'in_transit', 'processing') THEN 'In Transit'
+            ELSE 'Failed'
+        END
+    FROM shipments_classified
+    WHERE rejection_reason IS NULL
+    RETURNING 1
+)
+SELECT
+    (SELECT COUNT(*) FROM kept) AS rows_written,
+    (SELECT COUNT(*) FROM rejected) AS rows_rejected,
+    (SELECT json_object_agg(rejection_reason, n) FROM (
+        SELECT rejection_reason, COUNT(*) AS n FROM rejected GROUP BY rejection_reason
+    ) reasons) AS rejection_reasons;
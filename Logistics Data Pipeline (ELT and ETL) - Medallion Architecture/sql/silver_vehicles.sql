@@ -1,24 +1,54 @@
 DROP TABLE IF EXISTS silver."Vehicles" CASCADE;
-CREATE TABLE silver."Vehicles" AS
-WITH ranked_vehicles AS (
+CREATE TABLE silver."Vehicles" (
+    vehicle_id INTEGER,
+    license_plate TEXT,
+    vehicle_type TEXT,
+    -- bronze._row_hash of the row kept, which incremental merges compare against
+    _row_hash TEXT
+);
+
+-- Rejected bronze rows, as loaded, with the reason they were left out of silver
+DROP TABLE IF EXISTS quarantine."Vehicles";
+CREATE TABLE quarantine."Vehicles" AS
+SELECT *, CAST(NULL AS TEXT) AS rejection_reason FROM bronze."Vehicles" LIMIT 0;
+
+-- One scan of bronze feeds both tables. Returns the silver and quarantine row counts,
+-- and the quarantined rows per reason.
+WITH classified AS (
     SELECT
-        vehicle_id,
-        TRIM(license_plate) AS license_plate,
+        b.*,
+        CASE
+            WHEN ROW_NUMBER() OVER(PARTITION BY vehicle_id ORDER BY license_plate DESC) > 1 THEN 'duplicate'
+        END AS rejection_reason
+    FROM
+        bronze."Vehicles" b
+),
+rejected AS (
+    INSERT INTO quarantine."Vehicles" (vehicle_id, license_plate, vehicle_type, _loaded_at, _batch_id, _row_hash, rejection_reason)
+    SELECT vehicle_id, license_plate, vehicle_type, _loaded_at, _batch_id, _row_hash, rejection_reason
+    FROM classified
+    WHERE rejection_reason IS NOT NULL
+    RETURNING rejection_reason
+),
+kept AS (
+    INSERT INTO silver."Vehicles" (vehicle_id, license_plate, vehicle_type, _row_hash)
+    SELECT
+        vehicle_id::INTEGER,
+        TRIM(license_plate),
         CASE
             WHEN LOWER(TRIM(vehicle_type)) LIKE '%van%' THEN 'Van'
             WHEN LOWER(TRIM(vehicle_type)) LIKE '%truck%' THEN 'Truck'
             WHEN LOWER(TRIM(vehicle_type)) LIKE '%motorcycle%' THEN 'Motorcycle'
             ELSE 'Other'
-        END AS vehicle_type,
-        ROW_NUMBER() OVER(PARTITION BY vehicle_id ORDER BY license_plate DESC) as rn
-    FROM
-        bronze."Vehicles"
+        END,
+        _row_hash
+    FROM classified
+    WHERE rejection_reason IS NULL
+    RETURNING 1
 )
 SELECT
-    vehicle_id::INTEGER,
-    license_plate,
-    vehicle_type
-FROM
-    ranked_vehicles
-WHERE
-    rn = 1;
\ No newline at end of file
+    (SELECT COUNT(*) FROM kept) AS rows_written,
+    (SELECT COUNT(*) FROM rejected) AS rows_rejected,
+    (SELECT json_object_agg(rejection_reason, n) FROM (
+        SELECT rejection_reason, COUNT(*) AS n FROM rejected GROUP BY rejection_reason
+    ) reasons) AS rejection_reasons;
@@ -1,80 +1,206 @@
 import os
+import re
+import sys
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
-from sqlalchemy.exc import OperationalError
+from sqlalchemy import text
+
+from change_manifest import read_manifest, write_manifest, is_unchanged
+from db import get_db_engine
+from run_metrics import track
 
 # --- Configuration ---
 BASE_DIR = Path(__file__).resolve().parent.parent
 LOG_DIR = BASE_DIR / "logs"
 SQL_DIR = BASE_DIR / "sql"
+LOG_FILE = LOG_DIR / "add_constraints.log"
 LOG_DIR.mkdir(exist_ok=True)
 
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler(LOG_DIR / "add_constraints.log"),
+        logging.FileHandler(LOG_FILE),
         logging.StreamHandler()
     ]
 )
 
 load_dotenv()
-DB_USER = os.getenv("POSTGRES_USER")
-DB_PASSWORD = os.getenv("POSTGRES_PASSWORD")
-DB_HOST = os.getenv("POSTGRES_HOST")
-DB_PORT = os.getenv("POSTGRES_PORT")
-DB_NAME = os.getenv("POSTGRES_DB")
+
+# Month-partitioned Orders and Shipments (see push_to_silver.py) take their own keys and
+# indexes, from the *_partitioned.sql variants of the scripts
+SILVER_PARTITIONING = os.getenv("SILVER_PARTITIONING", "false").lower() == "true"
+SCRIPT_SUFFIX = "_partitioned.sql" if SILVER_PARTITIONING else ".sql"
+
+ALTER_TARGET_PATTERN = re.compile(r'ALTER\s+TABLE\s+silver\."(\w+)"', re.IGNORECASE)
+CONSTRAINT_NAME_PATTERN = re.compile(r'ADD\s+CONSTRAINT\s+(\w+)', re.IGNORECASE)
+INDEX_NAME_PATTERN = re.compile(
+    r'CREATE\s+INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(\w+)', re.IGNORECASE
+)
+
+
+def constraint_exists(connection, table_name, statement):
+    """
+    True if the constraint a statement would add is already on the table, e.g. because
+    the table was merged incrementally instead of being dropped and recreated.
+    """
+    name_match = CONSTRAINT_NAME_PATTERN.search(statement)
+    if name_match:
+        condition, params = "con.conname = :name", {"name": name_match.group(1)}
+    elif "PRIMARY KEY" in statement.upper():
+        condition, params = "con.contype = 'p'", {}
+    else:
+        return False
+
+    query = text(f"""
+        SELECT 1
+        FROM pg_constraint con
+        JOIN pg_class rel ON rel.oid = con.conrelid
+        JOIN pg_namespace nsp ON nsp.oid = rel.relnamespace
+        WHERE nsp.nspname = 'silver' AND rel.relname = :table_name AND {condition}
+    """)
+    return connection.execute(query, {"table_name": table_name, **params}).scalar() is not None
+
+
+def split_statements(sql_script):
+    """Splits a SQL script on ';' into its non-empty statements."""
+    return [statement for statement in sql_script.split(';') if statement.strip()]
+
+
+def index_is_valid(connection, index_name):
+    """None if the silver index does not exist, otherwise whether it is valid (usable)."""
+    query = text("""
+        SELECT ix.indisvalid
+        FROM pg_index ix
+        JOIN pg_class cls ON cls.oid = ix.indexrelid
+        JOIN pg_namespace nsp ON nsp.oid = cls.relnamespace
+        WHERE nsp.nspname = 'silver' AND cls.relname = :index_name
+    """)
+    return connection.execute(query, {"index_name": index_name}).scalar()
 
 
-def get_db_engine():
-    """Creates and returns a SQLAlchemy engine."""
+def create_indexes(engine):
+    """
+    Builds the indexes in silver_indexes.sql on an autocommit connection, as CREATE INDEX
+    CONCURRENTLY cannot run inside a transaction (partitioned tables, indexed from
+    silver_indexes_partitioned.sql, are indexed without it). Indexes that already exist are
+    skipped; an invalid one left behind by an interrupted concurrent build is dropped and rebuilt.
+    """
+    indexes_file = SQL_DIR / f"silver_indexes{SCRIPT_SUFFIX}"
+    logging.info(f"Creating indexes from {indexes_file}...")
     try:
-        engine = create_engine(
-            f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-        )
-        with engine.connect():
-            logging.info("Successfully connected to the PostgreSQL database.")
-        return engine
-    except OperationalError as e:
-        logging.error(f"Could not connect to the database. Error: {e}")
+        with open(indexes_file, 'r') as file:
+            sql_script = file.read()
+
+        with engine.connect() as connection:
+            connection = connection.execution_options(isolation_level="AUTOCOMMIT")
+            for statement in split_statements(sql_script):
+                index_name = INDEX_NAME_PATTERN.search(statement).group(1)
+                is_valid = index_is_valid(connection, index_name)
+                if is_valid:
+                    logging.info(f"  - Index {index_name} already present. Skipping.")
+                    continue
+                with track("add_constraints", index_name):
+                    if is_valid is False:
+                        logging.warning(f"  - Index {index_name} is invalid. Rebuilding.")
+                        concurrently = "CONCURRENTLY " if "CONCURRENTLY" in statement.upper() else ""
+                        connection.execute(text(f"DROP INDEX {concurrently}IF EXISTS silver.{index_name}"))
+                    connection.execute(text(statement))
+                logging.info(f"  - Created index {index_name}.")
+        logging.info("Successfully created all indexes.")
+    except Exception as e:
+        logging.error(f"Failed to create indexes. Error: {e}")
         raise
 
 
+def validate_foreign_keys(engine):
+    """
+    Validates the silver foreign keys that were added NOT VALID. VALIDATE CONSTRAINT scans
+    the existing rows under a lock that still allows reads and writes; constraints that
+    are already validated are not touched, so reruns cost only a catalog lookup.
+    """
+    query = text("""
+        SELECT rel.relname, con.conname
+        FROM pg_constraint con
+        JOIN pg_class rel ON rel.oid = con.conrelid
+        JOIN pg_namespace nsp ON nsp.oid = rel.relnamespace
+        WHERE nsp.nspname = 'silver' AND con.contype = 'f' AND NOT con.convalidated
+        ORDER BY rel.relname, con.conname
+    """)
+    with engine.connect() as connection:
+        pending = connection.execute(query).fetchall()
+    if not pending:
+        logging.info("All foreign keys are already validated.")
+        return
+
+    for table_name, constraint_name in pending:
+        logging.info(f"  - Validating {constraint_name} on {table_name}...")
+        # One transaction per constraint, so a violation only fails its own constraint
+        with track("add_constraints", constraint_name), engine.begin() as connection:
+            connection.execute(
+                text(f'ALTER TABLE silver."{table_name}" VALIDATE CONSTRAINT {constraint_name}')
+            )
+    logging.info(f"Validated {len(pending)} foreign keys.")
+
+
 def apply_constraints(engine):
-    """Executes the SQL script to add constraints."""
-    constraints_file = SQL_DIR / "silver_add_constraints.sql"
+    """
+    Executes the SQL script to add constraints, then builds the supporting indexes and
+    validates the foreign keys (unpartitioned layout only). With SKIP_UNCHANGED_TABLES set, statements for silver
+    tables that were not rebuilt since their constraints were last applied are skipped
+    (their keys are still in place).
+    """
+    constraints_file = SQL_DIR / f"silver_add_constraints{SCRIPT_SUFFIX}"
     logging.info(f"Applying constraints from {constraints_file}...")
+    manifest = read_manifest()
 
     try:
         with open(constraints_file, 'r') as file:
             sql_script = file.read()
 
-        with engine.connect() as connection:
+        # engine.begin() commits on exit; Connection.commit() does not exist before SQLAlchemy 2.0
+        with engine.begin() as connection:
             # We split the script into individual statements to run them one by one
-            for statement in sql_script.split(';'):
-                if statement.strip():  # Ensure we don't run empty statements
-                    connection.execute(text(statement))
-            connection.commit()
+            for statement in split_statements(sql_script):
+                match = ALTER_TARGET_PATTERN.search(statement)
+                table_name = match.group(1) if match else None
+                if table_name and is_unchanged(
+                    manifest, "constraints", table_name, manifest["silver"].get(table_name)
+                ):
+                    logging.info(f"  - Skipping constraint on unchanged table {table_name}.")
+                    continue
+                if table_name and constraint_exists(connection, table_name, statement):
+                    logging.info(f"  - Constraint already present on {table_name}. Skipping.")
+                    continue
+                connection.execute(text(statement))
+        # Keys are in place (foreign keys NOT VALID); indexes and validation don't hold up writers
+        create_indexes(engine)
+        # Foreign keys on partitioned tables are validated as they are added
+        if not SILVER_PARTITIONING:
+            validate_foreign_keys(engine)
+        manifest["constraints"].update(manifest["silver"])
+        write_manifest(manifest)
         logging.info("Successfully applied all constraints.")
     except Exception as e:
         logging.error(f"Failed to apply constraints. Error: {e}")
         raise
 
 
-def main():
-    """Main function to orchestrate the process."""
+def main(engine=None):
+    """Main function to orchestrate the process. Returns True on success."""
     logging.info("=" * 50)
     logging.info("=== Starting Add Constraints Process ===")
     try:
-        db_engine = get_db_engine()
+        db_engine = engine or get_db_engine()
         apply_constraints(db_engine)
+        return True
     except Exception as e:
         logging.critical(f"Process failed. Error: {e}")
+        return False
     finally:
         logging.info("=" * 50)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(0 if main() else 1)
\ No newline at end of file
@@ -0,0 +1,165 @@
+import os
+import time
+import logging
+import argparse
+from pathlib import Path
+import sys
+
+# --- 1. CONFIGURATION & INITIALIZATION ---
+
+# Every run rebuilds all layers from scratch, so timings are comparable between runs and scales.
+# Stage modules read these at import time, so they are set before any of them is imported.
+os.environ["BRONZE_LOAD_MODE"] = "full"
+os.environ["SILVER_BUILD_MODE"] = "full"
+os.environ["GOLD_BUILD_MODE"] = "full"
+os.environ["SKIP_UNCHANGED_TABLES"] = "false"
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+CONFIG_DIR = BASE_DIR / "config"
+# The benchmark keeps its watermarks and change manifest apart from the pipeline's, so its
+# generated files are never recorded under the checksums of the real extracts
+os.environ["PIPELINE_STATE_DIR"] = str(CONFIG_DIR / "benchmark")
+LOG_DIR = BASE_DIR / "logs"
+LOG_FILE = LOG_DIR / "benchmark.log"
+
+LOG_DIR.mkdir(exist_ok=True)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler(LOG_FILE),
+        logging.StreamHandler()
+    ]
+)
+
+import push_to_bronze  # noqa: E402
+import duckdb_backend  # noqa: E402
+from etl import run_stage, log_to_file  # noqa: E402
+from db import get_db_engine, pool_usage  # noqa: E402
+from generate_data import generate, parse_scale  # noqa: E402
+from change_manifest import MANIFEST_FILE  # noqa: E402
+from pipeline_state import PIPELINE_STATE_FILE, SILVER_STATE_FILE  # noqa: E402
+from run_metrics import RUN_ID_ENV, new_run_id, record_metric  # noqa: E402
+
+DEFAULT_SCALES = "10k,1M"
+STAGES = {
+    "postgres": ["push_to_bronze", "push_to_silver", "add_constraints", "build_gold"],
+    # The same sql/ scripts on embedded DuckDB (src/duckdb_backend.py); it has no constraints step
+    "duckdb": ["duckdb_bronze", "duckdb_silver", "duckdb_gold"],
+}
+
+
+# --- 2. BENCHMARK LOGIC ---
+
+
+def load_bronze(engine):
+    """The bronze load on its own; extraction is skipped because the generated files are already in place."""
+    with log_to_file(push_to_bronze.LOG_FILE), pool_usage(engine, "push_to_bronze.py"):
+        loaded_tables = push_to_bronze.load_to_bronze(engine)
+    return set(loaded_tables) == set(push_to_bronze.TABLE_NAMES)
+
+
+def reset_pipeline_state():
+    """
+    Deletes the pipeline's own watermarks and change manifest: the benchmark replaced the
+    landing files and every layer they describe, so the next pipeline run extracts and
+    rebuilds everything instead of appending to or skipping benchmark data.
+    """
+    for state_file in (PIPELINE_STATE_FILE, SILVER_STATE_FILE, MANIFEST_FILE):
+        (CONFIG_DIR / state_file.name).unlink(missing_ok=True)
+    logging.info(f"Cleared the pipeline's watermarks and change manifest in {CONFIG_DIR}.")
+
+
+def run_duckdb_stage(connection, stage):
+    """One layer of the DuckDB build. Returns True on success."""
+    try:
+        if stage == "duckdb_bronze":
+            duckdb_backend.load_bronze(connection)
+        elif stage == "duckdb_silver":
+            duckdb_backend.build_layer(connection, "silver", duckdb_backend.SILVER_SCRIPTS)
+        else:
+            duckdb_backend.build_layer(connection, "gold", duckdb_backend.GOLD_SCRIPTS)
+        return True
+    except Exception as e:
+        logging.error(f"{stage} failed. Error: {e}")
+        return False
+
+
+def run_scale(engine, rows, seed, backend="postgres"):
+    """
+    Generates `rows` orders as LANDING_FORMAT files, runs every stage of `backend` once
+    and returns the stage timings (None if a stage failed). `engine` is the Postgres
+    engine, or the DuckDB connection for the duckdb backend.
+    """
+    os.environ[RUN_ID_ENV] = new_run_id()
+    logging.info(f"=== Benchmark run {os.environ[RUN_ID_ENV]}: {rows:,} rows ({backend}) ===")
+    generate(rows, push_to_bronze.BRONZE_INPUTS_DIR, seed, push_to_bronze.LANDING_FORMAT)
+
+    timings = {}
+    for stage in STAGES[backend]:
+        start = time.perf_counter()
+        if backend == "duckdb":
+            success = run_duckdb_stage(engine, stage)
+        elif stage == "push_to_bronze":
+            success = load_bronze(engine)
+        else:
+            success = run_stage(f"{stage}.py", engine)
+        timings[stage] = time.perf_counter() - start
+        record_metric(stage, status="success" if success else "failed", wall_seconds=round(timings[stage], 4))
+        if not success:
+            logging.error(f"Benchmark at {rows:,} rows stopped: {stage} failed.")
+            return None
+    return timings
+
+
+def format_results(results, stages):
+    """A table of seconds per stage and scale, with source rows processed per second."""
+    header = f"{'rows':>12}" + "".join(f" {stage:>16}" for stage in stages) + f" {'total':>10} {'rows/s':>10}"
+    lines = [header]
+    for rows, timings in results.items():
+        if timings is None:
+            lines.append(f"{rows:>12,} {'failed':>16}")
+            continue
+        total = sum(timings.values())
+        cells = "".join(f" {timings[stage]:>15.2f}s" for stage in stages)
+        lines.append(f"{rows:>12,}{cells} {total:>9.2f}s {rows / total:>10,.0f}")
+    return "\n".join(lines)
+
+
+# --- 3. MAIN ---
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Times bronze, silver, constraints and gold on generated data. "
+                    "Replaces bronze_inputs/ and every layer in the configured database."
+    )
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="comma-separated row counts, e.g. 10k,1M,10M")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--backend", default="postgres", choices=sorted(STAGES),
+        help="run the SQL on the configured PostgreSQL database or on embedded DuckDB (DUCKDB_PATH)"
+    )
+    args = parser.parse_args()
+
+    engine = duckdb_backend.connect() if args.backend == "duckdb" else get_db_engine()
+    results = {}
+    try:
+        for scale in args.scales.split(","):
+            rows = parse_scale(scale)
+            results[rows] = run_scale(engine, rows, args.seed, args.backend)
+    finally:
+        if args.backend == "duckdb":
+            engine.close()
+        else:
+            engine.dispose()
+            reset_pipeline_state()
+
+    logging.info("Benchmark results:\n" + format_results(results, STAGES[args.backend]))
+    logging.info("Compare runs per table with: python src/etl.py summary")
+    return all(timings is not None for timings in results.values())
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,327 @@
+import io
+import os
+import csv
+import time
+import hashlib
+import logging
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import DateTime, inspect
+
+from run_metrics import add_db_time, current_run_id
+
+# Rows per INSERT batch for the chunked fallback loader (and per COPY batch for Parquet).
+CHUNK_SIZE = 50_000
+
+# Landing files in bronze_inputs/: "csv", or "parquet" (needs pyarrow) for compressed,
+# typed files with per-row-group min/max statistics that are much faster to re-read.
+LANDING_EXTENSIONS = {"csv": ".csv", "parquet": ".parquet"}
+PARQUET_COMPRESSION = "zstd"
+PARQUET_ROW_GROUP_SIZE = 100_000
+
+# Every bronze row is stamped with the time of the load that wrote it, so incremental
+# silver builds can pick up just the rows loaded since their last run.
+LOADED_AT_COLUMN = "_loaded_at"
+LOADED_AT_DEF = f'"{LOADED_AT_COLUMN}" TIMESTAMPTZ NOT NULL DEFAULT now()'
+
+# The pipeline run (run_metrics.current_run_id()) that loaded each row, and a hash of the
+# row's sheet values. Silver merges compare the hash with the one stored on the silver row,
+# so rows reloaded unchanged are recognised without sorting the table by key.
+BATCH_ID_COLUMN = "_batch_id"
+ROW_HASH_COLUMN = "_row_hash"
+
+
+def quote_ident(name):
+    """Double-quotes an identifier so mixed-case CSV headers survive as-is."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def row_hash_expression(columns):
+    """
+    md5 of the row written as one CSV line with every value quoted, so an empty cell and a
+    missing one hash differently. Immutable in Postgres (usable in a generated column) and
+    valid in DuckDB.
+    """
+    values = " || ',' || ".join(
+        f"""COALESCE('"' || REPLACE({quote_ident(c)}, '"', '""') || '"', '')""" for c in columns
+    )
+    return f"md5({values})"
+
+
+def row_hashes(df):
+    """ROW_HASH_COLUMN for every row of `df`, computed like row_hash_expression."""
+    quoted = [('"' + df[c].astype("string").str.replace('"', '""', regex=False) + '"').fillna("") for c in df.columns]
+    lines = quoted[0]
+    for values in quoted[1:]:
+        lines = lines + "," + values
+    return lines.map(lambda line: hashlib.md5(line.encode("utf-8")).hexdigest())
+
+
+def row_hash_def(columns):
+    """Column definition computing ROW_HASH_COLUMN from `columns` as rows are written."""
+    return f"{quote_ident(ROW_HASH_COLUMN)} TEXT GENERATED ALWAYS AS ({row_hash_expression(columns)}) STORED"
+
+
+def read_csv_header(csv_path):
+    """Returns the column names from the first line of a CSV file."""
+    with open(csv_path, 'r', newline='', encoding='utf-8') as file:
+        return next(csv.reader(file), [])
+
+
+def has_data_rows(csv_path):
+    """True if the landing file has at least one data row (for a CSV, a line after the header)."""
+    if Path(csv_path).suffix == ".parquet":
+        import pyarrow.parquet as pq
+        return pq.ParquetFile(csv_path).metadata.num_rows > 0
+    with open(csv_path, 'r', encoding='utf-8') as file:
+        file.readline()
+        return bool(file.readline().strip())
+
+
+def landing_path(directory, table_name, landing_format):
+    """The landing file for a table, e.g. bronze_inputs/Orders.parquet."""
+    if landing_format not in LANDING_EXTENSIONS:
+        raise ValueError(f"Unknown landing format '{landing_format}'. Use one of {sorted(LANDING_EXTENSIONS)}.")
+    return Path(directory) / f"{table_name}{LANDING_EXTENSIONS[landing_format]}"
+
+
+def write_parquet(frames, path):
+    """
+    Writes DataFrames to one Parquet file with PARQUET_COMPRESSION and column statistics.
+    Columns are stored as strings, as bronze keeps every value as TEXT, and empty cells
+    as nulls, as they are when a CSV is loaded. Returns the number of rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    row_count = 0
+    try:
+        for df in frames:
+            df = df.astype("string").replace("", pd.NA)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(
+                    path, table.schema, compression=PARQUET_COMPRESSION, write_statistics=True
+                )
+            writer.write_table(table, row_group_size=PARQUET_ROW_GROUP_SIZE)
+            row_count += len(df)
+    finally:
+        if writer is not None:
+            writer.close()
+    return row_count
+
+
+def write_landing_file(frames, path):
+    """
+    Writes extracted DataFrames, in order, to one CSV or Parquet file according to the file
+    extension. Frames are written as they arrive, so a generator is never held in memory
+    at once. They go to a temp file next to `path` that replaces it only once every frame is
+    written, so a failed read leaves the previous file intact. Returns the number of rows written.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    try:
+        if path.suffix == ".parquet":
+            def with_columns(frames):
+                for df in frames:
+                    if df.columns.empty:
+                        raise ValueError(f"Cannot write {path.name}: the worksheet has no columns.")
+                    yield df
+            row_count = write_parquet(with_columns(frames), tmp_path)
+        else:
+            row_count = 0
+            for index, df in enumerate(frames):
+                df.to_csv(tmp_path, mode="w" if index == 0 else "a", header=index == 0, index=False)
+                row_count += len(df)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return row_count
+
+
+def supports_copy(engine):
+    """COPY FROM STDIN is only available through the psycopg2 driver."""
+    return engine.dialect.name == "postgresql" and engine.dialect.driver == "psycopg2"
+
+
+def prepare_table(cursor, schema, table_name, columns, if_exists, unlogged=False):
+    """
+    Creates (or recreates) an all-TEXT table matching the CSV header, plus the load timestamp.
+    A recreated table is UNLOGGED if `unlogged`, so the load writes no WAL. A table that is
+    appended to is made logged first, as its earlier rows would not survive a crash.
+    Rows are stamped with the current run as their batch and hashed as they are copied in;
+    the hash covers the columns the table was created with.
+    """
+    target = f"{quote_ident(schema)}.{quote_ident(table_name)}"
+    batch_id_def = f"{quote_ident(BATCH_ID_COLUMN)} TEXT"
+    column_defs = ", ".join(
+        [f"{quote_ident(c)} TEXT" for c in columns] + [LOADED_AT_DEF, batch_id_def, row_hash_def(columns)]
+    )
+
+    if if_exists == "replace":
+        cursor.execute(f"DROP TABLE IF EXISTS {target}")
+        cursor.execute(f"CREATE {'UNLOGGED ' if unlogged else ''}TABLE {target} ({column_defs})")
+    else:
+        cursor.execute(f"CREATE TABLE IF NOT EXISTS {target} ({column_defs})")
+        # A no-op unless an earlier full load left the table UNLOGGED
+        cursor.execute(f"ALTER TABLE {target} SET LOGGED")
+        # New sheet columns are added instead of failing the append
+        for column in columns:
+            cursor.execute(f"ALTER TABLE {target} ADD COLUMN IF NOT EXISTS {quote_ident(column)} TEXT")
+        cursor.execute(f"ALTER TABLE {target} ADD COLUMN IF NOT EXISTS {LOADED_AT_DEF}")
+        # Rows loaded before batch ids were recorded keep a NULL batch
+        cursor.execute(f"ALTER TABLE {target} ADD COLUMN IF NOT EXISTS {batch_id_def}")
+        cursor.execute(f"ALTER TABLE {target} ADD COLUMN IF NOT EXISTS {row_hash_def(columns)}")
+    # Set per load, so every row this COPY writes carries the same batch id
+    cursor.execute(
+        f"ALTER TABLE {target} ALTER COLUMN {quote_ident(BATCH_ID_COLUMN)} SET DEFAULT %s",
+        (current_run_id(),)
+    )
+
+
+def copy_csv_to_table(engine, csv_path, table_name, schema="bronze", if_exists="replace", unlogged=False):
+    """
+    Streams a CSV file into Postgres with COPY FROM STDIN, without building a DataFrame.
+    The table is (re)created and loaded in one transaction, so readers never see it half-loaded.
+    Returns the number of rows copied.
+    """
+    columns = read_csv_header(csv_path)
+    column_list = ", ".join(quote_ident(c) for c in columns)
+    copy_sql = (
+        f"COPY {quote_ident(schema)}.{quote_ident(table_name)} ({column_list}) "
+        f"FROM STDIN WITH (FORMAT csv, HEADER true)"
+    )
+
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        prepare_table(cursor, schema, table_name, columns, if_exists, unlogged)
+        start = time.perf_counter()
+        with open(csv_path, 'r', encoding='utf-8') as file:
+            cursor.copy_expert(copy_sql, file)
+        row_count = cursor.rowcount
+        raw_conn.commit()
+        # The raw DBAPI connection bypasses the engine's statement timing
+        add_db_time(time.perf_counter() - start)
+        return row_count
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+
+
+def copy_parquet_to_table(engine, parquet_path, table_name, schema="bronze", if_exists="replace", unlogged=False):
+    """
+    Loads a Parquet file with COPY FROM STDIN, converting one batch of CHUNK_SIZE rows at a
+    time to CSV in memory, so the file is never fully decoded. Same transaction as the CSV path.
+    Returns the number of rows copied.
+    """
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(parquet_path)
+    columns = parquet_file.schema_arrow.names
+    column_list = ", ".join(quote_ident(c) for c in columns)
+    copy_sql = (
+        f"COPY {quote_ident(schema)}.{quote_ident(table_name)} ({column_list}) "
+        f"FROM STDIN WITH (FORMAT csv)"
+    )
+    write_options = pa_csv.WriteOptions(include_header=False)
+
+    raw_conn = engine.raw_connection()
+    try:
+        cursor = raw_conn.cursor()
+        prepare_table(cursor, schema, table_name, columns, if_exists, unlogged)
+        row_count = 0
+        copy_seconds = 0.0
+        for batch in parquet_file.iter_batches(batch_size=CHUNK_SIZE):
+            buffer = io.BytesIO()
+            pa_csv.write_csv(batch, buffer, write_options)
+            buffer.seek(0)
+            start = time.perf_counter()
+            cursor.copy_expert(copy_sql, buffer)
+            copy_seconds += time.perf_counter() - start
+            row_count += cursor.rowcount
+        raw_conn.commit()
+        add_db_time(copy_seconds)
+        return row_count
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+
+
+def add_missing_columns(connection, schema, table_name, columns):
+    """
+    Adds the sheet and lineage columns an existing table lacks, with DDL any dialect accepts.
+    Rows already in the table keep NULLs in them.
+    """
+    inspector = inspect(connection)
+    if not inspector.has_table(table_name, schema=schema):
+        return
+    existing = {column["name"] for column in inspector.get_columns(table_name, schema=schema)}
+    column_types = {c: "TEXT" for c in [*columns, BATCH_ID_COLUMN, ROW_HASH_COLUMN]}
+    column_types[LOADED_AT_COLUMN] = connection.dialect.type_compiler.process(DateTime(timezone=True))
+    target = f"{quote_ident(schema)}.{quote_ident(table_name)}"
+    for column, column_type in column_types.items():
+        if column not in existing:
+            connection.exec_driver_sql(f"ALTER TABLE {target} ADD COLUMN {quote_ident(column)} {column_type}")
+
+
+def chunked_csv_to_table(engine, csv_path, table_name, schema="bronze", if_exists="replace"):
+    """
+    Fallback for databases without COPY: reads the CSV (or Parquet) file in fixed-size chunks and
+    inserts each chunk with multi-row INSERTs, so memory stays bounded by CHUNK_SIZE.
+    The load timestamp, batch id and row hash are computed here rather than by column
+    defaults, so the fallback works on any database pandas can write to.
+    Returns the number of rows inserted.
+    """
+    if Path(csv_path).suffix == ".parquet":
+        import pyarrow.parquet as pq
+        chunks = (
+            batch.to_pandas() for batch in pq.ParquetFile(csv_path).iter_batches(batch_size=CHUNK_SIZE)
+        )
+    else:
+        chunks = pd.read_csv(csv_path, dtype=str, chunksize=CHUNK_SIZE)
+
+    # One timestamp per load, as now() is in the COPY path
+    loaded_at = pd.Timestamp.now(tz="UTC")
+    row_count = 0
+    with engine.begin() as connection:
+        for chunk in chunks:
+            if if_exists == "append" and row_count == 0:
+                add_missing_columns(connection, schema, table_name, list(chunk.columns))
+            chunk = chunk.assign(**{
+                LOADED_AT_COLUMN: loaded_at,
+                BATCH_ID_COLUMN: current_run_id(),
+                ROW_HASH_COLUMN: row_hashes(chunk),
+            })
+            chunk.to_sql(
+                name=table_name,
+                con=connection,
+                schema=schema,
+                if_exists=if_exists if row_count == 0 else "append",
+                index=False,
+                method="multi"
+            )
+            row_count += len(chunk)
+    return row_count
+
+
+def load_csv(engine, csv_path, table_name, schema="bronze", if_exists="replace", loader="copy", unlogged=False):
+    """
+    Loads a CSV or Parquet landing file with COPY when the driver supports it,
+    otherwise with the chunked fallback. `unlogged` only applies to COPY loads.
+    """
+    if loader == "copy" and supports_copy(engine):
+        if Path(csv_path).suffix == ".parquet":
+            return copy_parquet_to_table(engine, csv_path, table_name, schema, if_exists, unlogged)
+        return copy_csv_to_table(engine, csv_path, table_name, schema, if_exists, unlogged)
+    if loader == "copy":
+        logging.warning(f"COPY is not supported by '{engine.dialect.name}'. Using chunked inserts.")
+    return chunked_csv_to_table(engine, csv_path, table_name, schema, if_exists)
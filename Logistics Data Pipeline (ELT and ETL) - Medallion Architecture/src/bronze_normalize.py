@@ -0,0 +1,72 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+
+from bronze_loader import quote_ident
+
+# Columns parsed once at extraction and landed next to the raw text (still TEXT in bronze,
+# as every bronze column is). The silver scripts read them first and parse the raw value
+# themselves only where they are NULL: rows landed before normalization was switched on,
+# landing files written by other tools, and values the parser below leaves alone.
+NORMALIZED_COLUMNS = {"Orders": ["order_date_parsed", "order_total_num"]}
+
+# The order_date formats silver_orders.sql recognises, in the order it tries them
+ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}", re.ASCII)
+DAY_MONTH_NAME_DATE = re.compile(r"\d{2}-[A-Za-z]{3}-\d{4}", re.ASCII)
+SLASH_DATE = re.compile(r"(\d{1,2})/(\d{1,2})/\d{4}", re.ASCII)
+
+
+@lru_cache(maxsize=65536)
+def parse_order_date(value):
+    """
+    The ISO date silver_orders.sql would derive from a raw order_date, or None when it
+    matches none of the formats or is not a valid date (silver then decides as before).
+    Cached, as the same few thousand date strings repeat across every batch.
+    """
+    if ISO_DATE.fullmatch(value):
+        date_format = "%Y-%m-%d"
+    elif DAY_MONTH_NAME_DATE.fullmatch(value):
+        date_format = "%d-%b-%Y"
+    elif match := SLASH_DATE.fullmatch(value):
+        # MM/DD/YYYY when the first part can be a month, otherwise DD/MM/YYYY
+        if 1 <= int(match.group(1)) <= 12:
+            date_format = "%m/%d/%Y"
+        elif 1 <= int(match.group(2)) <= 12:
+            date_format = "%d/%m/%Y"
+        else:
+            return None
+    else:
+        return None
+    try:
+        return datetime.strptime(value, date_format).date().isoformat()
+    except ValueError:
+        return None
+
+
+def normalize_orders(df):
+    """
+    Adds order_date_parsed (ISO date) and order_total_num (the amount with everything but
+    digits and dots removed, as silver casts it). Dates are parsed once per distinct value.
+    """
+    if "order_date" not in df.columns or "order_total" not in df.columns:
+        return df
+    dates = df["order_date"].astype("string")
+    parsed_dates = {value: parse_order_date(value) for value in dates.dropna().unique()}
+    return df.assign(
+        order_date_parsed=dates.map(parsed_dates),
+        order_total_num=df["order_total"].astype("string").str.replace(r"[^0-9.]", "", regex=True),
+    )
+
+
+NORMALIZERS = {"Orders": normalize_orders}
+
+
+def add_normalized_columns_sql(table_name, schema="bronze"):
+    """
+    Statements adding the normalized columns a bronze table may lack, so the silver scripts
+    can always read them. Valid in Postgres and DuckDB.
+    """
+    return [
+        f"ALTER TABLE IF EXISTS {schema}.{quote_ident(table_name)} ADD COLUMN IF NOT EXISTS {quote_ident(column)} TEXT"
+        for column in NORMALIZED_COLUMNS.get(table_name, [])
+    ]
@@ -1,45 +1,78 @@
 import os
+import sys
+import time
+import hashlib
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
+from psycopg2 import errors
+from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
 
+from change_manifest import read_manifest, record_version, script_fingerprint, is_unchanged
+from dag_executor import build_dependency_graph, dependency_order, run_dag, transitive_dependents
+from db import get_db_engine
+from pipeline_state import SILVER_STATE_FILE, read_state, write_state
+from run_metrics import track, note
+from sql_utils import script_target, script_select
+
 # --- Configuration ---
 BASE_DIR = Path(__file__).resolve().parent.parent
 LOG_DIR = BASE_DIR / "logs"
 SQL_DIR = BASE_DIR / "sql"
+INCREMENTAL_SQL_DIR = SQL_DIR / "incremental"
+ROLLUP_SQL_DIR = SQL_DIR / "rollup"
+LOG_FILE = LOG_DIR / "gold_build.log"
 LOG_DIR.mkdir(exist_ok=True)
 
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler(LOG_DIR / "gold_build.log"),
+        logging.FileHandler(LOG_FILE),
         logging.StreamHandler()
     ]
 )
 
 load_dotenv()
-DB_USER = os.getenv("POSTGRES_USER")
-DB_PASSWORD = os.getenv("POSTGRES_PASSWORD")
-DB_HOST = os.getenv("POSTGRES_HOST")
-DB_PORT = os.getenv("POSTGRES_PORT")
-DB_NAME = os.getenv("POSTGRES_DB")
 
+# Gold tables only read silver, so they can all be built concurrently
+SQL_MAX_WORKERS = int(os.getenv("SQL_MAX_WORKERS", "4"))
 
-def get_db_engine():
-    """Creates and returns a SQLAlchemy engine."""
-    try:
-        engine = create_engine(
-            f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-        )
-        with engine.connect():
-            logging.info("Successfully connected to the PostgreSQL database.")
-        return engine
-    except OperationalError as e:
-        logging.error(f"Could not connect to the database. Error: {e}")
-        raise
+# "full" rebuilds every gold table; "incremental" deletes and re-aggregates only the months
+# of the month-grained tables touched by incremental silver builds (sql/incremental/*_refresh.sql).
+GOLD_BUILD_MODE = os.getenv("GOLD_BUILD_MODE", "full").lower()
+
+# When enabled, the four monthly tables are projected from gold."Monthly_Shipment_Rollup", one
+# GROUPING SETS aggregate over the shipments (sql/gold_monthly_shipment_rollup.sql), instead
+# of each scanning and joining silver."Shipments" itself (scripts in sql/rollup/)
+GOLD_MONTHLY_ROLLUP = os.getenv("GOLD_MONTHLY_ROLLUP", "false").lower() == "true"
+ROLLUP_SCRIPT = "gold_monthly_shipment_rollup.sql"
+
+# How rebuilt tables reach readers: "table" drops and recreates them in place (readers can
+# hit a missing table); "swap" builds each table in STAGING_SCHEMA and swaps it in with a
+# rename in one short transaction; "matview" keeps gold as materialized views, refreshed
+# with REFRESH MATERIALIZED VIEW CONCURRENTLY so readers are never blocked.
+GOLD_PUBLISH_MODE = os.getenv("GOLD_PUBLISH_MODE", "table").lower()
+STAGING_SCHEMA = "gold_staging"
+
+# The swap waits at most this long for readers to release the table, then retries, so it
+# never sits in the lock queue blocking new dashboard queries behind a long-running one
+GOLD_SWAP_LOCK_TIMEOUT_MS = int(os.getenv("GOLD_SWAP_LOCK_TIMEOUT_MS", "2000"))
+GOLD_SWAP_RETRIES = 5
+
+# Columns identifying a row of each gold table; REFRESH ... CONCURRENTLY needs a unique index on them
+GOLD_UNIQUE_KEYS = {
+    "Customer_Value_Summary": ["customer_id"],
+    "Full_Shipment_Details": ["shipment_id"],
+    "Monthly_Driver_Performance": ["driver_id", "performance_year", "performance_month"],
+    "Monthly_Operational_KPIs": ["performance_year", "performance_month"],
+    "Monthly_Shipment_Rollup": ["grain", "dispatch_year", "dispatch_month", "vehicle_type", "driver_id"],
+    "Vehicle_Failure_Analysis": ["vehicle_type", "failure_year", "failure_month"],
+    "Vehicle_Utilization_Summary": ["vehicle_type", "usage_year", "usage_month"],
+}
+
+RELATION_TYPES = {"r": "TABLE", "m": "MATERIALIZED VIEW"}
 
 
 def execute_gold_script(engine, filepath):
@@ -52,7 +85,13 @@ def execute_gold_script(engine, filepath):
 
         with engine.connect() as connection:
             connection.execute(text("CREATE SCHEMA IF NOT EXISTS gold;"))
-            connection.execute(text(sql_script))
+            # Left by an earlier GOLD_PUBLISH_MODE=matview run; the script's DROP TABLE would fail on it
+            _, target = script_target(sql_script)
+            if gold_relation_kind(connection, target) == "m":
+                connection.execute(text(f'DROP MATERIALIZED VIEW gold."{target}" CASCADE'))
+            result = connection.execute(text(sql_script))
+            # The row count of the script's last statement (its CREATE TABLE AS)
+            note(rows_written=result.rowcount)
             # --- FIX: The line below was removed as it's handled automatically ---
             # connection.commit()
         logging.info(f"    - Successfully built {table_name}.")
@@ -61,9 +100,165 @@ def execute_gold_script(engine, filepath):
         raise
 
 
+def gold_relation_kind(connection, table_name):
+    """The relkind of gold."<table_name>" ('r' table, 'm' materialized view), or None if it does not exist."""
+    return connection.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": f'gold."{table_name}"'}
+    ).scalar()
+
+
+def swap_in(engine, table_name, publish_statement, after_publish=None):
+    """
+    Drops gold."<table_name>" and runs `publish_statement`, which moves or renames the
+    replacement into place, in one transaction: readers see the old or the new relation,
+    never neither. `after_publish(connection)` runs in the same transaction, e.g. to recreate
+    what the drop cascaded to. Retried when readers hold the table longer than GOLD_SWAP_LOCK_TIMEOUT_MS.
+    """
+    for attempt in range(1, GOLD_SWAP_RETRIES + 1):
+        try:
+            with engine.begin() as connection:
+                connection.execute(text(f"SET LOCAL lock_timeout = {GOLD_SWAP_LOCK_TIMEOUT_MS}"))
+                kind = gold_relation_kind(connection, table_name)
+                if kind:
+                    connection.execute(text(f'DROP {RELATION_TYPES[kind]} gold."{table_name}" CASCADE'))
+                connection.execute(text(publish_statement))
+                if after_publish:
+                    after_publish(connection)
+            return
+        except OperationalError as e:
+            if not isinstance(e.orig, errors.LockNotAvailable) or attempt == GOLD_SWAP_RETRIES:
+                raise
+            logging.warning(f"    - {table_name} is busy (attempt {attempt}/{GOLD_SWAP_RETRIES}). Retrying swap.")
+            time.sleep(attempt)
+
+
+def publish_swap(engine, filepath, table_name):
+    """Builds a gold table in STAGING_SCHEMA, then swaps it into gold."""
+    logging.info(f"  - Building gold table in {STAGING_SCHEMA}: {table_name}...")
+    try:
+        query = script_select(filepath.read_text())
+        with engine.begin() as connection:
+            connection.execute(text(f'DROP TABLE IF EXISTS {STAGING_SCHEMA}."{table_name}"'))
+            result = connection.execute(text(f'CREATE TABLE {STAGING_SCHEMA}."{table_name}" AS {query}'))
+            note(rows_written=result.rowcount)
+        swap_in(engine, table_name, f'ALTER TABLE {STAGING_SCHEMA}."{table_name}" SET SCHEMA gold')
+        logging.info(f"    - Swapped in {table_name}.")
+    except Exception as e:
+        logging.error(f"    - Failed to execute {filepath}. Error: {e}")
+        raise
+
+
+def create_matview(connection, table_name, query, view_name=None):
+    """
+    Creates gold."<view_name>" (default: table_name) as a materialized view of `query`, with
+    the unique index REFRESH ... CONCURRENTLY needs and a hash of the query as its comment.
+    Returns the result of the CREATE.
+    """
+    view_name = view_name or table_name
+    version = hashlib.sha256(query.encode()).hexdigest()[:12]
+    key_columns = ", ".join(GOLD_UNIQUE_KEYS[table_name])
+    result = connection.execute(text(f'CREATE MATERIALIZED VIEW gold."{view_name}" AS {query}'))
+    connection.execute(
+        text(f'CREATE UNIQUE INDEX "{table_name}_key_{version}" ON gold."{view_name}" ({key_columns})')
+    )
+    connection.execute(text(f"COMMENT ON MATERIALIZED VIEW gold.\"{view_name}\" IS '{version}'"))
+    return result
+
+
+def publish_matview(engine, filepath, table_name, dependents=()):
+    """
+    Refreshes the materialized view gold."<table_name>" concurrently. When it does not exist
+    yet, is still a table, or its script changed (the view comment holds a hash of the
+    query), a new view is built under a temporary name and swapped in. Dropping the old view
+    cascades to the views built from it, so `dependents` ((table_name, filepath) pairs, in
+    dependency order) that are missing are recreated from their scripts in the same transaction.
+    """
+    def recreate_dependents(connection):
+        for dependent_name, dependent_path in dependents:
+            if gold_relation_kind(connection, dependent_name) is None:
+                create_matview(connection, dependent_name, script_select(dependent_path.read_text()))
+
+    try:
+        query = script_select(filepath.read_text())
+        version = hashlib.sha256(query.encode()).hexdigest()[:12]
+        with engine.connect() as connection:
+            kind = gold_relation_kind(connection, table_name)
+            comment = connection.execute(
+                text("SELECT obj_description(to_regclass(:name), 'pg_class')"),
+                {"name": f'gold."{table_name}"'}
+            ).scalar()
+
+        if kind == "m" and comment == version:
+            logging.info(f"  - Refreshing gold materialized view: {table_name}...")
+            with engine.begin() as connection:
+                connection.execute(text(f'REFRESH MATERIALIZED VIEW CONCURRENTLY gold."{table_name}"'))
+            logging.info(f"    - Refreshed {table_name}.")
+            return
+
+        logging.info(f"  - Creating gold materialized view: {table_name}...")
+        new_name = f"{table_name}__new"
+        with engine.begin() as connection:
+            connection.execute(text(f'DROP MATERIALIZED VIEW IF EXISTS gold."{new_name}"'))
+            result = create_matview(connection, table_name, query, new_name)
+            note(rows_written=result.rowcount)
+        swap_in(
+            engine, table_name, f'ALTER MATERIALIZED VIEW gold."{new_name}" RENAME TO "{table_name}"',
+            after_publish=recreate_dependents
+        )
+        logging.info(f"    - Swapped in {table_name}.")
+    except Exception as e:
+        logging.error(f"    - Failed to publish {filepath}. Error: {e}")
+        raise
+
+
+def gold_table_exists(engine, table_name):
+    """True if the gold table has been built before."""
+    with engine.connect() as connection:
+        return connection.execute(
+            text("SELECT to_regclass(:name)"), {"name": f'gold."{table_name}"'}
+        ).scalar() is not None
+
+
+def refresh_gold_months(engine, filepath, table_name, months):
+    """
+    Deletes and re-aggregates the given months of a month-grained gold table in one
+    transaction. The first and last month are passed as well, so the silver scan is
+    pruned to the partitions of those months when silver is partitioned.
+    """
+    logging.info(f"  - Refreshing {len(months)} months of gold table: {table_name}...")
+    try:
+        with open(filepath, 'r') as file:
+            sql_script = file.read()
+
+        with engine.begin() as connection:
+            result = connection.execute(
+                text(sql_script),
+                {"months": months, "first_month": min(months), "last_month": max(months)}
+            )
+            # The row count of the script's last statement (its INSERT)
+            note(rows_written=result.rowcount)
+        logging.info(f"    - Successfully refreshed {table_name}.")
+    except Exception as e:
+        logging.error(f"    - Failed to execute {filepath}. Error: {e}")
+        raise
+
+
 def build_gold_layer(engine):
-    """Executes all SQL scripts to build the Gold layer."""
-    logging.info("--- Starting build of GOLD Layer ---")
+    """
+    Executes all SQL scripts to build the Gold layer, running independent scripts
+    concurrently and skipping tables whose silver inputs are unchanged when
+    SKIP_UNCHANGED_TABLES is set. In incremental mode, month-grained tables only have
+    the months recorded by incremental silver builds re-aggregated.
+    """
+    logging.info(
+        f"--- Starting build of GOLD Layer (mode: {GOLD_BUILD_MODE}, publish: {GOLD_PUBLISH_MODE}, "
+        f"monthly rollup: {GOLD_MONTHLY_ROLLUP}, workers: {SQL_MAX_WORKERS}) ---"
+    )
+    manifest = read_manifest()
+    silver_state = read_state(SILVER_STATE_FILE)
+    pending_months = silver_state.get("gold_pending_months", [])
+    full_refresh = silver_state.get("gold_full_refresh", True)
 
     gold_scripts = [
         "gold_monthly_driver_performance.sql",
@@ -74,29 +269,93 @@ def build_gold_layer(engine):
         "gold_vehicle_failure_analysis.sql"
     ]
 
-    for filename in gold_scripts:
-        filepath = SQL_DIR / filename
+    # In rollup mode the monthly tables are read from the rollup, so they depend on it in the DAG
+    script_paths = {filename: SQL_DIR / filename for filename in gold_scripts}
+    if GOLD_MONTHLY_ROLLUP:
+        script_paths[ROLLUP_SCRIPT] = SQL_DIR / ROLLUP_SCRIPT
+        for filename in gold_scripts:
+            if (ROLLUP_SQL_DIR / filename).exists():
+                script_paths[filename] = ROLLUP_SQL_DIR / filename
+
+    scripts = {}
+    for filename, filepath in script_paths.items():
         if filepath.exists():
-            execute_gold_script(engine, filepath)
+            scripts[filename] = filepath.read_text()
         else:
             logging.error(f"  - SQL file not found: {filepath}")
 
+    graph = build_dependency_graph(scripts)
+
+    def build_table(filename):
+        _, table_name = script_target(scripts[filename])
+        fingerprint = script_fingerprint(scripts[filename], manifest)
+        if is_unchanged(manifest, "gold", table_name, fingerprint):
+            logging.info(f"  - Skipping gold table {table_name}: inputs unchanged.")
+            return
+        filepath = script_paths[filename]
+        # Projections of the rollup are small, so they are always rebuilt from it in full
+        refresh_script = INCREMENTAL_SQL_DIR / filename.replace(".sql", "_refresh.sql")
+        if filepath.parent != SQL_DIR:
+            refresh_script = None
+        # Materialized views cannot be partially refreshed; they are refreshed concurrently instead
+        if (
+            GOLD_BUILD_MODE == "incremental" and GOLD_PUBLISH_MODE != "matview" and not full_refresh
+            and refresh_script and refresh_script.exists() and gold_table_exists(engine, table_name)
+        ):
+            if pending_months:
+                with track("gold", table_name):
+                    refresh_gold_months(engine, refresh_script, table_name, pending_months)
+            else:
+                logging.info(f"  - Skipping gold table {table_name}: no affected months.")
+        else:
+            with track("gold", table_name):
+                if GOLD_PUBLISH_MODE == "matview":
+                    dependents = [
+                        (script_target(scripts[name])[1], script_paths[name])
+                        for name in dependency_order(graph, transitive_dependents(graph, filename))
+                    ]
+                    publish_matview(engine, filepath, table_name, dependents)
+                elif GOLD_PUBLISH_MODE == "swap":
+                    publish_swap(engine, filepath, table_name)
+                else:
+                    execute_gold_script(engine, filepath)
+        record_version(manifest, "gold", table_name, fingerprint)
+
+    # Created up front: concurrent CREATE SCHEMA IF NOT EXISTS calls can still collide
+    with engine.begin() as connection:
+        connection.execute(text("CREATE SCHEMA IF NOT EXISTS gold;"))
+        if GOLD_PUBLISH_MODE == "swap":
+            connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {STAGING_SCHEMA};"))
+
+    run_dag(graph, build_table, max_workers=SQL_MAX_WORKERS)
+
+    # Every table is now up to date, so the months handled here no longer need refreshing
+    silver_state = read_state(SILVER_STATE_FILE)
+    silver_state["gold_pending_months"] = sorted(
+        set(silver_state.get("gold_pending_months", [])) - set(pending_months)
+    )
+    if full_refresh:
+        silver_state["gold_full_refresh"] = False
+    write_state(silver_state, SILVER_STATE_FILE)
+
     logging.info("--- GOLD Layer build completed. ---")
 
 
-def main():
-    """Main function to orchestrate the Gold layer build."""
+def main(engine=None):
+    """Main function to orchestrate the Gold layer build. Returns True on success."""
     logging.info("=" * 50)
     logging.info("=== Starting Gold Layer Build Process ===")
     try:
-        db_engine = get_db_engine()
+        db_engine = engine or get_db_engine()
         build_gold_layer(db_engine)
         logging.info("Gold layer build finished successfully.")
+        return True
     except Exception as e:
         logging.critical(f"Gold layer build failed. Error: {e}")
+        return False
     finally:
         logging.info("=" * 50)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(0 if main() else 1)
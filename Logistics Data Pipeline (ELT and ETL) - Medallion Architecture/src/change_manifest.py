@@ -0,0 +1,64 @@
+import os
+import hashlib
+import threading
+
+from dotenv import load_dotenv
+
+from pipeline_state import STATE_DIR, read_state, write_state
+from sql_utils import script_inputs
+
+# --- Configuration ---
+MANIFEST_FILE = STATE_DIR / "bronze_manifest.json"
+
+load_dotenv()
+# When enabled, tables whose inputs have not changed since their last successful build are skipped
+SKIP_UNCHANGED = os.getenv("SKIP_UNCHANGED_TABLES", "false").lower() == "true"
+
+# Manifest sections: checksums of the landing files, the versions loaded into bronze,
+# the fingerprints silver/gold tables were built from, and those constraints were applied to.
+MANIFEST_SECTIONS = ["extracted", "bronze", "silver", "gold", "constraints"]
+
+# Serialises manifest writes from concurrently executing build steps
+_manifest_lock = threading.Lock()
+
+
+def read_manifest():
+    """Reads the manifest, making sure every section is present."""
+    manifest = read_state(MANIFEST_FILE)
+    for section in MANIFEST_SECTIONS:
+        manifest.setdefault(section, {})
+    return manifest
+
+
+def write_manifest(manifest):
+    """Atomically persists the manifest."""
+    with _manifest_lock:
+        write_state(manifest, MANIFEST_FILE)
+
+
+def record_version(manifest, section, table, version):
+    """Records the version a table was built from and persists the manifest (thread-safe)."""
+    with _manifest_lock:
+        manifest[section][table] = version
+        write_state(manifest, MANIFEST_FILE)
+
+
+def script_fingerprint(sql_script, manifest):
+    """
+    Fingerprints a build script as its own text plus the recorded versions of every table it reads.
+    Editing the SQL or changing any upstream table therefore changes the fingerprint.
+    """
+    sha256 = hashlib.sha256(sql_script.encode("utf-8"))
+    for schema, table in sorted(script_inputs(sql_script)):
+        sha256.update(f"|{schema}.{table}={manifest[schema].get(table, '')}".encode("utf-8"))
+    return sha256.hexdigest()
+
+
+def chain_version(previous_version, checksum):
+    """Version of an appended-to table: changes with every delta loaded into it."""
+    return hashlib.sha256(f"{previous_version or ''}|{checksum}".encode("utf-8")).hexdigest()
+
+
+def is_unchanged(manifest, section, table, version):
+    """True if skipping is enabled and the table was last built/loaded from the same version."""
+    return SKIP_UNCHANGED and version is not None and manifest[section].get(table) == version
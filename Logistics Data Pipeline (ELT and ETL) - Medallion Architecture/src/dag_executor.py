@@ -0,0 +1,87 @@
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from sql_utils import script_target, script_inputs
+
+
+def build_dependency_graph(scripts):
+    """
+    Builds {name: set of dependency names} from {name: sql_script}. A script depends
+    on another script in the set if it reads the table that script creates;
+    references to tables built elsewhere (e.g. bronze) are treated as external inputs.
+    """
+    producers = {script_target(sql): name for name, sql in scripts.items()}
+    return {
+        name: {producers[ref] for ref in script_inputs(sql) if ref in producers}
+        for name, sql in scripts.items()
+    }
+
+
+def transitive_dependents(graph, name):
+    """Returns every node that directly or indirectly depends on `name`."""
+    dependents = defaultdict(set)
+    for node, deps in graph.items():
+        for dep in deps:
+            dependents[dep].add(node)
+
+    result, stack = set(), [name]
+    while stack:
+        for node in dependents[stack.pop()]:
+            if node not in result:
+                result.add(node)
+                stack.append(node)
+    return result
+
+
+def dependency_order(graph, names):
+    """Returns `names` sorted so that every node comes after the nodes it depends on."""
+    ordered, remaining = [], set(names)
+    while remaining:
+        ready = sorted(n for n in remaining if not graph[n] & remaining)
+        if not ready:
+            raise ValueError(f"Dependency cycle between: {', '.join(sorted(remaining))}")
+        ordered.extend(ready)
+        remaining.difference_update(ready)
+    return ordered
+
+
+def run_dag(graph, run_node, max_workers=1):
+    """
+    Calls run_node(name) for every node once all of its dependencies have succeeded,
+    running up to `max_workers` independent nodes at a time. When a node fails, the
+    nodes that depend on it are not run; the rest of the graph still completes and
+    a RuntimeError is raised at the end.
+    """
+    pending = {name: set(deps) for name, deps in graph.items()}
+    failed, not_run = [], []
+
+    with ThreadPoolExecutor(max_workers=max(max_workers, 1)) as executor:
+        running = {}
+        while pending or running:
+            for name in sorted(n for n, deps in pending.items() if not deps):
+                del pending[name]
+                running[executor.submit(run_node, name)] = name
+
+            if not running:
+                raise ValueError(f"Dependency cycle between: {', '.join(sorted(pending))}")
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    logging.error(f"  - {name} failed: {e}")
+                    failed.append(name)
+                    for dependent in transitive_dependents(graph, name):
+                        if pending.pop(dependent, None) is not None:
+                            not_run.append(dependent)
+                    continue
+                for deps in pending.values():
+                    deps.discard(name)
+
+    if failed:
+        raise RuntimeError(
+            f"Failed: {', '.join(failed)}; not run: {', '.join(sorted(not_run)) or 'none'}"
+        )
@@ -0,0 +1,136 @@
+import os
+import time
+import logging
+import threading
+import weakref
+from contextlib import contextmanager
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+
+from run_metrics import instrument_engine
+
+# --- Configuration ---
+load_dotenv()
+DB_USER = os.getenv("POSTGRES_USER")
+DB_PASSWORD = os.getenv("POSTGRES_PASSWORD")
+DB_HOST = os.getenv("POSTGRES_HOST")
+DB_PORT = os.getenv("POSTGRES_PORT", "5432")
+DB_NAME = os.getenv("POSTGRES_DB")
+
+# The pool has to cover the concurrent silver/gold script workers
+SQL_MAX_WORKERS = int(os.getenv("SQL_MAX_WORKERS", "4"))
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(max(SQL_MAX_WORKERS, 5))))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+# Seconds to wait for a free connection before failing
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Test connections before handing them out, so connections dropped between runs are replaced
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Server-side limit for any single statement; 0 disables it
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+
+# Connection-usage counters per engine (dropped together with the engine)
+_pool_stats = weakref.WeakKeyDictionary()
+
+
+class PoolStats:
+    """Thread-safe counters of how an engine's connection pool is used."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.held_seconds = 0.0
+
+    def on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is None:
+            return
+        with self._lock:
+            self.checked_out -= 1
+            self.held_seconds += time.perf_counter() - checked_out_at
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "held_seconds": self.held_seconds,
+            }
+
+    def reset_peak(self):
+        with self._lock:
+            self.peak_checked_out = self.checked_out
+
+
+def get_db_engine():
+    """
+    Creates the pooled SQLAlchemy engine for PostgreSQL. Pool size, overflow, pre-ping and
+    the statement timeout come from the environment; pool usage is tracked for pool_usage().
+    """
+    connect_args = {}
+    if DB_STATEMENT_TIMEOUT_MS:
+        connect_args["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+    try:
+        engine = create_engine(
+            f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            connect_args=connect_args
+        )
+        stats = PoolStats()
+        event.listen(engine, "connect", stats.on_connect)
+        event.listen(engine, "checkout", stats.on_checkout)
+        event.listen(engine, "checkin", stats.on_checkin)
+        _pool_stats[engine] = stats
+        instrument_engine(engine)
+
+        with engine.connect():
+            logging.info(
+                f"Successfully connected to the PostgreSQL database "
+                f"(pool size: {DB_POOL_SIZE}, max overflow: {DB_MAX_OVERFLOW})."
+            )
+        return engine
+    except OperationalError as e:
+        logging.error(f"Could not connect to the database. Error: {e}")
+        raise
+
+
+@contextmanager
+def pool_usage(engine, label):
+    """Logs how many connections the wrapped block checked out, opened and held, and the peak in use."""
+    stats = _pool_stats.get(engine)
+    if stats is None:
+        yield
+        return
+
+    stats.reset_peak()
+    before = stats.snapshot()
+    try:
+        yield
+    finally:
+        after = stats.snapshot()
+        logging.info(
+            f"Connection usage for {label}: "
+            f"{after['checkouts'] - before['checkouts']} checkouts, "
+            f"{after['connects'] - before['connects']} new connections, "
+            f"peak {stats.peak_checked_out} in use (pool {DB_POOL_SIZE}+{DB_MAX_OVERFLOW}), "
+            f"held {after['held_seconds'] - before['held_seconds']:.2f}s"
+        )
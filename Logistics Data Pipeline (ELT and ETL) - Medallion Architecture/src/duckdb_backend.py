@@ -0,0 +1,246 @@
+import os
+import re
+import sys
+import logging
+from pathlib import Path
+from dotenv import load_dotenv
+
+from bronze_loader import (
+    LOADED_AT_COLUMN, BATCH_ID_COLUMN, ROW_HASH_COLUMN, landing_path, row_hash_expression
+)
+from bronze_normalize import add_normalized_columns_sql
+from dag_executor import build_dependency_graph, run_dag
+from run_metrics import current_run_id, track, note
+from sql_utils import PARTITIONING_REWRITES, script_target
+
+# --- 1. CONFIGURATION & INITIALIZATION ---
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+LOG_DIR = BASE_DIR / "logs"
+SQL_DIR = BASE_DIR / "sql"
+BRONZE_INPUTS_DIR = BASE_DIR / "bronze_inputs"
+LOG_FILE = LOG_DIR / "duckdb_build.log"
+
+LOG_DIR.mkdir(exist_ok=True)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler(LOG_FILE),
+        logging.StreamHandler()
+    ]
+)
+
+load_dotenv()
+
+# Database file the local build writes; ":memory:" keeps nothing after the run
+DUCKDB_PATH = os.getenv("DUCKDB_PATH", str(BASE_DIR / "local" / "ekart.duckdb"))
+LANDING_FORMAT = os.getenv("LANDING_FORMAT", "csv").lower()
+
+BRONZE_TABLES = ["Customers", "Orders", "Shipments", "Drivers", "Vehicles"]
+SILVER_SCRIPTS = [
+    "silver_drivers.sql",
+    "silver_vehicles.sql",
+    "silver_customers.sql",
+    "silver_orders.sql",
+    "silver_shipments.sql"
+]
+GOLD_SCRIPTS = [
+    "gold_monthly_driver_performance.sql",
+    "gold_vehicle_utilization_summary.sql",
+    "gold_full_shipment_details.sql",
+    "gold_customer_value_summary.sql",
+    "gold_monthly_operational_kpis.sql",
+    "gold_vehicle_failure_analysis.sql"
+]
+
+# Postgres TO_DATE format tokens and their strptime equivalents
+DATE_FORMAT_TOKENS = [("YYYY", "%Y"), ("Mon", "%b"), ("MM", "%m"), ("DD", "%d")]
+
+# PostgreSQL functions DuckDB lacks. INITCAP upper-cases the first letter of every run of
+# letters and digits and lower-cases the rest, as Postgres does.
+MACROS = [
+    r"""CREATE OR REPLACE MACRO initcap(s) AS array_to_string(
+        list_transform(regexp_extract_all(lower(s), '[\pL\pN]+|[^\pL\pN]+'), t -> upper(t[1]) || t[2:]), ''
+    )""",
+]
+
+
+# --- 2. DIALECT SHIM ---
+
+
+def to_strptime(match):
+    """TO_DATE(value, 'DD-Mon-YYYY') -> CAST(strptime(value, '%d-%b-%Y') AS DATE)."""
+    date_format = match.group(2)
+    for token, directive in DATE_FORMAT_TOKENS:
+        date_format = date_format.replace(token, directive)
+    return f"CAST(strptime({match.group(1)}, '{date_format}') AS DATE)"
+
+
+# (pattern, replacement) pairs applied in order to every script. SPLIT_PART, REGEXP_REPLACE
+# with the 'g' flag, DISTINCT ON and GROUPING SETS behave the same in both and are left alone.
+DIALECT_REWRITES = [
+    # Postgres '~' finds the pattern anywhere; DuckDB's '~' must match the whole string
+    (re.compile(r"""([\w."]+)\s+~\s+('(?:[^']|'')*')"""), r"regexp_matches(\1, \2)"),
+    (re.compile(r"TO_DATE\(([^,()]+),\s*'([^']+)'\)", re.IGNORECASE), to_strptime),
+    # Postgres names a "column::TYPE" select item after the column, DuckDB after the whole expression
+    (re.compile(r"^(\s+)((?:\w+\.)?(\w+)::\w+)(,?)$", re.MULTILINE), r"\1\2 AS \3\4"),
+    # Staging tables are dropped with the transaction in Postgres; DuckDB keeps them per connection
+    (re.compile(r"CREATE\s+TEMP\s+TABLE\s+(\w+)\s+ON\s+COMMIT\s+DROP\s+AS", re.IGNORECASE),
+     r"CREATE OR REPLACE TEMP TABLE \1 AS"),
+    # Month partitioning only matters to Postgres
+    *PARTITIONING_REWRITES,
+]
+
+CTE_NAME_PATTERN = re.compile(r"\s*,?\s*(\w+)\s+AS\s*\(", re.IGNORECASE)
+RETURNING_PATTERN = re.compile(r"\s+RETURNING\s+[\w\s,]+$", re.IGNORECASE)
+
+
+def closing_paren(sql, start):
+    """Index of the parenthesis closing the one at `start`, skipping quoted text."""
+    depth, quote = 0, None
+    for i in range(start, len(sql)):
+        char = sql[i]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return i
+    raise ValueError("Unbalanced parentheses in SQL script.")
+
+
+def split_writable_ctes(statement):
+    """
+    DuckDB has no INSERT inside WITH. Turns "WITH a AS (SELECT ...), b AS (INSERT ...
+    RETURNING ...) SELECT ..." into a temp table per SELECT CTE and a plain INSERT per
+    INSERT CTE, in order. The final SELECT only reports counts to Postgres and is dropped.
+    """
+    body = re.sub(r"^(\s*--[^\n]*\n)*\s*", "", statement)
+    if not re.match(r"WITH\b", body, re.IGNORECASE) or not re.search(r"AS\s*\(\s*INSERT\b", body, re.IGNORECASE):
+        return [statement]
+
+    statements, position = [], 4
+    while match := CTE_NAME_PATTERN.match(body, position):
+        end = closing_paren(body, match.end() - 1)
+        query = body[match.end():end].strip()
+        if re.match(r"INSERT\b", query, re.IGNORECASE):
+            statements.append(RETURNING_PATTERN.sub("", query))
+        else:
+            statements.append(f"CREATE OR REPLACE TEMP TABLE {match.group(1)} AS {query}")
+        position = end + 1
+    return statements
+
+
+def translate(sql_script):
+    """Rewrites a PostgreSQL build script from sql/ into DuckDB SQL."""
+    for pattern, replacement in DIALECT_REWRITES:
+        sql_script = pattern.sub(replacement, sql_script)
+    statements = [
+        rewritten
+        for statement in sql_script.split(";") if statement.strip()
+        for rewritten in split_writable_ctes(statement)
+    ]
+    return ";\n".join(statements) + ";"
+
+
+# --- 3. LOCAL BUILD ---
+
+
+def connect(database_path=None):
+    """Opens the DuckDB database with the medallion schemas and the Postgres compatibility macros."""
+    import duckdb
+
+    database_path = database_path or DUCKDB_PATH
+    if database_path != ":memory:":
+        Path(database_path).parent.mkdir(parents=True, exist_ok=True)
+    connection = duckdb.connect(database_path)
+    for schema in ["bronze", "silver", "quarantine", "gold"]:
+        connection.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+    for macro in MACROS:
+        connection.execute(macro)
+    return connection
+
+
+def load_bronze(connection, input_dir=BRONZE_INPUTS_DIR, landing_format=LANDING_FORMAT):
+    """
+    Replaces every bronze table with its landing file, read directly by DuckDB. Values
+    stay text and rows are stamped with the load time, batch and row hash, as in the
+    Postgres bronze layer.
+    """
+    logging.info(f"--- Loading BRONZE Layer from {input_dir} ({landing_format}) ---")
+    for table_name in BRONZE_TABLES:
+        path = landing_path(input_dir, table_name, landing_format)
+        if landing_format == "parquet":
+            source = f"read_parquet('{path}')"
+        else:
+            source = f"read_csv('{path}', header = true, all_varchar = true)"
+        columns = [column[0] for column in connection.execute(f"SELECT * FROM {source} LIMIT 0").description]
+        with track("bronze", table_name):
+            connection.execute(
+                f'CREATE OR REPLACE TABLE bronze."{table_name}" AS '
+                f'SELECT *, now() AS {LOADED_AT_COLUMN}, ? AS {BATCH_ID_COLUMN}, '
+                f'{row_hash_expression(columns)} AS {ROW_HASH_COLUMN} FROM {source}',
+                [current_run_id()]
+            )
+            for statement in add_normalized_columns_sql(table_name):
+                connection.execute(statement)
+            rows = connection.execute(f'SELECT COUNT(*) FROM bronze."{table_name}"').fetchone()[0]
+            note(rows_written=rows)
+        logging.info(f"  - Loaded {rows} rows into bronze.{table_name}.")
+
+
+def build_layer(connection, layer, script_names):
+    """Runs a layer's build scripts, translated to DuckDB, in dependency order."""
+    logging.info(f"--- Building {layer.upper()} Layer on DuckDB ---")
+    scripts = {name: (SQL_DIR / name).read_text() for name in script_names}
+
+    def build_table(name):
+        schema, table_name = script_target(scripts[name])
+        with track(layer, table_name):
+            connection.execute(translate(scripts[name]))
+            rows = connection.execute(f'SELECT COUNT(*) FROM {schema}."{table_name}"').fetchone()[0]
+            note(rows_written=rows)
+        logging.info(f"  - Built {schema}.{table_name}: {rows} rows.")
+
+    # DuckDB already parallelises each statement, so the scripts run one at a time
+    run_dag(build_dependency_graph(scripts), build_table, max_workers=1)
+
+
+def build_medallion(database_path=None, input_dir=BRONZE_INPUTS_DIR, landing_format=LANDING_FORMAT):
+    """Builds bronze, silver and gold in a DuckDB database from the landing files."""
+    connection = connect(database_path)
+    try:
+        load_bronze(connection, input_dir, landing_format)
+        build_layer(connection, "silver", SILVER_SCRIPTS)
+        build_layer(connection, "gold", GOLD_SCRIPTS)
+    finally:
+        connection.close()
+
+
+# --- 4. MAIN ORCHESTRATOR ---
+
+
+def main():
+    """Builds the whole medallion in DuckDB without a database server. Returns True on success."""
+    logging.info("=" * 50)
+    logging.info(f"=== Starting Local DuckDB Build ({DUCKDB_PATH}) ===")
+    try:
+        build_medallion()
+        logging.info("DuckDB build finished successfully.")
+        return True
+    except Exception as e:
+        logging.critical(f"DuckDB build failed. Error: {e}")
+        return False
+    finally:
+        logging.info("=" * 50)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
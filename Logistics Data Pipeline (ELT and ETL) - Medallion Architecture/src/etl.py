@@ -1,14 +1,26 @@
+import os
+import time
+import argparse
+import importlib
 import subprocess
 import logging
+from contextlib import contextmanager
 from pathlib import Path
 import sys
 
+from dotenv import load_dotenv
+
+from db import get_db_engine, pool_usage
+from run_lock import RUN_BUSY_EXIT_CODE, RunLockBusy, run_slot
+from run_metrics import RUN_ID_ENV, METRICS_FILE, new_run_id, record_metric, summarize_runs
+
 # --- 1. CONFIGURATION & INITIALIZATION ---
 
 # Define project paths
 BASE_DIR = Path(__file__).resolve().parent.parent
 LOG_DIR = BASE_DIR / "logs"
 SRC_DIR = BASE_DIR / "src"
+LOG_FILE = LOG_DIR / "main_pipeline.log"
 
 # Create logs directory
 LOG_DIR.mkdir(exist_ok=True)
@@ -18,23 +30,81 @@ logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler(LOG_DIR / "main_pipeline.log"),
+        logging.FileHandler(LOG_FILE),
         logging.StreamHandler()
     ]
 )
 
+load_dotenv()
+
+# "inprocess" imports each stage and calls its main() with one shared engine;
+# "subprocess" runs every stage in its own interpreter for full isolation.
+PIPELINE_RUNNER = os.getenv("PIPELINE_RUNNER", "inprocess").lower()
+
+# Define the order of the scripts to be executed
+PIPELINE_STEPS = [
+    "push_to_bronze.py",  # Step 1: Ingest to Bronze
+    "push_to_silver.py",  # Step 2: Clean and build Silver
+    "add_constraints.py",  # Step 3: Add constraints to Silver
+    "build_gold.py"  # Step 4: Build Gold analytics tables
+]
+
+# After every step, analyzes the tables it created or changed before the next step joins
+# them; after the last one, also records table and index sizes (src/maintain_tables.py)
+TABLE_MAINTENANCE = os.getenv("TABLE_MAINTENANCE", "true").lower() == "true"
+MAINTENANCE_SCRIPT = "maintain_tables.py"
+
 
 # --- 2. ORCHESTRATION LOGIC ---
 
-def run_script(script_name):
 
+@contextmanager
+def log_to_file(log_file):
+    """
+    Temporarily copies all log records to `log_file`. Only the first basicConfig call in
+    a process takes effect, so in-process stages would otherwise not write their own logs.
+    """
+    handler = logging.FileHandler(log_file)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    root_logger = logging.getLogger()
+    root_logger.addHandler(handler)
+    try:
+        yield
+    finally:
+        root_logger.removeHandler(handler)
+        handler.close()
+
+
+def run_stage(script_name, engine, options=None):
+    """Imports a stage module and calls its main() with the shared engine (and any `options`)."""
+    logging.info(f"--- Running stage in-process: {script_name} ---")
+    try:
+        module = importlib.import_module(Path(script_name).stem)
+    except ImportError as e:
+        logging.error(f"--- STAGE NOT IMPORTABLE: {script_name}. Error: {e} ---")
+        return False
+
+    with log_to_file(module.LOG_FILE), pool_usage(engine, script_name):
+        success = module.main(engine=engine, **(options or {}))
+    if success:
+        logging.info(f"Successfully completed {script_name}.")
+    else:
+        logging.error(f"--- STAGE FAILED: {script_name} ---")
+    return success
+
+
+def run_script(script_name, options=None):
+    """Runs a stage script in its own interpreter. Boolean `options` become --flag / --no-flag."""
     script_path = SRC_DIR / script_name
+    flags = [
+        f"--{'' if value else 'no-'}{name.replace('_', '-')}" for name, value in (options or {}).items()
+    ]
     logging.info(f"--- Running script: {script_name} ---")
 
     try:
         # Use sys.executable to ensure the correct Python interpreter is used
         result = subprocess.run(
-            [sys.executable, str(script_path)],
+            [sys.executable, str(script_path), *flags],
             check=True,  # Raise an exception if the script fails
             capture_output=True,  # Capture stdout and stderr
             text=True  # Decode stdout/stderr as text
@@ -55,28 +125,89 @@ def run_script(script_name):
         return False
 
 
+def run_timed(step, engine, timings, options=None):
+    """Runs a stage in-process, or as a subprocess without an engine, and records its wall time."""
+    start = time.perf_counter()
+    if engine is None:
+        success = run_script(step, options)
+    else:
+        success = run_stage(step, engine, options)
+    elapsed = time.perf_counter() - start
+    # Maintenance runs after several steps; the timings table shows its total
+    timings[step] = timings.get(step, 0.0) + elapsed
+    record_metric(
+        Path(step).stem, status="success" if success else "failed",
+        wall_seconds=round(elapsed, 4)
+    )
+    return success
+
+
+def log_stage_timings(timings):
+    """Logs the wall time of every stage that ran, plus the total."""
+    logging.info("Stage timings:")
+    for step, seconds in timings.items():
+        logging.info(f"  - {step:<20} {seconds:8.2f}s")
+    logging.info(f"  - {'total':<20} {sum(timings.values()):8.2f}s")
+
+
 def main():
-    """Main function to run the entire ETL pipeline in sequence."""
+    """Main function to run the entire ETL pipeline in sequence. Returns True on success."""
+    # Every stage (in-process or subprocess) records its metrics under this run id
+    os.environ[RUN_ID_ENV] = new_run_id()
     logging.info("==================================================")
-    logging.info("=== Starting Pipeline Run ===")
-
-    # Define the order of the scripts to be executed
-    pipeline_steps = [ # Step 0: Generate new.ipynb data
-        "push_to_bronze.py",  # Step 1: Ingest to Bronze
-        "push_to_silver.py",  # Step 2: Clean and build Silver
-        "add_constraints.py",  # Step 3: Add constraints to Silver
-        "build_gold.py"  # Step 4: Build Gold analytics tables
-    ]
-
-    for step in pipeline_steps:
-        success = run_script(step)
-        if not success:
-            logging.critical("Pipeline halted due to a failed step.")
-            break  # Stop the pipeline if any script fails
+    logging.info(f"=== Starting Pipeline Run {os.environ[RUN_ID_ENV]} (runner: {PIPELINE_RUNNER}) ===")
 
+    success = False
+    timings = {}
+    engine = None
+    try:
+        if PIPELINE_RUNNER != "subprocess":
+            engine = get_db_engine()
+
+        for step in PIPELINE_STEPS:
+            success = run_timed(step, engine, timings)
+            if success and TABLE_MAINTENANCE:
+                success = run_timed(
+                    MAINTENANCE_SCRIPT, engine, timings,
+                    options={"record_sizes": step == PIPELINE_STEPS[-1]}
+                )
+            if not success:
+                logging.critical("Pipeline halted due to a failed step.")
+                break  # Stop the pipeline if any script fails
+    except Exception as e:
+        logging.critical(f"Pipeline failed. Error: {e}")
+        success = False
+    finally:
+        if engine is not None:
+            engine.dispose()
+
+    log_stage_timings(timings)
+    logging.info(f"Run metrics written to {METRICS_FILE}")
     logging.info("=== Full Pipeline Run Finished ===")
     logging.info("==================================================")
+    return success
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Runs the medallion pipeline or summarises past runs.")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("run", help="run the pipeline (default)")
+    summary_parser = subparsers.add_parser("summary", help="compare the metrics of recent runs")
+    summary_parser.add_argument("--runs", type=int, default=5, help="number of recent runs to compare")
+    summary_parser.add_argument(
+        "--field", default="wall_seconds",
+        choices=["wall_seconds", "db_seconds", "rows_read", "rows_written", "bytes"]
+    )
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        print(summarize_runs(args.runs, args.field))
+    else:
+        # Manual and scheduled runs share the run slots, so they never overlap
+        try:
+            with run_slot():
+                success = main()
+        except RunLockBusy as e:
+            logging.warning(f"{e} Not starting another run.")
+            sys.exit(RUN_BUSY_EXIT_CODE)
+        sys.exit(0 if success else 1)
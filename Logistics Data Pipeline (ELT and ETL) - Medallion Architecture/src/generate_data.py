@@ -0,0 +1,272 @@
+import time
+import logging
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from bronze_loader import landing_path, write_parquet
+
+# --- 1. CONFIGURATION & INITIALIZATION ---
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+LOG_DIR = BASE_DIR / "logs"
+BRONZE_INPUTS_DIR = BASE_DIR / "bronze_inputs"
+LOG_FILE = LOG_DIR / "data_generation.log"
+
+LOG_DIR.mkdir(exist_ok=True)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler(LOG_FILE),
+        logging.StreamHandler()
+    ]
+)
+
+# Rows generated and written per batch, so 10M-row files never sit in memory at once
+CHUNK_ROWS = 1_000_000
+
+SCALE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+
+START_DATE = np.datetime64("2024-01-01")
+DATE_RANGE_DAYS = 730
+
+FIRST_NAMES = np.array(["john", "mary", "ravi", "anu", "bob", "priya", "li", "fatima", "carlos", "emma"])
+LAST_NAMES = np.array(["doe", "ann", "kumar", "s", "smith", "patel", "wei", "khan", "garcia", "brown"])
+CITIES = np.array(["Bengaluru", "Mumbai", "Delhi", "Chennai", "Pune", "Kolkata", "Hyderabad"])
+
+# The variants silver_shipments.sql maps to Delivered / In Transit, plus values it treats as Failed
+STATUSES = np.array([
+    "delivered", "Delivered", "D", "completed", "in transit", "In Transit",
+    "in_transit", "processing", "failed", "FAILED", "lost", "returned", ""
+])
+STATUS_WEIGHTS = np.array([20, 10, 5, 10, 8, 4, 4, 4, 10, 3, 3, 3, 1], dtype=float)
+
+VEHICLE_TYPES = np.array(["van", "Van ", "Cargo Van", "Big Truck", "truck", "motorcycle", "Motorcycle", "bike", "scooter"])
+
+
+def parse_scale(value):
+    """Parses a row count such as 10000, 10k, 1M or 10M."""
+    value = str(value).strip().lower()
+    if value[-1:] in SCALE_SUFFIXES:
+        return int(float(value[:-1]) * SCALE_SUFFIXES[value[-1]])
+    return int(value)
+
+
+# --- 2. DIRTY COLUMN BUILDERS (vectorized) ---
+
+def pick(rng, values, n, weights=None):
+    """Draws n values, optionally weighted."""
+    p = None if weights is None else weights / weights.sum()
+    return values[rng.choice(len(values), size=n, p=p)]
+
+
+def messy_case(rng, series):
+    """Randomly lower-, upper- or title-cases values and pads some with spaces, as typed by hand."""
+    variant = rng.integers(0, 4, len(series))
+    return np.select(
+        [variant == 0, variant == 1, variant == 2],
+        [series.str.lower(), series.str.upper(), series.str.title()],
+        default="  " + series + " "
+    )
+
+
+def format_dates(rng, days, invalid_share=0.03):
+    """
+    Formats day offsets in the mix of styles silver_orders.sql parses:
+    YYYY-MM-DD, DD-Mon-YYYY, MM/DD/YYYY, DD/MM/YYYY, plus some unparseable values.
+    """
+    dates = pd.DatetimeIndex(START_DATE + days.astype("timedelta64[D]"))
+    formats = ["%Y-%m-%d", "%d-%b-%Y", "%m/%d/%Y", "%d/%m/%Y"]
+    choice = rng.integers(0, len(formats), len(days))
+    result = np.empty(len(days), dtype=object)
+    for i, fmt in enumerate(formats):
+        mask = choice == i
+        result[mask] = dates[mask].strftime(fmt)
+    invalid = rng.random(len(days)) < invalid_share
+    result[invalid] = pick(rng, np.array(["not a date", "", "31/31/2024", "TBD"]), invalid.sum())
+    return result
+
+
+def format_amounts(rng, amounts):
+    """Order totals as plain numbers, with $ or ₹ signs, and with thousands separators."""
+    plain = pd.Series(amounts).map("{:.2f}".format)
+    grouped = pd.Series(amounts).map("{:,.2f}".format)
+    variant = rng.integers(0, 4, len(amounts))
+    return np.select(
+        [variant == 0, variant == 1, variant == 2],
+        ["$" + plain, "₹" + grouped, grouped],
+        default=plain
+    )
+
+
+def with_duplicates(rng, ids, share):
+    """
+    Replaces a share of the ids with earlier ones, so some entities appear more than once.
+    Only used for the tables silver deduplicates (customers, drivers and vehicles).
+    """
+    ids = ids.copy()
+    mask = rng.random(len(ids)) < share
+    ids[mask] = rng.integers(1, ids.max() + 1, mask.sum())
+    return ids
+
+
+# --- 3. TABLE GENERATORS ---
+
+def make_customers(rng, start, n):
+    ids = with_duplicates(rng, np.arange(start + 1, start + n + 1), share=0.05)
+    id_text = pd.Series(ids).astype(str)
+    names = messy_case(
+        rng, pd.Series(pick(rng, FIRST_NAMES, n)) + " " + pd.Series(pick(rng, LAST_NAMES, n))
+    )
+
+    # Mostly valid emails; some with spaces and capitals (fixed by silver), some rejected by it
+    variant = rng.choice(4, size=n, p=[0.80, 0.10, 0.05, 0.05])
+    emails = np.select(
+        [variant == 0, variant == 1, variant == 2],
+        ["user" + id_text + "@example.com", " User" + id_text + " @Example.COM", "invalid_email"],
+        default="user" + id_text + "@invalid.com"
+    )
+    addresses = (
+        pd.Series(rng.integers(1, 999, n)).astype(str) + " Main St, "
+        + pd.Series(pick(rng, CITIES, n)) + ", IN"
+    )
+    signup_dates = (START_DATE + rng.integers(0, DATE_RANGE_DAYS, n).astype("timedelta64[D]")).astype(str)
+    return pd.DataFrame({
+        "customer_id": ids,
+        "customer_name": names,
+        "email": emails,
+        "delivery_address": addresses,
+        "signup_date": signup_dates,
+    })
+
+
+def make_orders(rng, start, n, n_customers):
+    # About 2% of orders point at customers that do not exist
+    customer_ids = rng.integers(1, int(n_customers * 1.02) + 1, n)
+    amounts = np.round(rng.uniform(5, 5000, n), 2)
+    return pd.DataFrame({
+        "order_id": np.arange(start + 1, start + n + 1),
+        "customer_id": customer_ids,
+        "order_date": format_dates(rng, rng.integers(0, DATE_RANGE_DAYS, n)),
+        "order_total": format_amounts(rng, amounts),
+    })
+
+
+def make_shipments(rng, start, n, n_orders, n_drivers, n_vehicles):
+    dispatch = START_DATE.astype("datetime64[s]") + rng.integers(0, DATE_RANGE_DAYS * 86400, n).astype("timedelta64[s]")
+    # About 3% are delivered "before" dispatch, which silver drops
+    delivery = dispatch + rng.integers(-10 * 3600, 120 * 3600, n).astype("timedelta64[s]")
+    return pd.DataFrame({
+        "shipment_id": np.arange(start + 1, start + n + 1),
+        "order_id": rng.integers(1, int(n_orders * 1.01) + 1, n),
+        "driver_id": rng.integers(1, int(n_drivers * 1.02) + 1, n),
+        "vehicle_id": rng.integers(1, int(n_vehicles * 1.02) + 1, n),
+        "dispatch_date": pd.Series(dispatch.astype(str)).str.replace("T", " ", regex=False),
+        "delivery_date": pd.Series(delivery.astype(str)).str.replace("T", " ", regex=False),
+        "status": pick(rng, STATUSES, n, STATUS_WEIGHTS),
+    })
+
+
+def make_drivers(rng, start, n):
+    ids = with_duplicates(rng, np.arange(start + 1, start + n + 1), share=0.10)
+    names = messy_case(
+        rng, pd.Series(pick(rng, FIRST_NAMES, n)) + " " + pd.Series(pick(rng, LAST_NAMES, n))
+    )
+    # Test accounts that silver_drivers.sql filters out
+    test_rows = rng.random(n) < 0.05
+    names[test_rows] = pick(rng, np.array(["Test Driver", "test user", "TEST"]), test_rows.sum())
+    digits = pd.Series(rng.integers(7_000_000_000, 9_999_999_999, n)).astype(str)
+    variant = rng.integers(0, 3, n)
+    contacts = np.select(
+        [variant == 0, variant == 1],
+        ["+91 " + digits.str[:2] + "-" + digits.str[2:5] + "-" + digits.str[5:], "(" + digits.str[:3] + ") " + digits.str[3:]],
+        default=digits
+    )
+    return pd.DataFrame({"driver_id": ids, "driver_name": names, "contact_number": contacts})
+
+
+def make_vehicles(rng, start, n):
+    ids = with_duplicates(rng, np.arange(start + 1, start + n + 1), share=0.10)
+    plates = (
+        " KA" + pd.Series(rng.integers(1, 99, n)).astype(str).str.zfill(2)
+        + "AB" + pd.Series(rng.integers(1000, 9999, n)).astype(str) + " "
+    )
+    return pd.DataFrame({
+        "vehicle_id": ids,
+        "license_plate": plates,
+        "vehicle_type": pick(rng, VEHICLE_TYPES, n),
+    })
+
+
+def write_table(path, total_rows, make_chunk, seed):
+    """
+    Writes a table as CSV or Parquet in CHUNK_ROWS batches; each batch has its own seed,
+    so output is reproducible.
+    """
+    start_time = time.perf_counter()
+    chunks = (
+        make_chunk(np.random.default_rng([seed, chunk_index]), start, min(CHUNK_ROWS, total_rows - start))
+        for chunk_index, start in enumerate(range(0, total_rows, CHUNK_ROWS))
+    )
+    if path.suffix == ".parquet":
+        write_parquet(chunks, path)
+    else:
+        for index, df in enumerate(chunks):
+            df.to_csv(path, mode="w" if index == 0 else "a", header=index == 0, index=False)
+    logging.info(
+        f"  - Wrote {total_rows:,} rows to {path.name} in {time.perf_counter() - start_time:.1f}s"
+    )
+
+
+def generate(rows, output_dir=BRONZE_INPUTS_DIR, seed=42, landing_format="csv"):
+    """
+    Writes the five source files for `rows` orders and shipments: half as many customer
+    rows, and one driver and vehicle per 1,000 orders (at least 50). Returns the row counts.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    sizes = {
+        "Customers": max(rows // 2, 1),
+        "Orders": rows,
+        "Shipments": rows,
+        "Drivers": max(rows // 1000, 50),
+        "Vehicles": max(rows // 1000, 50),
+    }
+    logging.info(f"--- Generating {rows:,} orders into {output_dir} as {landing_format} (seed {seed}) ---")
+
+    def path(table_name):
+        return landing_path(output_dir, table_name, landing_format)
+
+    write_table(path("Customers"), sizes["Customers"], make_customers, seed)
+    write_table(
+        path("Orders"), sizes["Orders"],
+        lambda rng, start, n: make_orders(rng, start, n, sizes["Customers"]), seed + 1
+    )
+    write_table(
+        path("Shipments"), sizes["Shipments"],
+        lambda rng, start, n: make_shipments(rng, start, n, sizes["Orders"], sizes["Drivers"], sizes["Vehicles"]),
+        seed + 2
+    )
+    write_table(path("Drivers"), sizes["Drivers"], make_drivers, seed + 3)
+    write_table(path("Vehicles"), sizes["Vehicles"], make_vehicles, seed + 4)
+    return sizes
+
+
+# --- 4. MAIN ---
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates dirty synthetic source data for the pipeline.")
+    parser.add_argument("--rows", default="10k", help="orders/shipments to generate, e.g. 10k, 1M, 10M")
+    parser.add_argument("--output-dir", default=str(BRONZE_INPUTS_DIR))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", choices=["csv", "parquet"], default="csv", help="landing file format")
+    args = parser.parse_args()
+    generate(parse_scale(args.rows), args.output_dir, args.seed, args.format)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Offline stand-in for the gspread client. Each worksheet is a CSV file named
+after its title (e.g. Customers.csv) in a local directory. Enable it by setting
+GSPREAD_LOCAL_DIR; LOCAL_SHEETS_LATENCY_SECONDS adds a per-call delay to mimic
+network round trips.
+"""
+
+import csv
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from gspread.exceptions import WorksheetNotFound
+from gspread.utils import a1_range_to_grid_range, numericise_all
+
+
+class LocalWorksheet:
+    """Mimics the subset of gspread.Worksheet used by the pipeline."""
+
+    def __init__(self, path, latency=0.0):
+        self.path = Path(path)
+        self.title = self.path.stem
+        self.latency = latency
+        self._row_count = None
+        # File offset of the start of a row, by row index, left by the last get() call so the
+        # next range read in order starts there instead of at the top of the file
+        self._offsets = {0: 0}
+
+    def _read_rows(self):
+        if self.latency:
+            time.sleep(self.latency)
+        with open(self.path, 'r', newline='', encoding='utf-8') as file:
+            return list(csv.reader(file))
+
+    def get_all_values(self):
+        return self._read_rows()
+
+    def get_all_records(self):
+        """Like gspread, numbers in the formatted values become ints and floats."""
+        rows = self._read_rows()
+        if not rows:
+            return []
+        header = rows[0]
+        return [dict(zip(header, numericise_all(row))) for row in rows[1:]]
+
+    @property
+    def row_count(self):
+        if self._row_count is None:
+            with open(self.path, 'r', newline='', encoding='utf-8') as file:
+                self._row_count = sum(1 for _ in csv.reader(file))
+        return self._row_count
+
+    @property
+    def col_count(self):
+        # A Google worksheet always has at least one column
+        with open(self.path, 'r', newline='', encoding='utf-8') as file:
+            return max(len(next(csv.reader(file), [])), 1)
+
+    def get(self, range_name, value_render_option=None):
+        """
+        The values in an A1 range such as "A1:E500", as the formatted strings the Sheets API
+        renders by default (the file's text). Like the API, trailing empty cells and rows
+        are left out, and an empty range is [[]].
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        grid = a1_range_to_grid_range(range_name)
+        first_row, last_row = grid.get("startRowIndex", 0), grid["endRowIndex"]
+        first_col, last_col = grid.get("startColumnIndex", 0), grid.get("endColumnIndex")
+
+        rows = []
+        with open(self.path, 'r', newline='', encoding='utf-8') as file:
+            row_index = max(index for index in self._offsets if index <= first_row)
+            file.seek(self._offsets[row_index])
+            # readline() rather than iteration keeps file.tell() available
+            reader = csv.reader(iter(file.readline, ''))
+            for row in reader:
+                if row_index >= first_row:
+                    row = row[first_col:last_col]
+                    while row and row[-1] == "":
+                        row.pop()
+                    rows.append(row)
+                row_index += 1
+                if row_index == last_row:
+                    self._offsets[row_index] = file.tell()
+                    break
+
+        while rows and not rows[-1]:
+            rows.pop()
+        return rows or [[]]
+
+
+class LocalSpreadsheet:
+    """Mimics gspread.Spreadsheet backed by a directory of CSV files."""
+
+    def __init__(self, directory, latency=0.0):
+        self.directory = Path(directory)
+        self.latency = latency
+
+    def worksheet(self, title):
+        path = self.directory / f"{title}.csv"
+        if not path.exists():
+            raise WorksheetNotFound(title)
+        return LocalWorksheet(path, self.latency)
+
+    def worksheets(self):
+        return [LocalWorksheet(p, self.latency) for p in sorted(self.directory.glob("*.csv"))]
+
+    def get_lastUpdateTime(self):
+        """The newest modification time of any worksheet file, like the Drive API's modifiedTime."""
+        if self.latency:
+            time.sleep(self.latency)
+        mtimes = [p.stat().st_mtime for p in self.directory.glob("*.csv")]
+        modified = datetime.fromtimestamp(max(mtimes, default=0), timezone.utc)
+        return modified.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+class LocalClient:
+    """Mimics gspread.Client; every key opens the same local directory."""
+
+    def __init__(self, directory, latency=0.0):
+        self.directory = Path(directory)
+        self.latency = latency
+
+    def open_by_key(self, key):
+        return LocalSpreadsheet(self.directory, self.latency)
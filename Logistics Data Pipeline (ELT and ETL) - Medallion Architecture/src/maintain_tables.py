@@ -0,0 +1,184 @@
+import os
+import sys
+import json
+import argparse
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+
+from db import get_db_engine
+from run_metrics import current_run_id, track
+
+# --- 1. CONFIGURATION & INITIALIZATION ---
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+LOG_DIR = BASE_DIR / "logs"
+LOG_FILE = LOG_DIR / "table_maintenance.log"
+# One JSON record per table per run, with its row estimate and table and index sizes
+TABLE_SIZES_FILE = LOG_DIR / "table_sizes.jsonl"
+
+LOG_DIR.mkdir(exist_ok=True)
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.FileHandler(LOG_FILE),
+        logging.StreamHandler()
+    ]
+)
+
+load_dotenv()
+
+# Schemas whose tables later steps and the dashboard query; quarantine is only sized
+ANALYZED_SCHEMAS = ["bronze", "silver", "gold"]
+SIZED_SCHEMAS = ["bronze", "silver", "quarantine", "gold"]
+
+# "true" creates the multi-column statistics below before analyzing, so the planner knows
+# how many groups the monthly gold queries produce instead of multiplying per-column counts
+TABLE_EXTENDED_STATS = os.getenv("TABLE_EXTENDED_STATS", "false").lower() == "true"
+
+# Columns (or parenthesised expressions, matched as written in the gold SQL) that the
+# gold queries group on together
+EXTENDED_STATISTICS = {
+    ("silver", "Shipments"): [
+        "driver_id",
+        "vehicle_id",
+        "(EXTRACT(YEAR FROM dispatch_date))",
+        "(EXTRACT(MONTH FROM dispatch_date))",
+    ],
+    ("silver", "Orders"): [
+        "customer_id",
+        "(EXTRACT(YEAR FROM order_date))",
+        "(EXTRACT(MONTH FROM order_date))",
+    ],
+}
+
+# Tables created (never analyzed), changed since their last ANALYZE, or with extended
+# statistics that have not been built yet. A partition that needs it brings in its
+# partitioned table, as ANALYZE on the parent also analyzes every partition.
+STALE_TABLES_QUERY = text("""
+    WITH tables AS (
+        SELECT
+            c.oid,
+            n.nspname AS schema_name,
+            c.relname AS table_name,
+            COALESCE(pg_partition_root(c.oid), c.oid) AS root,
+            COALESCE(s.last_analyze, s.last_autoanalyze) IS NULL
+                OR s.n_mod_since_analyze > 0
+                OR EXISTS (
+                    SELECT 1
+                    FROM pg_statistic_ext e
+                    LEFT JOIN pg_statistic_ext_data d ON d.stxoid = e.oid
+                    WHERE e.stxrelid = c.oid AND d.stxoid IS NULL
+                ) AS stale
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+        WHERE n.nspname = ANY(:schemas) AND c.relkind IN ('r', 'p')
+    )
+    SELECT schema_name, table_name
+    FROM tables t
+    WHERE oid = root AND EXISTS (SELECT 1 FROM tables p WHERE p.root = t.root AND p.stale)
+    ORDER BY schema_name, table_name
+""")
+
+# Partitions are added up into their partitioned table
+TABLE_SIZES_QUERY = text("""
+    SELECT
+        n.nspname AS schema_name,
+        root.relname AS table_name,
+        SUM(GREATEST(c.reltuples, 0))::BIGINT AS row_estimate,
+        SUM(pg_table_size(c.oid))::BIGINT AS table_bytes,
+        SUM(pg_indexes_size(c.oid))::BIGINT AS index_bytes
+    FROM pg_class c
+    JOIN pg_class root ON root.oid = COALESCE(pg_partition_root(c.oid), c.oid)
+    JOIN pg_namespace n ON n.oid = root.relnamespace
+    WHERE n.nspname = ANY(:schemas) AND c.relkind IN ('r', 'p')
+    GROUP BY n.nspname, root.relname
+    ORDER BY n.nspname, root.relname
+""")
+
+
+# --- 2. MAINTENANCE FUNCTIONS ---
+
+
+def create_extended_statistics(engine):
+    """Creates the EXTENDED_STATISTICS objects on the tables that exist and lack them."""
+    with engine.begin() as connection:
+        for (schema, table_name), columns in EXTENDED_STATISTICS.items():
+            if connection.execute(text("SELECT to_regclass(:name)"), {"name": f'{schema}."{table_name}"'}).scalar() is None:
+                continue
+            # Dropped with the table, so a full rebuild needs them created again
+            connection.execute(text(
+                f'CREATE STATISTICS IF NOT EXISTS {schema}.{table_name.lower()}_grouping_stats '
+                f'(ndistinct, dependencies) ON {", ".join(columns)} FROM {schema}."{table_name}"'
+            ))
+
+
+def analyze_stale_tables(engine):
+    """ANALYZEs every table the last step created or changed. Returns their names."""
+    with engine.connect() as connection:
+        stale_tables = connection.execute(STALE_TABLES_QUERY, {"schemas": ANALYZED_SCHEMAS}).all()
+    if not stale_tables:
+        logging.info("All table statistics are current.")
+        return []
+
+    analyzed = []
+    for schema, table_name in stale_tables:
+        with track("maintenance", f"{schema}.{table_name}"), engine.begin() as connection:
+            connection.execute(text(f'ANALYZE {schema}."{table_name}";'))
+        analyzed.append(f"{schema}.{table_name}")
+    logging.info(f"Analyzed {len(analyzed)} table(s): {', '.join(analyzed)}")
+    return analyzed
+
+
+def record_table_sizes(engine):
+    """Appends the row estimate and table and index sizes of every medallion table to TABLE_SIZES_FILE."""
+    with engine.connect() as connection:
+        rows = connection.execute(TABLE_SIZES_QUERY, {"schemas": SIZED_SCHEMAS}).mappings().all()
+
+    recorded_at = datetime.now(timezone.utc).isoformat()
+    with open(TABLE_SIZES_FILE, 'a') as file:
+        for row in rows:
+            file.write(json.dumps({"run_id": current_run_id(), "recorded_at": recorded_at, **row}) + "\n")
+    total_bytes = sum(row["table_bytes"] + row["index_bytes"] for row in rows)
+    logging.info(f"Recorded the sizes of {len(rows)} tables ({total_bytes / 2**20:,.1f} MiB) in {TABLE_SIZES_FILE.name}.")
+
+
+# --- 3. MAIN ORCHESTRATOR ---
+
+
+def main(engine=None, record_sizes=True):
+    """
+    Refreshes the planner statistics of the tables the last step created or changed and,
+    if `record_sizes`, records every table's size. Returns True on success.
+    """
+    logging.info("=" * 50)
+    logging.info("=== Starting Table Maintenance ===")
+    try:
+        db_engine = engine or get_db_engine()
+        if TABLE_EXTENDED_STATS:
+            create_extended_statistics(db_engine)
+        analyze_stale_tables(db_engine)
+        if record_sizes:
+            record_table_sizes(db_engine)
+        return True
+    except Exception as e:
+        logging.critical(f"Table maintenance failed. Error: {e}")
+        return False
+    finally:
+        logging.info("=" * 50)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyzes new and changed tables and records table sizes.")
+    parser.add_argument(
+        "--record-sizes", action=argparse.BooleanOptionalAction, default=True,
+        help=f"append every table's size to {TABLE_SIZES_FILE.name}"
+    )
+    args = parser.parse_args()
+    sys.exit(0 if main(record_sizes=args.record_sizes) else 1)
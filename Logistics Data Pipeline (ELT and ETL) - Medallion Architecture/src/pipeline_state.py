@@ -0,0 +1,33 @@
+import os
+import json
+from pathlib import Path
+
+# --- Configuration ---
+BASE_DIR = Path(__file__).resolve().parent.parent
+CONFIG_DIR = BASE_DIR / "config"
+# Where the watermarks and the change manifest live; src/benchmark.py uses a directory of its own
+STATE_DIR = Path(os.getenv("PIPELINE_STATE_DIR", CONFIG_DIR))
+PIPELINE_STATE_FILE = STATE_DIR / "pipeline_state.json"
+# Silver watermarks plus the gold months those incremental builds have touched
+SILVER_STATE_FILE = STATE_DIR / "silver_state.json"
+
+
+def read_state(path=PIPELINE_STATE_FILE):
+    """Reads a JSON state file, returning an empty dict if it does not exist yet."""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, 'r') as file:
+        return json.load(file)
+
+
+def write_state(state, path=PIPELINE_STATE_FILE):
+    """Atomically replaces a JSON state file (write to a temp file, then rename)."""
+    path = Path(path)
+    path.parent.mkdir(exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, 'w') as file:
+        json.dump(state, file, indent=4)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
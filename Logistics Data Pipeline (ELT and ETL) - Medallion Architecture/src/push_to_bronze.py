@@ -2,23 +2,37 @@
 # -*- coding: utf-8 -*-
 
 import os
+import sys
 import hashlib
 import logging
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 import pandas as pd
 import gspread
+from gspread.utils import ValueRenderOption, numericise_all, rowcol_to_a1
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
-from sqlalchemy.exc import OperationalError
+from sqlalchemy import inspect, text
 from google.oauth2.service_account import Credentials
 
+from bronze_loader import (
+    BATCH_ID_COLUMN, ROW_HASH_COLUMN, load_csv, has_data_rows, landing_path, write_landing_file
+)
+from bronze_normalize import NORMALIZED_COLUMNS, NORMALIZERS, add_normalized_columns_sql
+from change_manifest import read_manifest, write_manifest, chain_version, is_unchanged
+from db import get_db_engine
+from local_sheets import LocalClient
+from pipeline_state import read_state, write_state
+from run_metrics import track
+from sheets_api import RateLimiter, call_with_retry
+
 # --- 1. CONFIGURATION & INITIALIZATION ---
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 LOG_DIR = BASE_DIR / "logs"
 BRONZE_INPUTS_DIR = BASE_DIR / "bronze_inputs"
 CONFIG_DIR = BASE_DIR / "config"
+LOG_FILE = LOG_DIR / "etl_bronze.log"
 
 LOG_DIR.mkdir(exist_ok=True)
 BRONZE_INPUTS_DIR.mkdir(exist_ok=True)
@@ -28,38 +42,69 @@ logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(levelname)s - %(message)s",
     handlers=[
-        logging.FileHandler(LOG_DIR / "etl_bronze.log"),
+        logging.FileHandler(LOG_FILE),
         logging.StreamHandler()
     ]
 )
 
 load_dotenv()
-DB_USER = os.getenv("POSTGRES_USER")
-DB_PASSWORD = os.getenv("POSTGRES_PASSWORD")
-DB_HOST = os.getenv("POSTGRES_HOST")
-DB_PORT = os.getenv("POSTGRES_PORT", "5432")
-DB_NAME = os.getenv("POSTGRES_DB")
 
 SHEET_ID = os.getenv("GSPREAD_SHEET_ID")  # prefer sheet ID
 CREDENTIALS_PATH = CONFIG_DIR / "capstone-467705-3c3a1f211475.json"
 
-TABLE_NAMES = ["Customers", "Orders", "Shipments", "Drivers", "Vehicles"]
+# Offline mode: read worksheets from CSVs in this directory instead of Google Sheets
+GSPREAD_LOCAL_DIR = os.getenv("GSPREAD_LOCAL_DIR")
+LOCAL_SHEETS_LATENCY_SECONDS = float(os.getenv("LOCAL_SHEETS_LATENCY_SECONDS", "0"))
 
-# --- 2. HELPER FUNCTIONS ---
+# Worksheets fetched concurrently (1 = sequential), the per-user Sheets read
+# quota to stay under, and retries with exponential backoff per table.
+EXTRACT_WORKERS = int(os.getenv("EXTRACT_WORKERS", "1"))
+SHEETS_REQUESTS_PER_MINUTE = int(os.getenv("SHEETS_REQUESTS_PER_MINUTE", "60"))
+SHEETS_MAX_RETRIES = int(os.getenv("SHEETS_MAX_RETRIES", "5"))
 
+# Worksheets are read in A1 ranges of this many rows, each written to the landing file
+# before the next is read, so memory stays bounded by one batch. Every batch is one read
+# against SHEETS_REQUESTS_PER_MINUTE. 0 reads each worksheet whole with get_all_records().
+SHEETS_BATCH_ROWS = int(os.getenv("SHEETS_BATCH_ROWS", "50000"))
 
-def get_db_engine():
-    """Create SQLAlchemy engine for PostgreSQL."""
-    try:
-        engine = create_engine(
-            f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-        )
-        with engine.connect():
-            logging.info("Connected to PostgreSQL database.")
-        return engine
-    except OperationalError as e:
-        logging.error(f"DB connection failed: {e}")
-        raise
+# "true" parses Orders dates and amounts once per batch at extraction and lands them as
+# order_date_parsed and order_total_num, so silver builds skip the regex parsing.
+BRONZE_NORMALIZE = os.getenv("BRONZE_NORMALIZE", "false").lower() == "true"
+
+TABLE_NAMES = ["Customers", "Orders", "Shipments", "Drivers", "Vehicles"]
+
+# "full" replaces every bronze table; "incremental" appends only rows not older than
+# the high-water marks kept in config/pipeline_state.json.
+LOAD_MODE = os.getenv("BRONZE_LOAD_MODE", "full").lower()
+
+# Column that carries the high-water mark for each append-only table.
+# Tables without an entry (Drivers, Vehicles) are always fully replaced.
+WATERMARK_COLUMNS = {
+    "Customers": "signup_date",
+    "Orders": "order_date",
+    "Shipments": "dispatch_date",
+}
+WATERMARK_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+# Rows the watermark alone cannot place: those stamped exactly at the mark (more can be added
+# for the same day later) and those whose watermark column does not parse. Fingerprints of
+# the ones already appended are kept under this key of the state file, next to the marks.
+SEEN_ROWS_KEY = "_seen_rows"
+
+# "copy" streams CSVs with COPY FROM STDIN (falls back to chunked inserts when the
+# driver has no COPY support); "chunked" forces the batched INSERT path.
+BRONZE_LOADER = os.getenv("BRONZE_LOADER", "copy").lower()
+
+# "true" creates replaced bronze tables UNLOGGED (COPY loader only), so loading them writes
+# no WAL and nothing for replicas to replay. Bronze is rebuilt from the landing files, so
+# tables a crash empties are reloaded on the next run. Tables appended to incrementally
+# keep history the landing files don't have, and stay logged.
+BRONZE_UNLOGGED = os.getenv("BRONZE_UNLOGGED", "false").lower() == "true"
+
+# Format of the extracted files in bronze_inputs/: "csv" or "parquet" (requires pyarrow)
+LANDING_FORMAT = os.getenv("LANDING_FORMAT", "csv").lower()
+
+# --- 2. HELPER FUNCTIONS ---
 
 
 def create_bronze_schema(engine):
@@ -69,6 +114,32 @@ def create_bronze_schema(engine):
         logging.info("Schema 'bronze' exists or created.")
 
 
+def emptied_unlogged_tables(engine):
+    """Unlogged bronze tables with no data, as crash recovery leaves them."""
+    if engine.dialect.name != "postgresql":
+        return set()
+    query = text("""
+        SELECT c.relname
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = 'bronze' AND c.relkind = 'r'
+            AND c.relpersistence = 'u' AND pg_relation_size(c.oid) = 0
+    """)
+    with engine.connect() as conn:
+        return set(conn.execute(query).scalars())
+
+
+def tables_without_lineage(engine):
+    """Bronze tables loaded before rows carried a batch id and row hash, which silver reads."""
+    inspector = inspect(engine)
+    return {
+        table_name
+        for table_name in set(TABLE_NAMES) & set(inspector.get_table_names(schema="bronze"))
+        if not {BATCH_ID_COLUMN, ROW_HASH_COLUMN}
+        <= {column["name"] for column in inspector.get_columns(table_name, schema="bronze")}
+    }
+
+
 def calculate_checksum(file_path: Path) -> str:
     sha256 = hashlib.sha256()
     with open(file_path, "rb") as f:
@@ -78,7 +149,11 @@ def calculate_checksum(file_path: Path) -> str:
 
 
 def build_gspread_client():
-    """Build a gspread client with service account credentials."""
+    """Build a gspread client with service account credentials (or the local stand-in)."""
+    if GSPREAD_LOCAL_DIR:
+        logging.info(f"Using local worksheets from {GSPREAD_LOCAL_DIR}.")
+        return LocalClient(GSPREAD_LOCAL_DIR, latency=LOCAL_SHEETS_LATENCY_SECONDS)
+
     scopes = [
         "https://www.googleapis.com/auth/spreadsheets.readonly",
         "https://www.googleapis.com/auth/drive.readonly"
@@ -95,88 +170,343 @@ def build_gspread_client():
 
 def open_spreadsheet(gc):
     """Open spreadsheet by ID """
+    if GSPREAD_LOCAL_DIR:
+        return gc.open_by_key(SHEET_ID)
     if not SHEET_ID:
         raise ValueError("Set GSPREAD_SHEET_ID in .env")
     logging.info(f"Opening Google Sheet by ID.")
     return gc.open_by_key(SHEET_ID)
 
 
+def source_fingerprint():
+    """
+    A cheap fingerprint of the source spreadsheet: its last modification time from the
+    Drive API (one request, no cell data). It changes whenever any worksheet is edited.
+    """
+    spreadsheet = open_spreadsheet(build_gspread_client())
+    limiter = RateLimiter(SHEETS_REQUESTS_PER_MINUTE, period=60.0)
+    return call_with_retry(
+        spreadsheet.get_lastUpdateTime,
+        limiter=limiter, max_retries=SHEETS_MAX_RETRIES, description="get_lastUpdateTime()"
+    )
+
+
+def is_incremental(table_name, watermarks):
+    """A table is appended incrementally only if it has a watermark column and a stored mark."""
+    return (
+        LOAD_MODE == "incremental"
+        and table_name in WATERMARK_COLUMNS
+        and table_name in watermarks
+    )
+
+
+def row_fingerprints(df):
+    """A 64-bit hash of each row's values, as hex strings."""
+    hashes = pd.util.hash_pandas_object(df.astype(str), index=False)
+    return hashes.map(lambda h: format(h, "016x"))
+
+
+def filter_new_rows(df, table_name, watermark, seen_rows=()):
+    """
+    Keeps the rows newer than the stored mark, plus the rows at the mark or with an
+    unparseable watermark column whose fingerprint is not in `seen_rows`.
+    Returns the filtered frame, its high-water mark (None if no rows are new) and the
+    fingerprints of its rows at that mark or without one, each mapped to its mark (or None).
+    """
+    column = WATERMARK_COLUMNS[table_name]
+    parsed = pd.to_datetime(df[column].astype(str), errors="coerce", format="mixed")
+    watermark = pd.Timestamp(watermark)
+    # Only rows that can be rechecked or become the new mark's rows need a fingerprint
+    recheck = parsed.isna() | (parsed == watermark)
+    fingerprints = row_fingerprints(df[recheck | (parsed == parsed.max())]).reindex(df.index)
+
+    mask = (parsed > watermark) | (recheck & ~fingerprints.isin(seen_rows))
+    unparseable = int((parsed.isna() & mask).sum())
+    if unparseable:
+        logging.warning(
+            f"'{table_name}': {unparseable} new rows have an unparseable {column}; "
+            f"they are loaded but do not move the watermark."
+        )
+    if not mask.any():
+        return df.iloc[0:0], None, {}
+
+    stamps = parsed[mask]
+    newest = stamps.max()
+    mark = (watermark if pd.isna(newest) else newest).strftime(WATERMARK_FORMAT)
+    kept = stamps.isna() | (stamps == newest)
+    seen = {
+        fingerprint: None if pd.isna(stamp) else mark
+        for fingerprint, stamp in zip(fingerprints[mask][kept], stamps[kept])
+    }
+    return df[mask], mark, seen
+
+
+def advance_watermarks(pending_watermarks, loaded_tables):
+    """
+    Persists new high-water marks, with the fingerprints of the rows at them, for the tables
+    that were loaded successfully. `pending_watermarks` maps tables to (mark, seen rows).
+    """
+    advanced = {t: pending for t, pending in pending_watermarks.items() if t in loaded_tables}
+    if not advanced:
+        logging.info("No watermarks to advance.")
+        return
+
+    state = read_state()
+    seen_rows = state.setdefault(SEEN_ROWS_KEY, {})
+    for table_name, (mark, seen) in advanced.items():
+        state[table_name] = mark
+        seen_rows[table_name] = seen
+    write_state(state)
+    for table_name, (mark, _) in advanced.items():
+        logging.info(f"Advanced watermark for '{table_name}' to {mark}")
+
+
+def read_worksheet_batches(ws, table_name, limiter):
+    """
+    Reads a worksheet in A1 ranges of SHEETS_BATCH_ROWS rows and yields each one as a
+    DataFrame with the header row's columns, as get_all_records() would return them: the
+    formatted values, with numbers numericised to ints and floats.
+    The Sheets API leaves out trailing empty cells and rows, so rows are padded to the
+    header, and blank rows are only kept when data follows them. Yields at least one frame.
+    """
+    last_column = rowcol_to_a1(1, ws.col_count).rstrip("0123456789")
+    header = None
+    blank_rows = 0
+    yielded = False
+
+    for start in range(1, ws.row_count + 1, SHEETS_BATCH_ROWS):
+        end = min(start + SHEETS_BATCH_ROWS - 1, ws.row_count)
+        a1_range = f"A{start}:{last_column}{end}"
+        rows = list(call_with_retry(
+            ws.get, a1_range, value_render_option=ValueRenderOption.formatted,
+            limiter=limiter, max_retries=SHEETS_MAX_RETRIES, description=f"get('{table_name}'!{a1_range})"
+        ))
+        if rows == [[]]:
+            rows = []
+        expected = end - start + 1
+        if header is None:
+            if not rows or not rows[0]:
+                # No header row: an empty worksheet, as get_all_records() sees it
+                break
+            header, rows = rows[0], rows[1:]
+            expected -= 1
+        if not rows:
+            blank_rows += expected
+            continue
+
+        width = len(header)
+        batch = [[""] * width for _ in range(blank_rows)] + [
+            numericise_all((row + [""] * width)[:width]) for row in rows
+        ]
+        blank_rows = expected - len(rows)
+        yield pd.DataFrame(batch, columns=header)
+        yielded = True
+
+    if not yielded:
+        yield pd.DataFrame(columns=header or [])
+
+
 # --- 3. ETL CORE FUNCTIONS ---
 
 
+def extract_table(spreadsheet, table_name, watermarks, limiter):
+    """
+    Extracts one worksheet to a landing file (CSV or Parquet), streaming it in batches of
+    SHEETS_BATCH_ROWS rows. Every Sheets API call goes through the shared rate limiter and
+    is retried with backoff on quota or transient errors. With BRONZE_NORMALIZE, each batch
+    also gets the table's normalized columns.
+    Returns the file checksum and the pending (watermark, seen rows), or None.
+    """
+    marks = []
+    # Rows at the stored mark or without one that earlier runs appended, and those added now
+    seen = dict(watermarks.get(SEEN_ROWS_KEY, {}).get(table_name, {}))
+    appended = set(seen)
+    with track("bronze_extract", table_name) as metric:
+        ws = call_with_retry(
+            spreadsheet.worksheet, table_name,
+            limiter=limiter, max_retries=SHEETS_MAX_RETRIES, description=f"worksheet('{table_name}')"
+        )
+        if SHEETS_BATCH_ROWS > 0:
+            frames = read_worksheet_batches(ws, table_name, limiter)
+        else:
+            records = call_with_retry(
+                ws.get_all_records,
+                limiter=limiter, max_retries=SHEETS_MAX_RETRIES, description=f"get_all_records('{table_name}')"
+            )
+            frames = [pd.DataFrame(records)]
+
+        def new_rows(frames):
+            """Counts the rows read and, in incremental mode, keeps only those past the watermark."""
+            metric["rows_read"] = 0
+            for df in frames:
+                metric["rows_read"] += len(df)
+                mark = None
+                if is_incremental(table_name, watermarks):
+                    df, mark, batch_seen = filter_new_rows(df, table_name, watermarks[table_name], appended)
+                elif LOAD_MODE == "incremental" and table_name in WATERMARK_COLUMNS and len(df):
+                    # First incremental run for this table: full load, then start tracking
+                    _, mark, batch_seen = filter_new_rows(df, table_name, pd.Timestamp.min)
+                if mark:
+                    marks.append(mark)
+                    seen.update(batch_seen)
+                if BRONZE_NORMALIZE and table_name in NORMALIZERS:
+                    df = NORMALIZERS[table_name](df)
+                yield df
+
+        output_path = landing_path(BRONZE_INPUTS_DIR, table_name, LANDING_FORMAT)
+        row_count = write_landing_file(new_rows(frames), output_path)
+        checksum = calculate_checksum(output_path)
+        metric["rows_written"] = row_count
+        metric["bytes"] = output_path.stat().st_size
+
+    logging.info(
+        f"Extracted '{table_name}' → {output_path.name}, rows: {row_count}, checksum: {checksum[:8]}..."
+    )
+    if not marks:
+        return checksum, None
+    # WATERMARK_FORMAT timestamps sort as strings. Rows at an older mark are past it now.
+    mark = max(marks)
+    return checksum, (mark, {f: m for f, m in seen.items() if m is None or m == mark})
+
+
 def extract_from_gsheets():
-    """Extract all tables from Google Sheets to CSVs."""
-    logging.info("--- Starting EXTRACT step ---")
+    """
+    Extract all tables from Google Sheets to landing files, concurrently when EXTRACT_WORKERS > 1.
+    In incremental mode only rows not appended yet are written (see filter_new_rows).
+    Returns the new watermarks, which are persisted only after a successful load, and
+    the tables extracted successfully, the only ones the load may pick up.
+    """
+    logging.info(f"--- Starting EXTRACT step (mode: {LOAD_MODE}, workers: {EXTRACT_WORKERS}) ---")
+    watermarks = read_state() if LOAD_MODE == "incremental" else {}
+    pending_watermarks = {}
+    extracted_tables = set()
+    manifest = read_manifest()
+    limiter = RateLimiter(SHEETS_REQUESTS_PER_MINUTE, period=60.0)
     try:
         gc = build_gspread_client()
         spreadsheet = open_spreadsheet(gc)
 
-        for table_name in TABLE_NAMES:
-            try:
-                ws = spreadsheet.worksheet(table_name)
-                df = pd.DataFrame(ws.get_all_records())
-
-                output_path = BRONZE_INPUTS_DIR / f"{table_name}.csv"
-                df.to_csv(output_path, index=False)
-                checksum = calculate_checksum(output_path)
-
-                logging.info(
-                    f"Extracted '{table_name}' → CSV, rows: {len(df)}, checksum: {checksum[:8]}..."
-                )
-            except gspread.WorksheetNotFound:
-                logging.error(f"Worksheet '{table_name}' not found.")
-            except Exception as e:
-                logging.error(f"Failed to extract '{table_name}': {e}")
-
+        with ThreadPoolExecutor(max_workers=max(EXTRACT_WORKERS, 1)) as executor:
+            futures = {
+                table_name: executor.submit(extract_table, spreadsheet, table_name, watermarks, limiter)
+                for table_name in TABLE_NAMES
+            }
+            for table_name, future in futures.items():
+                try:
+                    checksum, pending = future.result()
+                    manifest["extracted"][table_name] = checksum
+                    extracted_tables.add(table_name)
+                    if pending:
+                        pending_watermarks[table_name] = pending
+                except gspread.WorksheetNotFound:
+                    logging.error(f"Worksheet '{table_name}' not found.")
+                except Exception as e:
+                    logging.error(f"Failed to extract '{table_name}': {e}")
+
+        write_manifest(manifest)
         logging.info("--- EXTRACT completed ---")
+        return pending_watermarks, extracted_tables
     except Exception as e:
         logging.error(f"Extraction failed: {e}")
         raise
 
 
-def load_to_bronze(engine):
-    """Load CSVs into bronze schema using replace strategy."""
+def load_to_bronze(engine, table_names=TABLE_NAMES):
+    """
+    Load the landing files (CSV or Parquet, per LANDING_FORMAT) of `table_names` into bronze
+    schema. The pipeline passes only the tables extracted in this run, so a file left by an
+    earlier run (e.g. the last incremental delta) is never loaded twice.
+    Tables are replaced, except in incremental mode where tables with a stored
+    watermark are appended to. A replaced table whose
+    file checksum matches the last loaded one is skipped when SKIP_UNCHANGED_TABLES is set,
+    unless it is an UNLOGGED table a crash has emptied or lacks the lineage columns.
+    Appends without new rows are skipped unless the table lacks the lineage columns.
+    Returns the names of the tables that were loaded successfully.
+    """
     logging.info("--- Starting LOAD step ---")
     create_bronze_schema(engine)
+    watermarks = read_state() if LOAD_MODE == "incremental" else {}
+    manifest = read_manifest()
+    loaded_tables = set()
+    # Loaded even when unchanged: UNLOGGED tables a crash emptied, and tables silver cannot read yet
+    reload_tables = emptied_unlogged_tables(engine) | tables_without_lineage(engine)
 
     for table_name in TABLE_NAMES:
-        csv_path = BRONZE_INPUTS_DIR / f"{table_name}.csv"
+        if table_name not in table_names:
+            logging.warning(f"'{table_name}' was not extracted in this run. Skipping.")
+            continue
+        csv_path = landing_path(BRONZE_INPUTS_DIR, table_name, LANDING_FORMAT)
         if not csv_path.exists():
-            logging.warning(f"CSV for '{table_name}' not found. Skipping.")
+            logging.warning(f"{csv_path.name} for '{table_name}' not found. Skipping.")
             continue
 
+        if_exists = "append" if is_incremental(table_name, watermarks) else "replace"
+        checksum = manifest["extracted"].get(table_name)
         try:
-            df = pd.read_csv(csv_path, dtype=str)
-            df.to_sql(
-                name=table_name,
-                con=engine,
-                schema="bronze",
-                if_exists="replace",
-                index=False
+            if if_exists == "append" and table_name not in reload_tables and not has_data_rows(csv_path):
+                logging.info(f"No new rows for bronze.{table_name}. Skipping.")
+                continue
+            if (
+                if_exists == "replace" and table_name not in reload_tables
+                and is_unchanged(manifest, "bronze", table_name, checksum)
+            ):
+                logging.info(f"bronze.{table_name} is unchanged since the last load. Skipping.")
+                continue
+            with track("bronze_load", table_name) as metric:
+                row_count = load_csv(
+                    engine,
+                    csv_path,
+                    table_name,
+                    schema="bronze",
+                    if_exists=if_exists,
+                    loader=BRONZE_LOADER,
+                    unlogged=BRONZE_UNLOGGED and (LOAD_MODE == "full" or table_name not in WATERMARK_COLUMNS)
+                )
+                metric["rows_written"] = row_count
+                metric["bytes"] = csv_path.stat().st_size
+            loaded_tables.add(table_name)
+            manifest["bronze"][table_name] = (
+                checksum if if_exists == "replace"
+                else chain_version(manifest["bronze"].get(table_name), checksum)
             )
-            logging.info(f"Loaded {len(df)} rows into bronze.{table_name}")
+            write_manifest(manifest)
+            logging.info(f"Loaded {row_count} rows into bronze.{table_name} ({if_exists})")
         except Exception as e:
             logging.error(f"Failed to load '{table_name}': {e}")
 
+    # Landing files without the normalized columns load without them; silver reads them anyway
+    with engine.begin() as conn:
+        for table_name in NORMALIZED_COLUMNS:
+            for statement in add_normalized_columns_sql(table_name):
+                conn.execute(text(statement))
     logging.info("--- LOAD completed ---")
+    return loaded_tables
 
 
 # --- 4. MAIN ORCHESTRATOR ---
 
 
-def main():
+def main(engine=None):
+    """
+    Runs extraction and the bronze load. Reuses `engine` when the caller (e.g. the
+    in-process runner in etl.py) passes one. Returns True on success.
+    """
     logging.info("=" * 50)
-    logging.info("=== Starting Bronze Layer Full Refresh Pipeline Run ===")
+    logging.info(f"=== Starting Bronze Layer Pipeline Run (mode: {LOAD_MODE}, landing: {LANDING_FORMAT}) ===")
     try:
-        extract_from_gsheets()
-        engine = get_db_engine()
-        load_to_bronze(engine)
+        pending_watermarks, extracted_tables = extract_from_gsheets()
+        engine = engine or get_db_engine()
+        loaded_tables = load_to_bronze(engine, extracted_tables)
+        if LOAD_MODE == "incremental":
+            advance_watermarks(pending_watermarks, loaded_tables)
         logging.info("Pipeline finished successfully.")
+        return True
     except Exception as e:
         logging.critical(f"Pipeline failed: {e}")
+        return False
     finally:
         logging.info("=" * 50)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(0 if main() else 1)
@@ -1,9 +1,18 @@
 import os
+import sys
 import logging
+import threading
 from pathlib import Path
+from datetime import datetime
 from dotenv import load_dotenv
-from sqlalchemy import create_engine, text
-from sqlalchemy.exc import OperationalError
+from sqlalchemy import text
+
+from change_manifest import read_manifest, record_version, script_fingerprint, is_unchanged
+from dag_executor import build_dependency_graph, run_dag
+from db import get_db_engine
+from pipeline_state import SILVER_STATE_FILE, read_state, write_state
+from run_metrics import track, note
+from sql_utils import without_partitioning
 
 # --- 1. CONFIGURATION & INITIALIZATION ---
 
@@ -11,6 +20,9 @@ from sqlalchemy.exc import OperationalError
 BASE_DIR = Path(__file__).resolve().parent.parent
 LOG_DIR = BASE_DIR / "logs"
 SQL_DIR = BASE_DIR / "sql"
+INCREMENTAL_SQL_DIR = SQL_DIR / "incremental"
+HISTORY_SQL_DIR = SQL_DIR / "history"
+LOG_FILE = LOG_DIR / "silver_build.log"
 
 # Create necessary directories
 LOG_DIR.mkdir(exist_ok=True)
@@ -20,66 +32,156 @@ logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler(LOG_DIR / "silver_build.log"),  # Dedicated log file
+        logging.FileHandler(LOG_FILE),  # Dedicated log file
         logging.StreamHandler()
     ]
 )
 
 # Load environment variables
 load_dotenv()
-DB_USER = os.getenv("POSTGRES_USER")
-DB_PASSWORD = os.getenv("POSTGRES_PASSWORD")
-DB_HOST = os.getenv("POSTGRES_HOST")
-DB_PORT = os.getenv("POSTGRES_PORT")
-DB_NAME = os.getenv("POSTGRES_DB")
 
+# Independent silver tables are built concurrently, up to this many at a time
+SQL_MAX_WORKERS = int(os.getenv("SQL_MAX_WORKERS", "4"))
 
-# --- 2. HELPER FUNCTIONS ---
+# "full" rebuilds every table with DROP/CREATE TABLE AS; "incremental" upserts only the
+# bronze rows loaded since the last build (keyed on the primary keys from add_constraints).
+SILVER_BUILD_MODE = os.getenv("SILVER_BUILD_MODE", "full").lower()
 
-def get_db_engine():
-    """Creates and returns a SQLAlchemy engine for PostgreSQL."""
-    try:
-        engine = create_engine(
-            f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# "true" range-partitions these tables by month (see silver_partitions.sql), so month-bounded
+# queries only scan the months they need. Their primary keys then include the partition column,
+# and Shipments gets no foreign key to Orders. Copies built with the other layout are rebuilt
+# in full instead of merged.
+SILVER_PARTITIONING = os.getenv("SILVER_PARTITIONING", "false").lower() == "true"
+PARTITIONED_TABLES = {"Orders", "Shipments"}
+
+# Tables whose merges skip unchanged bronze rows by their _row_hash. Copies built before
+# the column was added are rebuilt in full instead of merged.
+ROW_HASH_TABLES = {"Customers", "Drivers", "Vehicles"}
+
+# "true" keeps a type 2 history of these dimensions in silver."<Table>_History" (valid_from,
+# valid_to, is_current), updated with small appends after each build (sql/history/).
+SILVER_HISTORY = os.getenv("SILVER_HISTORY", "false").lower() == "true"
+HISTORY_TABLES = {"Customers", "Drivers", "Vehicles"}
+
+# Serialises silver_state.json updates from concurrently built tables
+_state_lock = threading.Lock()
+
+# Views over silver (e.g. the GOLD_PUBLISH_MODE=matview gold tables) are dropped with the
+# silver table a full build replaces, and recreated in the same transaction
+VIEW_TYPES = {"v": "VIEW", "m": "MATERIALIZED VIEW"}
+# Transaction-level advisory lock taken by full builds that recreate views: those read other
+# silver tables, which concurrent builds hold exclusively, so they must not run at once
+VIEW_REBUILD_LOCK_KEY = 7_283_401
+
+
+# --- 2. SILVER LAYER CORE FUNCTIONS ---
+
+def read_silver_script(filepath):
+    """Reads a silver build script, without its month partitioning unless SILVER_PARTITIONING is set."""
+    sql_script = Path(filepath).read_text()
+    return sql_script if SILVER_PARTITIONING else without_partitioning(sql_script)
+
+
+def has_dependent_views(connection, table_name_cased):
+    """True if views are built on silver."<table_name_cased>". Reads the catalog only, without locking them."""
+    query = text("""
+        SELECT EXISTS (
+            SELECT 1
+            FROM pg_depend d
+            JOIN pg_rewrite rw ON rw.oid = d.objid
+            WHERE d.classid = 'pg_rewrite'::regclass AND d.refobjid = to_regclass(:table_name)
+                AND rw.ev_class <> d.refobjid
         )
-        with engine.connect():
-            logging.info("Successfully connected to the PostgreSQL database.")
-        return engine
-    except OperationalError as e:
-        logging.error(f"Could not connect to the database. Error: {e}")
-        raise
+    """)
+    return connection.execute(query, {"table_name": f'silver."{table_name_cased}"'}).scalar()
 
 
-# --- 3. SILVER LAYER CORE FUNCTIONS ---
+def dependent_views(connection, table_name_cased):
+    """
+    The views and materialized views built (directly or through other views) on
+    silver."<table_name_cased>", in creation order, with their definition, indexes and comment.
+    """
+    query = text("""
+        WITH RECURSIVE dependents AS (
+            SELECT rw.ev_class AS oid, 1 AS depth
+            FROM pg_depend d
+            JOIN pg_rewrite rw ON rw.oid = d.objid
+            WHERE d.classid = 'pg_rewrite'::regclass AND d.refobjid = to_regclass(:table_name)
+                AND rw.ev_class <> d.refobjid
+            UNION
+            SELECT rw.ev_class, dependents.depth + 1
+            FROM dependents
+            JOIN pg_depend d ON d.refobjid = dependents.oid AND d.classid = 'pg_rewrite'::regclass
+            JOIN pg_rewrite rw ON rw.oid = d.objid
+            WHERE rw.ev_class <> dependents.oid
+        )
+        SELECT
+            n.nspname AS schema_name,
+            c.relname AS view_name,
+            c.relkind AS kind,
+            pg_get_viewdef(c.oid) AS definition,
+            ARRAY(SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i WHERE i.indrelid = c.oid) AS indexes,
+            obj_description(c.oid, 'pg_class') AS comment
+        FROM dependents
+        JOIN pg_class c ON c.oid = dependents.oid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE c.relkind IN ('v', 'm')
+        GROUP BY c.oid, n.nspname, c.relname, c.relkind
+        ORDER BY MAX(dependents.depth), n.nspname, c.relname
+    """)
+    return connection.execute(query, {"table_name": f'silver."{table_name_cased}"'}).mappings().all()
+
+
+def recreate_views(connection, views):
+    """Recreates views dropped along with a rebuilt silver table, from dependent_views()."""
+    for view in views:
+        target = f'"{view["schema_name"]}"."{view["view_name"]}"'
+        if connection.execute(text("SELECT to_regclass(:name)"), {"name": target}).scalar() is not None:
+            continue
+        connection.execute(text(f'CREATE {VIEW_TYPES[view["kind"]]} {target} AS {view["definition"].rstrip().rstrip(";")}'))
+        for index_definition in view["indexes"]:
+            connection.execute(text(index_definition))
+        if view["comment"] is not None:
+            comment = view["comment"].replace("'", "''")
+            connection.execute(text(f"COMMENT ON {VIEW_TYPES[view['kind']]} {target} IS '{comment}'"))
+        logging.info(f"    - Recreated {view['schema_name']}.{view['view_name']}.")
+
 
 def execute_sql_from_file(engine, filepath, table_name_lower):
-    """Executes a SQL script and logs row counts for DQ checks."""
+    """
+    Executes a SQL script and logs row counts for DQ checks. The script writes rejected
+    rows to quarantine."<Table>" in the same scan, and returns the counts itself.
+    Views built on the table, which the script's DROP TABLE ... CASCADE removes, are
+    recreated before the transaction commits, so readers never find them missing.
+    """
     table_name_cased = table_name_lower.capitalize()
     logging.info(f"  - Building silver table: {table_name_cased}...")
     try:
-        with open(filepath, 'r') as file:
-            sql_script = file.read()
-
-        with engine.connect() as connection:
-            # Get count from bronze table before transformation
-            bronze_count_query = f'SELECT COUNT(*) FROM bronze."{table_name_cased}";'
-            bronze_count = connection.execute(text(bronze_count_query)).scalar()
+        sql_script = read_silver_script(filepath)
 
+        with engine.begin() as connection:
             # Execute the main silver build script
             connection.execute(text("CREATE SCHEMA IF NOT EXISTS silver;"))
-            connection.execute(text(sql_script))
-
-
-            # Get count from silver table after transformation
-            silver_count_query = f'SELECT COUNT(*) FROM silver."{table_name_cased}";'
-            silver_count = connection.execute(text(silver_count_query)).scalar()
+            views = []
+            if has_dependent_views(connection, table_name_cased):
+                # Reading the view definitions locks the views, so only under the lock
+                connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": VIEW_REBUILD_LOCK_KEY})
+                views = dependent_views(connection, table_name_cased)
+            silver_count, rows_rejected, rejection_reasons = connection.execute(text(sql_script)).one()
+            if SILVER_PARTITIONING and table_name_cased in PARTITIONED_TABLES:
+                # Autovacuum never analyzes a partitioned table itself, only its partitions, so the
+                # statistics the gold joins are planned with are gathered here
+                connection.execute(text(f'ANALYZE silver."{table_name_cased}";'))
+            recreate_views(connection, views)
 
             # Data Quality Check Logging
-            rows_rejected = bronze_count - silver_count
+            bronze_count = silver_count + rows_rejected
+            note(rows_read=bronze_count, rows_written=silver_count)
+            reasons = ", ".join(f"{reason}: {count}" for reason, count in sorted((rejection_reasons or {}).items()))
             logging.info(
                 f"    - DQ Check for {table_name_cased}: "
                 f"Bronze rows: {bronze_count}, Silver rows: {silver_count}, "
-                f"Rejected rows: {rows_rejected}"
+                f"Rejected rows: {rows_rejected}" + (f" ({reasons})" if reasons else "")
             )
 
     except Exception as e:
@@ -87,13 +189,134 @@ def execute_sql_from_file(engine, filepath, table_name_lower):
         raise
 
 
+def has_primary_key(engine, table_name_cased):
+    """True if the silver table exists and already carries its primary key."""
+    query = text("""
+        SELECT 1
+        FROM pg_constraint con
+        JOIN pg_class rel ON rel.oid = con.conrelid
+        JOIN pg_namespace nsp ON nsp.oid = rel.relnamespace
+        WHERE nsp.nspname = 'silver' AND rel.relname = :table_name AND con.contype = 'p'
+    """)
+    with engine.connect() as connection:
+        return connection.execute(query, {"table_name": table_name_cased}).scalar() is not None
+
+
+def is_partitioned(engine, table_name_cased):
+    """True if the silver table exists and is a partitioned table."""
+    query = text("""
+        SELECT 1
+        FROM pg_class rel
+        JOIN pg_namespace nsp ON nsp.oid = rel.relnamespace
+        WHERE nsp.nspname = 'silver' AND rel.relname = :table_name AND rel.relkind = 'p'
+    """)
+    with engine.connect() as connection:
+        return connection.execute(query, {"table_name": table_name_cased}).scalar() is not None
+
+
+def has_row_hash(engine, table_name_cased):
+    """True if the silver table exists and has the _row_hash column."""
+    query = text("""
+        SELECT 1
+        FROM information_schema.columns
+        WHERE table_schema = 'silver' AND table_name = :table_name AND column_name = '_row_hash'
+    """)
+    with engine.connect() as connection:
+        return connection.execute(query, {"table_name": table_name_cased}).scalar() is not None
+
+
+def install_partition_function(engine):
+    """Creates (or replaces) silver.create_month_partitions(), which the partitioned table scripts call."""
+    with engine.begin() as connection:
+        connection.execute(text("CREATE SCHEMA IF NOT EXISTS silver;"))
+        connection.execute(text((SQL_DIR / "silver_partitions.sql").read_text()))
+
+
+def bronze_watermark(connection, table_name_cased):
+    """Latest load timestamp in the bronze table (None if it is empty)."""
+    return connection.execute(
+        text(f'SELECT MAX(_loaded_at) FROM bronze."{table_name_cased}";')
+    ).scalar()
+
+
+def merge_silver_table(engine, table_name_lower, since):
+    """
+    Upserts the bronze rows loaded after `since` into an existing silver table with
+    INSERT ... ON CONFLICT. Returns the new watermark (the latest bronze load merged)
+    and the gold months (first day, ISO format) whose aggregates the merge changed.
+    """
+    table_name_cased = table_name_lower.capitalize()
+    layout = "_partitioned" if SILVER_PARTITIONING and table_name_cased in PARTITIONED_TABLES else ""
+    filepath = INCREMENTAL_SQL_DIR / f"silver_{table_name_lower}_merge{layout}.sql"
+    logging.info(f"  - Merging new bronze rows into silver table: {table_name_cased}...")
+    try:
+        with open(filepath, 'r') as file:
+            sql_script = file.read()
+
+        with engine.begin() as connection:
+            until = bronze_watermark(connection, table_name_cased)
+            if until is None or until <= datetime.fromisoformat(since):
+                logging.info(f"    - No new bronze rows for {table_name_cased}.")
+                return since, []
+            upserted_rows, affected_months = connection.execute(
+                text(sql_script), {"since": since, "until": until}
+            ).one()
+            note(rows_written=upserted_rows)
+            logging.info(
+                f"    - Upserted {upserted_rows} rows into {table_name_cased} "
+                f"({len(affected_months)} gold months affected)."
+            )
+            return until.isoformat(), [month.isoformat() for month in affected_months]
+
+    except Exception as e:
+        logging.error(f"    - Failed to execute {filepath}. Error: {e}")
+        raise
+
+
+def update_history(engine, table_name_lower):
+    """
+    Closes the current history versions of a dimension whose silver row changed or is gone,
+    and appends a version for every id without a current one.
+    """
+    table_name_cased = table_name_lower.capitalize()
+    sql_script = (HISTORY_SQL_DIR / f"silver_{table_name_lower}_history.sql").read_text()
+    with track("silver_history", table_name_cased), engine.begin() as connection:
+        opened, closed = connection.execute(text(sql_script)).one()
+        note(rows_written=opened)
+    logging.info(f"    - History for {table_name_cased}: {opened} version(s) opened, {closed} closed.")
+
+
 def build_silver_layer(engine):
     """
     Executing all SQL scripts in the /sql directory to build the Silver layer.
+    The build order comes from the silver."X" references in each script, and
+    independent tables run concurrently on up to SQL_MAX_WORKERS connections.
+    Tables whose script and inputs are unchanged since their last build are skipped
+    when SKIP_UNCHANGED_TABLES is set. In incremental mode, tables that already have a
+    watermark and a primary key are merged; the rest fall back to a full rebuild.
+    With SILVER_HISTORY set, the history of each rebuilt or merged dimension is updated too.
     """
-    logging.info("--- Starting build of SILVER Layer ---")
+    logging.info(
+        f"--- Starting build of SILVER Layer (mode: {SILVER_BUILD_MODE}, workers: {SQL_MAX_WORKERS}) ---"
+    )
+    manifest = read_manifest()
+    silver_state = read_state(SILVER_STATE_FILE)
+    watermarks = silver_state.setdefault("watermarks", {})
+    # Consumed (and cleared) by the incremental gold build
+    silver_state.setdefault("gold_pending_months", [])
+    silver_state.setdefault("gold_full_refresh", False)
+
+    def save_state(new_watermarks=None, affected_months=(), full_rebuild=False):
+        with _state_lock:
+            watermarks.update(new_watermarks or {})
+            silver_state["gold_pending_months"] = sorted(
+                set(silver_state["gold_pending_months"]) | set(affected_months)
+            )
+            # A table rebuilt from scratch can change any month, so gold has to be rebuilt too
+            silver_state["gold_full_refresh"] = silver_state["gold_full_refresh"] or full_rebuild
+            write_state(silver_state, SILVER_STATE_FILE)
 
-    sql_execution_order = [
+    silver_scripts = [
         "silver_drivers.sql",
         "silver_vehicles.sql",
         "silver_customers.sql",
@@ -101,35 +324,83 @@ def build_silver_layer(engine):
         "silver_shipments.sql"
     ]
 
-    for filename in sql_execution_order:
+    scripts = {}
+    for filename in silver_scripts:
         filepath = SQL_DIR / filename
-        table_name_lower = filename.split('.')[0].replace('silver_', '')
         if filepath.exists():
-            execute_sql_from_file(engine, filepath, table_name_lower)
+            scripts[filename] = read_silver_script(filepath)
         else:
             logging.error(f"  - SQL file not found: {filepath}")
 
+    def build_table(filename):
+        table_name_lower = filename.split('.')[0].replace('silver_', '')
+        table_name_cased = table_name_lower.capitalize()
+        fingerprint = script_fingerprint(scripts[filename], manifest)
+        if is_unchanged(manifest, "silver", table_name_cased, fingerprint):
+            logging.info(f"  - Skipping silver table {table_name_cased}: inputs unchanged.")
+            return
+        with track("silver", table_name_cased):
+            if SILVER_BUILD_MODE != "incremental":
+                execute_sql_from_file(engine, SQL_DIR / filename, table_name_lower)
+                record_version(manifest, "silver", table_name_cased, fingerprint)
+                save_state(full_rebuild=True)
+            else:
+                since = watermarks.get(table_name_cased)
+                if (
+                    since and has_primary_key(engine, table_name_cased)
+                    and (
+                        table_name_cased not in PARTITIONED_TABLES
+                        or is_partitioned(engine, table_name_cased) == SILVER_PARTITIONING
+                    )
+                    and (table_name_cased not in ROW_HASH_TABLES or has_row_hash(engine, table_name_cased))
+                ):
+                    new_mark, affected_months = merge_silver_table(engine, table_name_lower, since)
+                    record_version(manifest, "silver", table_name_cased, fingerprint)
+                    save_state({table_name_cased: new_mark}, affected_months)
+                else:
+                    # First incremental run (or keys not applied yet, or a table built with the
+                    # other partitioning layout or before row hashes): full build, then start tracking
+                    with engine.connect() as connection:
+                        latest = bronze_watermark(connection, table_name_cased)
+                    execute_sql_from_file(engine, SQL_DIR / filename, table_name_lower)
+                    record_version(manifest, "silver", table_name_cased, fingerprint)
+                    save_state(
+                        {table_name_cased: latest.isoformat() if latest else None}, full_rebuild=True
+                    )
+        if SILVER_HISTORY and table_name_cased in HISTORY_TABLES:
+            update_history(engine, table_name_lower)
+
+    if SILVER_PARTITIONING:
+        install_partition_function(engine)
+    # Created up front: concurrent CREATE SCHEMA IF NOT EXISTS calls can still collide
+    with engine.begin() as connection:
+        connection.execute(text("CREATE SCHEMA IF NOT EXISTS silver;"))
+        connection.execute(text("CREATE SCHEMA IF NOT EXISTS quarantine;"))
+    run_dag(build_dependency_graph(scripts), build_table, max_workers=SQL_MAX_WORKERS)
+
     logging.info("--- SILVER Layer build completed. ---")
 
 
-# --- 4. MAIN ORCHESTRATOR ---
+# --- 3. MAIN ORCHESTRATOR ---
 
-def main():
-    """Main function to orchestrate the Silver layer build."""
+def main(engine=None):
+    """Main function to orchestrate the Silver layer build. Returns True on success."""
     logging.info("=" * 50)
     logging.info("=== Starting Silver Layer Build Process ===")
 
     try:
-        db_engine = get_db_engine()
+        db_engine = engine or get_db_engine()
         build_silver_layer(db_engine)
         logging.info("Silver layer build finished successfully.")
+        return True
 
     except Exception as e:
         logging.critical(f"Silver layer build failed. Error: {e}")
+        return False
 
     finally:
         logging.info("=" * 50)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(0 if main() else 1)
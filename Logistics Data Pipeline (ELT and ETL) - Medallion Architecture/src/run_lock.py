@@ -0,0 +1,70 @@
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# --- Configuration ---
+BASE_DIR = Path(__file__).resolve().parent.parent
+CONFIG_DIR = BASE_DIR / "config"
+
+load_dotenv()
+# Pipeline runs allowed at the same time across all processes (manual etl.py runs and the
+# scheduler). Each run holds one of this many lock files for as long as it runs.
+MAX_CONCURRENT_RUNS = int(os.getenv("PIPELINE_MAX_CONCURRENT_RUNS", "1"))
+
+# Exit code of etl.py when every run slot is taken (EX_TEMPFAIL: try again later)
+RUN_BUSY_EXIT_CODE = 75
+
+
+class RunLockBusy(RuntimeError):
+    """Raised when MAX_CONCURRENT_RUNS pipeline runs are already in progress."""
+
+
+def lock_path(slot):
+    return CONFIG_DIR / f"pipeline_run_{slot}.lock"
+
+
+def try_lock(file):
+    """Takes an exclusive, non-blocking lock on an open file. The OS releases it if the process dies."""
+    try:
+        file.seek(0)
+        if fcntl:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+@contextmanager
+def run_slot(max_runs=None):
+    """
+    Holds one of `max_runs` (default MAX_CONCURRENT_RUNS) run slots for the duration of the
+    block and yields its number, or raises RunLockBusy if all of them are taken.
+    """
+    max_runs = max(max_runs or MAX_CONCURRENT_RUNS, 1)
+    CONFIG_DIR.mkdir(exist_ok=True)
+    for slot in range(max_runs):
+        file = open(lock_path(slot), 'a+')
+        if not try_lock(file):
+            file.close()
+            continue
+        try:
+            # Shows which process holds the slot, for anyone looking at the file
+            file.seek(0)
+            file.truncate()
+            file.write(f"{os.getpid()}\n")
+            file.flush()
+            yield slot
+        finally:
+            file.close()
+        return
+    raise RunLockBusy(f"All {max_runs} pipeline run slot(s) are in use.")
@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import uuid
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import event
+
+# --- Configuration ---
+BASE_DIR = Path(__file__).resolve().parent.parent
+LOG_DIR = BASE_DIR / "logs"
+# One JSON record per stage or table per run, appended by every stage
+METRICS_FILE = LOG_DIR / "run_metrics.jsonl"
+
+# Set by etl.py for a whole pipeline run and inherited by subprocess stages
+RUN_ID_ENV = "PIPELINE_RUN_ID"
+
+METRIC_FIELDS = ["wall_seconds", "rows_read", "rows_written", "bytes", "db_seconds"]
+
+_write_lock = threading.Lock()
+# Metrics being collected by the current thread; engine events add statement time to them
+_active = threading.local()
+
+
+def new_run_id():
+    """A sortable, unique id such as 20250901T070000-3f9a1c."""
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def current_run_id():
+    """The id of the pipeline run in progress; a stage run on its own starts a run of its own."""
+    if not os.getenv(RUN_ID_ENV):
+        os.environ[RUN_ID_ENV] = new_run_id()
+    return os.environ[RUN_ID_ENV]
+
+
+def record_metric(stage, table=None, status="success", **fields):
+    """Appends one metrics record for a stage (or one of its tables) to METRICS_FILE."""
+    record = {
+        "run_id": current_run_id(),
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "stage": stage,
+        "table": table,
+        "status": status,
+        **{name: fields.get(name) for name in METRIC_FIELDS},
+    }
+    line = json.dumps(record) + "\n"
+    with _write_lock:
+        LOG_DIR.mkdir(exist_ok=True)
+        with open(METRICS_FILE, 'a') as file:
+            file.write(line)
+
+
+@contextmanager
+def track(stage, table=None):
+    """
+    Times the wrapped block and records it, including the time spent in SQL statements
+    executed by this thread. The yielded dict takes rows_read, rows_written and bytes.
+    """
+    metric = {"db_seconds": 0.0}
+    stack = _active.__dict__.setdefault("stack", [])
+    stack.append(metric)
+    start = time.perf_counter()
+    status = "failed"
+    try:
+        yield metric
+        status = "success"
+    finally:
+        stack.pop()
+        metric["wall_seconds"] = round(time.perf_counter() - start, 4)
+        metric["db_seconds"] = round(metric["db_seconds"], 4)
+        record_metric(stage, table, status=status, **metric)
+
+
+def note(**fields):
+    """Sets fields (e.g. rows_read, rows_written) on the innermost metric tracked by this thread."""
+    stack = getattr(_active, "stack", [])
+    if stack:
+        stack[-1].update(fields)
+
+
+def add_db_time(seconds):
+    """Adds time spent in the database outside SQLAlchemy (e.g. a raw COPY) to the active metrics."""
+    for metric in getattr(_active, "stack", []):
+        metric["db_seconds"] += seconds
+
+
+def instrument_engine(engine):
+    """Adds the execution time of every statement run through `engine` to the active metrics."""
+
+    # Start times are kept per cursor, so a failed statement never leaves one behind for the next
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_times", {})[cursor] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        add_db_time(time.perf_counter() - conn.info["query_start_times"].pop(cursor))
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        # after_cursor_execute does not fire for a failed statement, but its time still counts
+        connection = exception_context.connection
+        if connection is None:
+            return
+        # Statements run through an execution context report their cursor there
+        cursor = exception_context.cursor
+        if cursor is None and exception_context.execution_context is not None:
+            cursor = exception_context.execution_context.cursor
+        start = connection.info.get("query_start_times", {}).pop(cursor, None)
+        if start is not None:
+            add_db_time(time.perf_counter() - start)
+
+
+def read_metrics():
+    """Reads every metrics record, oldest first."""
+    if not METRICS_FILE.exists():
+        return []
+    with open(METRICS_FILE, 'r') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def summarize_runs(runs=5, field="wall_seconds"):
+    """
+    Returns a text table comparing `field` for every stage and table across the last
+    `runs` runs, with the change between the two most recent runs.
+    """
+    records = read_metrics()
+    run_ids = list(dict.fromkeys(record["run_id"] for record in records))[-runs:]
+    if not run_ids:
+        return "No runs recorded yet."
+
+    values = defaultdict(dict)
+    for record in records:
+        if record["run_id"] in run_ids and record.get(field) is not None:
+            key = (record["stage"], record["table"] or "(stage)")
+            values[key][record["run_id"]] = values[key].get(record["run_id"], 0) + record[field]
+
+    # Seconds with millisecond precision, counts as whole numbers
+    value_format = ">22.3f" if field.endswith("seconds") else ">22,.0f"
+    header = f"{'stage':<18} {'table':<30}" + "".join(f" {run_id:>22}" for run_id in run_ids)
+    lines = [f"{field} for the last {len(run_ids)} runs", header + f" {'change':>8}"]
+    for (stage, table), by_run in sorted(values.items()):
+        cells = "".join(
+            f" {by_run[run_id]:{value_format}}" if run_id in by_run else f" {'-':>22}" for run_id in run_ids
+        )
+        change = ""
+        if len(run_ids) > 1 and by_run.get(run_ids[-2]) and run_ids[-1] in by_run:
+            change = f"{(by_run[run_ids[-1]] / by_run[run_ids[-2]] - 1) * 100:+.0f}%"
+        lines.append(f"{stage:<18} {table:<30}{cells} {change:>8}")
+    return "\n".join(lines)
@@ -1,16 +1,25 @@
-import schedule
+import os
 import time
+import signal
+import argparse
+import importlib
+import threading
 import subprocess
 import logging
+from datetime import datetime, timedelta
 from pathlib import Path
 import sys
 
+from dotenv import load_dotenv
+
 # --- 1. CONFIGURATION & INITIALIZATION ---
 
 # Define project paths
 BASE_DIR = Path(__file__).resolve().parent.parent
 LOG_DIR = BASE_DIR / "logs"
 SRC_DIR = BASE_DIR / "src"
+CONFIG_DIR = BASE_DIR / "config"
+SCHEDULER_STATE_FILE = CONFIG_DIR / "scheduler_state.json"
 
 # Create logs directory
 LOG_DIR.mkdir(exist_ok=True)
@@ -25,12 +34,59 @@ logging.basicConfig(
     ]
 )
 
+from pipeline_state import read_state, write_state  # noqa: E402
+from run_lock import RUN_BUSY_EXIT_CODE, RunLockBusy, run_slot  # noqa: E402
+
+load_dotenv()
+# Same switch as etl.py: "subprocess" also runs the pipeline itself in a separate interpreter
+PIPELINE_RUNNER = os.getenv("PIPELINE_RUNNER", "inprocess").lower()
+
+# "daily" runs the pipeline once a day at SCHEDULE_DAILY_AT (local time); "trigger" polls a
+# cheap fingerprint of the source spreadsheet and runs only when it has changed.
+SCHEDULER_MODE = os.getenv("SCHEDULER_MODE", "daily").lower()
+SCHEDULE_DAILY_AT = os.getenv("SCHEDULE_DAILY_AT", "07:00")
+SCHEDULER_POLL_SECONDS = int(os.getenv("SCHEDULER_POLL_SECONDS", "60"))
+
+# Runs missed while the scheduler was down (or while another run held the lock) are caught
+# up with a single run on the next poll. Without catch-up, a run is skipped once it is
+# more than MISSED_RUN_GRACE late.
+SCHEDULER_CATCH_UP = os.getenv("SCHEDULER_CATCH_UP", "true").lower() == "true"
+MISSED_RUN_GRACE = timedelta(minutes=15)
+
+# A failed triggered run is retried for the same source version only after this long
+FAILED_RUN_BACKOFF = timedelta(minutes=15)
+
 # --- 2. JOB DEFINITION ---
 
+def run_pipeline_in_process():
+    """Runs etl.main() in this interpreter, also writing the pipeline's own log file."""
+    logging.info("Triggering in-process pipeline run.")
+    # Imported here so the scheduler's logging setup above takes precedence
+    etl = importlib.import_module("etl")
+    with run_slot(), etl.log_to_file(etl.LOG_FILE):
+        return etl.main()
+
+
 def run_pipeline_job():
     """
-    Defines the job to be run, which is executing the main.py script.
+    Defines the job to be run, which is executing the etl.py pipeline.
+    Returns "success", "failed", or "busy" when another run holds every run slot.
     """
+    if PIPELINE_RUNNER != "subprocess":
+        try:
+            success = run_pipeline_in_process()
+        except RunLockBusy as e:
+            logging.warning(f"{e} Will retry on the next poll.")
+            return "busy"
+        except Exception as e:
+            logging.error(f"An unexpected error occurred: {e}")
+            return "failed"
+        if success:
+            logging.info("Pipeline run job completed successfully.")
+            return "success"
+        logging.error("Pipeline run failed. See main_pipeline.log for details.")
+        return "failed"
+
     main_script_path = SRC_DIR / "etl.py"
     logging.info(f"Triggering pipeline run for: {main_script_path}")
 
@@ -41,24 +97,142 @@ def run_pipeline_job():
             check=True # This will raise an exception if the script fails
         )
         logging.info("Pipeline run job completed successfully.")
+        return "success"
     except subprocess.CalledProcessError as e:
+        if e.returncode == RUN_BUSY_EXIT_CODE:
+            logging.warning("Another pipeline run is in progress. Will retry on the next poll.")
+            return "busy"
         logging.error(f"Pipeline run failed with return code {e.returncode}.")
     except FileNotFoundError:
         logging.error(f"MAIN SCRIPT NOT FOUND at {main_script_path}. Please check the path.")
     except Exception as e:
         logging.error(f"An unexpected error occurred: {e}")
+    return "failed"
+
+
+def run_and_record(state, trigger):
+    """Runs the pipeline and persists the outcome as the job's last run. Returns the status."""
+    started_at = datetime.now()
+    status = run_pipeline_job()
+    if status != "busy":
+        state["last_run"] = {
+            "trigger": trigger,
+            "started_at": started_at.isoformat(timespec="seconds"),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "status": status,
+        }
+        write_state(state, SCHEDULER_STATE_FILE)
+    return status
 
 # --- 3. SCHEDULING ---
 
-# CORRECTED: Schedule the job to run every day at 7:00 AM
-schedule.every().day.at("07:00").do(run_pipeline_job)
 
-logging.info("Scheduler started. Waiting for the scheduled time to run the pipeline...")
-print("Scheduler is running. Press Ctrl+C to exit.")
+def latest_daily_slot(now):
+    """The most recent SCHEDULE_DAILY_AT at or before `now`."""
+    hour, minute = (int(part) for part in SCHEDULE_DAILY_AT.split(":"))
+    slot = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    return slot if slot <= now else slot - timedelta(days=1)
+
+
+def check_daily(state):
+    """Runs the pipeline if a daily slot has passed since the last one handled."""
+    now = datetime.now()
+    slot = latest_daily_slot(now)
+    last_slot = state.get("last_slot")
+    if last_slot is None:
+        # First start: wait for the next slot rather than running straight away
+        state["last_slot"] = slot.isoformat()
+        write_state(state, SCHEDULER_STATE_FILE)
+        return
+    if datetime.fromisoformat(last_slot) >= slot:
+        return
+
+    missed = (slot - datetime.fromisoformat(last_slot)).days
+    if now - slot > MISSED_RUN_GRACE:
+        if not SCHEDULER_CATCH_UP:
+            logging.warning(f"Skipping the run due at {slot:%Y-%m-%d %H:%M} (catch-up disabled).")
+            state["last_slot"] = slot.isoformat()
+            write_state(state, SCHEDULER_STATE_FILE)
+            return
+        # Every run is a full refresh, so one run catches up on all the missed ones
+        logging.info(f"Catching up {missed} missed run(s) with one run (last due {slot:%Y-%m-%d %H:%M}).")
+
+    if run_and_record(state, f"daily {slot:%Y-%m-%d %H:%M}") != "busy":
+        state["last_slot"] = slot.isoformat()
+        write_state(state, SCHEDULER_STATE_FILE)
+
+
+def check_trigger(state):
+    """Runs the pipeline if the source spreadsheet changed since the last successful run."""
+    # Imported here so the scheduler's logging setup above takes precedence
+    push_to_bronze = importlib.import_module("push_to_bronze")
+    try:
+        fingerprint = push_to_bronze.source_fingerprint()
+    except Exception as e:
+        logging.warning(f"Could not fingerprint the source: {e}")
+        return
+
+    if fingerprint == state.get("source_fingerprint"):
+        return
+    last_run = state.get("last_run", {})
+    if (
+        last_run.get("status") == "failed" and state.get("failed_fingerprint") == fingerprint
+        and datetime.now() - datetime.fromisoformat(last_run["finished_at"]) < FAILED_RUN_BACKOFF
+    ):
+        return
+
+    logging.info(f"Source changed (modified {fingerprint}). Starting a run.")
+    status = run_and_record(state, f"source changed {fingerprint}")
+    # Taken before the run, so changes made while it ran trigger another one
+    if status == "success":
+        state["source_fingerprint"] = fingerprint
+    elif status == "failed":
+        state["failed_fingerprint"] = fingerprint
+    write_state(state, SCHEDULER_STATE_FILE)
+
+
+def poll():
+    """One scheduler tick: reloads the job state and starts a run if one is due."""
+    state = read_state(SCHEDULER_STATE_FILE)
+    if SCHEDULER_MODE == "trigger":
+        check_trigger(state)
+    else:
+        check_daily(state)
 
 # --- 4. RUN LOOP ---
 
-while True:
-    # Checks whether a scheduled task is pending to run or not
-    schedule.run_pending()
-    time.sleep(1) # Wait for one second before checking again
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the pipeline on a daily schedule or when the source changes.")
+    parser.add_argument("--once", action="store_true", help="check once and exit (e.g. from cron)")
+    args = parser.parse_args()
+
+    if args.once:
+        poll()
+        return
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+
+    if SCHEDULER_MODE == "trigger":
+        logging.info(f"Scheduler started. Polling the source for changes every {SCHEDULER_POLL_SECONDS}s...")
+    else:
+        logging.info(f"Scheduler started. Running the pipeline daily at {SCHEDULE_DAILY_AT}...")
+    print("Scheduler is running. Press Ctrl+C to exit.")
+
+    try:
+        while not stop.is_set():
+            started = time.monotonic()
+            try:
+                poll()
+            except Exception as e:
+                logging.error(f"Scheduler check failed: {e}")
+            # Waits out the rest of the poll interval; a SIGTERM ends the wait early
+            stop.wait(max(SCHEDULER_POLL_SECONDS - (time.monotonic() - started), 0))
+    except KeyboardInterrupt:
+        pass
+    logging.info("Scheduler stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import time
+import random
+import logging
+import threading
+from collections import deque
+
+from gspread.exceptions import APIError
+from requests.exceptions import ConnectionError, Timeout
+
+# HTTP statuses worth retrying: quota exceeded and transient server errors
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class RateLimiter:
+    """Thread-safe sliding-window limiter: at most `max_calls` calls per `period` seconds."""
+
+    def __init__(self, max_calls, period=60.0):
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a call slot is free, then claims it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                wait = self.period - (now - self._calls[0])
+            time.sleep(wait)
+
+
+def is_retryable(error):
+    """Quota/server errors and network failures are retried; anything else is not."""
+    if isinstance(error, APIError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (ConnectionError, Timeout))
+
+
+def call_with_retry(func, *args, limiter=None, max_retries=5, base_delay=1.0, description="", **kwargs):
+    """
+    Calls a Sheets API function under the rate limiter, retrying retryable errors
+    with exponential backoff plus jitter.
+    """
+    for attempt in range(max_retries + 1):
+        if limiter:
+            limiter.acquire()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            delay = base_delay * (2 ** attempt) + random.uniform(0, base_delay)
+            logging.warning(
+                f"Sheets API call {description} failed ({e}); retry {attempt + 1}/{max_retries} in {delay:.1f}s"
+            )
+            time.sleep(delay)
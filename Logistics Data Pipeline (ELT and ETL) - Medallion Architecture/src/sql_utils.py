@@ -0,0 +1,39 @@
+import re
+
+# Matches schema-qualified, quoted table references such as silver."Orders"
+TABLE_REF_PATTERN = re.compile(r'\b(bronze|silver|gold)\."(\w+)"')
+TARGET_PATTERN = re.compile(r'(?:CREATE\s+TABLE|INSERT\s+INTO)\s+(\w+)\."(\w+)"', re.IGNORECASE)
+# The query of a CREATE TABLE ... AS script, up to its final ';'
+SELECT_PATTERN = re.compile(r'CREATE\s+TABLE\s+\w+\."\w+"\s+AS\s+(.*?)\s*;?\s*$', re.IGNORECASE | re.DOTALL)
+# (pattern, replacement) pairs removing the month partitioning from the silver scripts: the
+# PARTITION BY clause of the table definition and the call creating the partitions
+PARTITIONING_REWRITES = [
+    (re.compile(r"\)\s*PARTITION\s+BY\s+RANGE\s*\(\w+\)", re.IGNORECASE), ")"),
+    (re.compile(r"SELECT\s+silver\.create_month_partitions\(.*?\);", re.IGNORECASE | re.DOTALL), ""),
+]
+
+
+def script_target(sql_script):
+    """Returns the (schema, table) a script creates (CREATE TABLE) or writes to (INSERT INTO)."""
+    match = TARGET_PATTERN.search(sql_script)
+    return (match.group(1), match.group(2)) if match else None
+
+
+def script_inputs(sql_script):
+    """Returns the set of (schema, table) a script reads from, excluding its own target."""
+    return set(TABLE_REF_PATTERN.findall(sql_script)) - {script_target(sql_script)}
+
+
+def script_select(sql_script):
+    """Returns the query a CREATE TABLE ... AS script builds its table from."""
+    match = SELECT_PATTERN.search(sql_script)
+    if not match:
+        raise ValueError("Script has no CREATE TABLE ... AS statement.")
+    return match.group(1)
+
+
+def without_partitioning(sql_script):
+    """Returns a silver script that creates and fills a plain table instead of a month-partitioned one."""
+    for pattern, replacement in PARTITIONING_REWRITES:
+        sql_script = pattern.sub(replacement, sql_script)
+    return sql_script